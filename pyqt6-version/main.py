@@ -1,7 +1,6 @@
 import sys
 import os
 import json
-import tempfile
 from pathlib import Path
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QTabWidget, QWidget,
     QVBoxLayout, QHBoxLayout, QTableWidget, QTableWidgetItem,
@@ -26,6 +25,8 @@ from src.logic.session_logger import session_logger
 from src.logic.status_manager import get_status_color, get_status_code_from_text
 from src.logic.language_manager import LanguageManager
 from src.logic.folder_structure import NovelFolderStructure
+from src.logic.translator_async import create_engine_bridge
+from src.logic.rate_limiter import rate_limits
 import subprocess
 
 class ElidedLabel(QLabel):
@@ -70,7 +71,6 @@ class ImportChaptersThread(QThread):
         self.lang_manager = lang_manager
     
     def run(self):
-        import shutil
         try:
             self.status_message.emit(self.lang_manager.get_string("main_window.import_chapters.copying"))
 
@@ -83,19 +83,14 @@ class ImportChaptersThread(QThread):
 
             # Asegurar que la estructura de carpetas existe
             NovelFolderStructure.ensure_structure(self.target_dir)
-            originals_path = NovelFolderStructure.get_originals_path(self.target_dir)
 
             copied_count = 0
             for filename in txt_files:
                 source_path = os.path.join(self.source_dir, filename)
-                target_path = os.path.join(originals_path, filename)
 
-                try:
-                    shutil.copy2(source_path, target_path)
+                # Copia a originals/ o a la base de datos, según el almacenamiento de la novela
+                if NovelFolderStructure.copy_file_to_originals(self.target_dir, source_path):
                     copied_count += 1
-                except Exception as e:
-                    print(f"Error copying {filename}: {e}")
-                    continue
             
             if copied_count > 0:
                 success_msg = self.lang_manager.get_string("main_window.import_chapters.success").format(files_copied=copied_count)
@@ -218,16 +213,22 @@ class NovelManagerApp(QMainWindow):
         right_layout = QVBoxLayout(right_panel)
         # Create the tab widget for the right side only
         self.tab_widget = QTabWidget()
-        # Create shared temporary directory for prompts
-        self._temp_dir_obj = tempfile.TemporaryDirectory()
-        self.shared_temp_prompts_path = Path(self._temp_dir_obj.name)
 
         # Create individual tab panels with reference to main window
         self.clean_panel = CleanPanel(self)
         self.create_panel = CreateEpubPanel()
         self.create_panel.set_main_window(self)
-        self.translate_panel = TranslatePanel(self, self.shared_temp_prompts_path)  # Modificado para pasar self y temp_path
-        self.refine_panel = RefinePanel(self, self.shared_temp_prompts_path)  # Nueva pestaña de refinamiento con temp_path compartido
+        self.translate_panel = TranslatePanel(self)
+        self.refine_panel = RefinePanel(self)  # Nueva pestaña de refinamiento
+        # Motor asíncrono opcional compartido por las pestañas de traducción y refinamiento
+        self.request_engine = create_engine_bridge(
+            self.translate_panel.translation_manager.translator.models_config,
+            self.translate_panel.default_config.get("async_engine")
+        )
+        rate_limits.configure(self.translate_panel.default_config.get("rate_limits"))
+        if self.request_engine:
+            self.translate_panel.translation_manager.set_request_engine(self.request_engine)
+            self.refine_panel.refine_manager.set_request_engine(self.request_engine)
         # Add panels to the tab widget
         self.tab_widget.addTab(self.clean_panel, self.lang_manager.get_string("clean_panel.tab_label", "Limpiar"))
         self.tab_widget.addTab(self.create_panel, self.lang_manager.get_string("create_panel.tab_label", "Ebook"))
@@ -297,6 +298,9 @@ class NovelManagerApp(QMainWindow):
         """Limpia recursos al cerrar la aplicación"""
         if hasattr(self, '_theme_timer'):
             self._theme_timer.stop()
+        # Detener el motor asíncrono si está activo
+        if getattr(self, 'request_engine', None):
+            self.request_engine.shutdown()
         # Limpiar el archivo de log de la sesión
         session_logger.cleanup()
         event.accept()
@@ -472,13 +476,14 @@ class NovelManagerApp(QMainWindow):
         if not self.current_directory:
             return
 
-        # Determinar la ruta del archivo para abrir (translated si existe, sino originals)
-        translated_path = NovelFolderStructure.get_translated_path(self.current_directory)
-        originals_path = NovelFolderStructure.get_originals_path(self.current_directory)
-
-        file_path = translated_path / filename
-        if not file_path.exists():
-            file_path = originals_path / filename
+        # Determinar el archivo para abrir (translated si existe, sino originals). Con los
+        # capítulos en la base de datos se abre una copia temporal de solo lectura
+        storage = NovelFolderStructure.get_storage(self.current_directory)
+        kind = "translated" if storage.exists("translated", filename) else "original"
+        try:
+            file_path = storage.local_path(kind, filename)
+        except FileNotFoundError:
+            file_path = NovelFolderStructure.get_originals_path(self.current_directory) / filename
 
         self.open_file(str(file_path))
 
@@ -724,7 +729,15 @@ class NovelManagerApp(QMainWindow):
             check_refine_settings,
             temp_api_keys=translate_panel.temp_api_keys,
             allow_retranslation=already_translated,
-            segmentation_config=effective_segmentation
+            segmentation_config=effective_segmentation,
+            timeout=translate_panel.timeout_config,
+            lease_config=translate_panel.lease_config,
+            scheduling_config=translate_panel.scheduling_config,
+            packing_config=translate_panel.packing_config,
+            precheck_config=translate_panel.precheck_config,
+            check_sampling_config=translate_panel.check_sampling_config,
+            incremental_config=translate_panel.incremental_config,
+            glossary_config=translate_panel.glossary_config
         )
 
     def import_epub(self):
@@ -1072,9 +1085,6 @@ class NovelManagerApp(QMainWindow):
             self.open_dir_button.setEnabled(True)
             self.update_window_title()
             self.load_chapters()
-
-            # Cargar prompts personalizados al directorio temporal
-            self.load_custom_prompts_to_temp()
         else:
             print(f"Directorio no encontrado: {selected_directory}")
 
@@ -1400,41 +1410,6 @@ class NovelManagerApp(QMainWindow):
                     directory=directory_path))
             self.remove_recent(directory_path)
 
-    def load_custom_prompts_to_temp(self):
-        """Carga prompts personalizados de la DB y los copia al directorio temporal"""
-        if not self.current_directory:
-            return
-
-        # Obtener idiomas actuales
-        source_lang = self.translate_panel.source_lang_combo.currentData()
-        target_lang = self.translate_panel.target_lang_combo.currentData()
-
-        if not source_lang or not target_lang:
-            return
-
-        # Crear instancia de DB
-        db = TranslationDatabase(self.current_directory)
-
-        # Tipos de prompts
-        prompt_types = ['translation', 'refine', 'check']
-
-        # Copiar cada prompt si existe
-        for prompt_type in prompt_types:
-            content = db.get_custom_prompt(source_lang, target_lang, prompt_type)
-            if content:
-                # Crear directorio temporal para el par de idiomas
-                lang_pair_dir = self.translate_panel.temp_prompts_path / f"{source_lang}_{target_lang}"
-                lang_pair_dir.mkdir(parents=True, exist_ok=True)
-
-                # Archivo del prompt
-                prompt_file = lang_pair_dir / f"{prompt_type}.txt"
-
-                try:
-                    with open(prompt_file, 'w', encoding='utf-8') as f:
-                        f.write(content)
-                except Exception as e:
-                    print(f"Error copiando prompt {prompt_type} al temporal: {e}")
-
     def select_directory(self):
         # Obtener el directorio inicial configurado
         initial_dir = get_initial_directory()
@@ -4,6 +4,7 @@ from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel,
                               QGroupBox, QFrame)
 from PyQt6.QtCore import Qt
 from src.logic.database import TranslationDatabase
+from src.logic.prompt_registry import prompt_registry
 
 class NotesDialog(QDialog):
     """
@@ -222,9 +223,8 @@ class NotesDialog(QDialog):
         success = self.db.save_custom_prompt(source_lang, target_lang, prompt_type, content)
         if success:
             QMessageBox.information(self, "Éxito", f"Prompt de {prompt_type} guardado exitosamente.")
-            # Actualizar el directorio temporal con el nuevo prompt
-            if hasattr(self.main_window, 'load_custom_prompts_to_temp'):
-                self.main_window.load_custom_prompts_to_temp()
+            # Descartar cambios de sesión para que se use el prompt recién guardado
+            prompt_registry.clear_session_override(source_lang, target_lang, f"{prompt_type}.txt")
             self.hide_prompt_fields()
         else:
             QMessageBox.warning(self, "Error", "Error al guardar el prompt.")
@@ -5,17 +5,17 @@ from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QGroupBox, QRadioButton,
     QLabel, QPlainTextEdit, QSplitter, QScrollArea,
     QWidget, QMessageBox, QSpinBox)
 from PyQt6.QtCore import Qt
+from src.logic.prompt_registry import prompt_registry
 
 class PromptRefineSettingsDialog(QDialog):
     def __init__(self, parent=None, current_settings=None, models_config=None,
-                 source_lang=None, target_lang=None, temp_prompts_path=None, enabled_auto_segmentation=False):
+                 source_lang=None, target_lang=None, enabled_auto_segmentation=False):
         super().__init__(parent)
         self.main_window = parent.main_window if parent else None
         self.models_config = models_config or self._load_models_config()
         self.current_settings = current_settings or self._get_default_settings()
         self.source_lang = source_lang
         self.target_lang = target_lang
-        self.temp_prompts_path = temp_prompts_path  # Ruta al directorio de prompts temporales
         self.enabled_auto_segmentation = enabled_auto_segmentation
 
         self.init_ui()
@@ -44,45 +44,14 @@ class PromptRefineSettingsDialog(QDialog):
         }
 
     def _load_prompt(self, prompt_name: str) -> str:
-        """Carga un prompt desde el archivo correspondiente al par de idiomas, con fallback a prompts-base"""
+        """Carga un prompt del registro (sesión, novela, par de idiomas o prompts-base)"""
         if not self.source_lang or not self.target_lang:
             return f"Error: No se han especificado los idiomas de origen y destino."
 
-        lang_pair_dir_name = f"{self.source_lang}_{self.target_lang}"
-
-        # 1. Buscar en el directorio de prompts temporales
-        if self.temp_prompts_path:
-            temp_prompt_path = self.temp_prompts_path / lang_pair_dir_name / prompt_name
-            if temp_prompt_path.exists():
-                try:
-                    with open(temp_prompt_path, 'r', encoding='utf-8') as file:
-                        return file.read()
-                except Exception as e:
-                    return f"Error al cargar el prompt temporal: {str(e)}"
-
-        # 2. Si no existe en el temporal, intentar en el directorio específico del par de idiomas
-        prompt_dir = Path(__file__).parent.parent / 'config' / 'prompts' / lang_pair_dir_name
-        prompt_path = prompt_dir / prompt_name
-
-        if prompt_path.exists():
-            try:
-                with open(prompt_path, 'r', encoding='utf-8') as file:
-                    return file.read()
-            except Exception as e:
-                return f"Error al cargar el prompt: {str(e)}"
-
-        # 3. Si no existe en el específico, intentar en prompts-base
-        base_prompt_dir = Path(__file__).parent.parent / 'config' / 'prompts' / 'prompts-base'
-        base_prompt_path = base_prompt_dir / prompt_name
-
-        if base_prompt_path.exists():
-            try:
-                with open(base_prompt_path, 'r', encoding='utf-8') as file:
-                    return file.read()
-            except Exception as e:
-                return f"Error al cargar el prompt base: {str(e)}"
-
-        return ""  # Retornar vacío si no se encuentra en ningún lado
+        try:
+            return prompt_registry.get_template(prompt_name, self.source_lang, self.target_lang)
+        except FileNotFoundError:
+            return ""  # Retornar vacío si no se encuentra en ningún lado
 
     def init_ui(self):
         self.setWindowTitle(self._get_string("prompt_refine_settings_dialog.title", "Prompts and Check/Refine Settings"))
@@ -298,7 +267,7 @@ class PromptRefineSettingsDialog(QDialog):
         self.temp_segment_size_spinbox.setValue(temp_segmentation_config["segment_size"])
 
     def load_prompts(self):
-        """Carga los prompts desde archivos, priorizando el directorio temporal."""
+        """Carga los prompts desde el registro, priorizando los cambios de la sesión."""
         if self.source_lang and self.target_lang:
             # Cargar cada prompt (translation, refine, check)
             self.translation_text.setPlainText(self._load_prompt("translation.txt"))
@@ -306,7 +275,7 @@ class PromptRefineSettingsDialog(QDialog):
             self.check_text.setPlainText(self._load_prompt("check.txt"))
 
     def get_settings(self):
-        """Retorna la configuración de check/refine y guarda los prompts modificados en archivos temporales."""
+        """Retorna la configuración de check/refine y guarda los prompts modificados para la sesión."""
         settings = {
             "use_separate_model": self.use_separate_model_radio.isChecked(),
             "provider": self.provider_combo.currentData() or "",
@@ -318,28 +287,19 @@ class PromptRefineSettingsDialog(QDialog):
             }
         }
 
-        # Guardar prompts modificados en el directorio temporal
-        if self.temp_prompts_path and self.source_lang and self.target_lang:
-            lang_pair_dir = self.temp_prompts_path / f"{self.source_lang}_{self.target_lang}"
-            lang_pair_dir.mkdir(parents=True, exist_ok=True)
-
-            try:
-                # Guardar translation.txt
-                with open(lang_pair_dir / "translation.txt", 'w', encoding='utf-8') as f:
-                    f.write(self.translation_text.toPlainText())
-                
-                # Guardar refine.txt
-                with open(lang_pair_dir / "refine.txt", 'w', encoding='utf-8') as f:
-                    f.write(self.refine_text.toPlainText())
-
-                # Guardar check.txt
-                with open(lang_pair_dir / "check.txt", 'w', encoding='utf-8') as f:
-                    f.write(self.check_text.toPlainText())
-                
+        # Guardar como cambios de sesión solo los prompts que el usuario modificó
+        if self.source_lang and self.target_lang:
+            edited = False
+            for prompt_name, editor in (("translation.txt", self.translation_text),
+                                        ("refine.txt", self.refine_text),
+                                        ("check.txt", self.check_text)):
+                content = editor.toPlainText()
+                if content != self._load_prompt(prompt_name):
+                    prompt_registry.set_session_override(self.source_lang, self.target_lang, prompt_name, content)
+                    edited = True
+
+            if edited:
                 self.main_window.statusBar().showMessage(
                     self._get_string("translate_panel.prompts_saved_temporarily", "Prompts guardados temporalmente"), 3000)
 
-            except Exception as e:
-                QMessageBox.warning(self, "Error", f"No se pudieron guardar los prompts temporales: {e}")
-
         return settings
\ No newline at end of file
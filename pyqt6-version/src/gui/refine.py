@@ -151,7 +151,7 @@ class ApiKeyConfigDialog(QDialog):
         return self.api_input.text().strip()
 
 class RefinePanel(QWidget):
-    def __init__(self, main_window, temp_prompts_path):
+    def __init__(self, main_window):
         super().__init__()
         self.main_window = main_window
         self.refine_manager = RefineManager(main_window.lang_manager)
@@ -160,10 +160,6 @@ class RefinePanel(QWidget):
         # Variable para almacenar API keys temporales
         self.temp_api_keys = {}
 
-        # Usar directorio temporal compartido para prompts de la sesión
-        self.temp_prompts_path = temp_prompts_path
-        self.refine_manager.update_temp_prompts_path(self.temp_prompts_path)
-
         # Cargar variables de entorno desde .env en la carpeta padre
         env_path = Path(__file__).parent.parent.parent / '.env'
         if env_path.exists():
@@ -172,6 +168,7 @@ class RefinePanel(QWidget):
         # Cargar configuración por defecto
         self.default_config = self._load_default_config()
         self.timeout_config = self.default_config.get("timeout", 120)
+        self.refine_config = self.default_config.get("refine", {"paragraph_ids": False, "max_parallel_chapters": 1})
 
         self.init_ui()
         self.connect_signals()
@@ -641,22 +638,21 @@ class RefinePanel(QWidget):
             return
 
         # Verificar que los archivos estén disponibles para refinamiento
-        originals_path = NovelFolderStructure.get_originals_path(self.main_window.current_directory)
-        translated_path = NovelFolderStructure.get_translated_path(self.main_window.current_directory)
+        storage = NovelFolderStructure.get_storage(self.main_window.current_directory)
         available_files = []
 
         for file_info in files_to_refine:
             filename = file_info['name']
-            original_file_path = originals_path / filename
-            translated_file_path = translated_path / filename
+            has_original = storage.exists("original", filename)
+            has_translation = storage.exists("translated", filename)
 
-            if original_file_path.exists() and translated_file_path.exists():
+            if has_original and has_translation:
                 available_files.append(file_info)
             else:
                 missing_parts = []
-                if not original_file_path.exists():
+                if not has_original:
                     missing_parts.append("original")
-                if not translated_file_path.exists():
+                if not has_translation:
                     missing_parts.append("traducido")
                 self.main_window.statusBar().showMessage(
                     self._get_string("refine_panel.error.file_not_available").format(filename=filename) + f" (falta: {', '.join(missing_parts)})")
@@ -680,7 +676,8 @@ class RefinePanel(QWidget):
             self.update_file_status,
             custom_terms,
             temp_api_keys=self.temp_api_keys,
-            timeout=self.timeout_config
+            timeout=self.timeout_config,
+            refine_config=self.refine_config
         )
 
     def stop_refine(self):
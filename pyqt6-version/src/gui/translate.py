@@ -13,6 +13,7 @@ from PyQt6.QtCore import Qt
 from dotenv import load_dotenv
 from src.logic.translation_manager import TranslationManager
 from src.logic.database import TranslationDatabase
+from src.logic.prompt_registry import prompt_registry
 from src.logic.functions import show_confirmation_dialog, load_preset_terms
 from src.logic.status_manager import STATUS_TRANSLATED, STATUS_ERROR, STATUS_PROCESSING, get_status_text
 from src.gui.prompt_refine_settings import PromptRefineSettingsDialog
@@ -150,12 +151,16 @@ class ApiKeyConfigDialog(QDialog):
         return self.api_input.text().strip()
 
 class RangeTranslationDialog(QDialog):
-    def __init__(self, translated_count, total_count, parent=None):
+    def __init__(self, translated_count, total_count, parent=None, stale_count=0, check_enabled=False):
         super().__init__(parent)
         self.translated_count = translated_count
         self.total_count = total_count
+        self.stale_count = stale_count
+        self.check_enabled = check_enabled
         self.main_window = parent.main_window if parent else None
         self.result_choice = False  # False = omitir, True = volver a traducir
+        self.stale_only = False  # True = volver a traducir solo los desactualizados
+        self.check_existing = False  # True = comprobar los ya traducidos sin retraducirlos
         self.init_ui()
 
     def _get_string(self, key, default_text=""):
@@ -176,6 +181,11 @@ class RangeTranslationDialog(QDialog):
             "translate_panel.range_translation_dialog.message",
             "Se encontraron {translated} capítulos ya traducidos de {total} en el rango seleccionado. ¿Qué desea hacer?"
         ).format(translated=self.translated_count, total=self.total_count)
+        if self.stale_count:
+            message += " " + self._get_string(
+                "translate_panel.range_translation_dialog.stale_message",
+                "{stale} de ellos se tradujeron de una versión anterior del original."
+            ).format(stale=self.stale_count)
 
         info_label = QLabel(message)
         info_label.setWordWrap(True)
@@ -196,6 +206,18 @@ class RangeTranslationDialog(QDialog):
         buttons_layout.addWidget(self.omit_button)
         buttons_layout.addWidget(self.retranslate_button)
 
+        if self.stale_count:
+            self.stale_button = QPushButton(self._get_string(
+                "translate_panel.range_translation_dialog.stale_button", "Volver a traducir solo desactualizados"))
+            self.stale_button.clicked.connect(self.on_retranslate_stale)
+            buttons_layout.addWidget(self.stale_button)
+
+        if self.check_enabled:
+            self.check_button = QPushButton(self._get_string(
+                "translate_panel.range_translation_dialog.check_button", "Comprobar traducidos"))
+            self.check_button.clicked.connect(self.on_check_existing)
+            buttons_layout.addWidget(self.check_button)
+
         layout.addLayout(buttons_layout)
         self.setLayout(layout)
 
@@ -209,12 +231,24 @@ class RangeTranslationDialog(QDialog):
         self.result_choice = True
         self.accept()
 
+    def on_retranslate_stale(self):
+        """El usuario elige volver a traducir solo los capítulos desactualizados"""
+        self.result_choice = True
+        self.stale_only = True
+        self.accept()
+
+    def on_check_existing(self):
+        """El usuario elige comprobar los capítulos ya traducidos sin retraducirlos"""
+        self.result_choice = False
+        self.check_existing = True
+        self.accept()
+
     def get_result(self):
         """Retorna True si elige volver a traducir, False si omite"""
         return self.result_choice
 
 class TranslatePanel(QWidget):
-    def __init__(self, main_window, temp_prompts_path):
+    def __init__(self, main_window):
         super().__init__()
         self.main_window = main_window
         self.translation_manager = TranslationManager(main_window.lang_manager)
@@ -226,10 +260,6 @@ class TranslatePanel(QWidget):
         # Variable para almacenar API keys temporales
         self.temp_api_keys = {}
 
-        # Usar directorio temporal compartido para prompts de la sesión
-        self.temp_prompts_path = temp_prompts_path
-        self.translation_manager.update_temp_prompts_path(self.temp_prompts_path)
-
         # Cargar variables de entorno desde .env en la carpeta padre
         env_path = Path(__file__).parent.parent.parent / '.env'
         if env_path.exists():
@@ -239,6 +269,13 @@ class TranslatePanel(QWidget):
         self.default_config = self._load_default_config()
         self.segmentation_config = self.default_config.get("auto_segmentation", {"enabled": False, "threshold": 10000, "segment_size": 5000})
         self.timeout_config = self.default_config.get("timeout", 120)
+        self.lease_config = self.default_config.get("distributed_workers", {"enabled": False, "lease_seconds": 600})
+        self.scheduling_config = self.default_config.get("scheduling", {"strategy": "lpt", "max_parallel_chapters": 1})
+        self.packing_config = self.default_config.get("chapter_packing", {"enabled": False, "token_budget": 3000, "max_chapter_chars": 4000})
+        self.precheck_config = self.default_config.get("precheck", {"enabled": False, "skip_llm_check_on_strong_pass": False})
+        self.check_sampling_config = self.default_config.get("check_sampling", {"enabled": False})
+        self.incremental_config = self.default_config.get("incremental_retranslation", {"enabled": True, "max_changed_ratio": 0.5})
+        self.glossary_config = self.default_config.get("glossary", {"filter_terms": True})
 
         self.init_ui()
         self.connect_signals()
@@ -623,7 +660,6 @@ class TranslatePanel(QWidget):
             models_config=self.models_config,
             source_lang=source_lang,
             target_lang=target_lang,
-            temp_prompts_path=self.temp_prompts_path,  # Pasar la ruta temporal
             enabled_auto_segmentation=self.enable_auto_segmentation_radio.isChecked()
         )
         if dialog.exec() == QDialog.DialogCode.Accepted:
@@ -785,20 +821,30 @@ class TranslatePanel(QWidget):
             return
 
         # Verificar cuántos capítulos ya están traducidos en el rango
-        # (una sola consulta, no una por archivo)
+        # (una sola consulta y un solo listado de las traducciones, no uno por archivo)
         db = TranslationDatabase(self.main_window.current_directory)
-        all_records = db.get_all_translated_files()
-        translated_names = set(r['filename'] for r in all_records)
-
-        translated_count = sum(1 for f in files_to_translate if f['name'] in translated_names)
+        statuses = db.get_chapter_statuses([f['name'] for f in files_to_translate])
+        translated_names = {name for name, status in statuses.items() if status["translated"]}
+        translated_count = len(translated_names)
 
         allow_retranslation = False
+        check_existing = False
         if translated_count > 0:
+            # Traducidos cuyo original cambió después de traducirlos
+            stale_names = translated_names & set(db.get_stale_chapters(list(translated_names)))
             # Mostrar diálogo para preguntar qué hacer con los capítulos ya traducidos
-            dialog = RangeTranslationDialog(translated_count, len(files_to_translate), self)
+            dialog = RangeTranslationDialog(translated_count, len(files_to_translate), self, len(stale_names),
+                                            enable_check)
             if dialog.exec() == QDialog.DialogCode.Accepted:
                 allow_retranslation = dialog.get_result()
-                if not allow_retranslation:
+                check_existing = dialog.check_existing
+                if dialog.stale_only:
+                    # Omitir los traducidos que siguen al día
+                    files_to_translate = [
+                        file_info for file_info in files_to_translate
+                        if file_info['name'] not in translated_names or file_info['name'] in stale_names
+                    ]
+                elif not allow_retranslation and not check_existing:
                     # Filtrar la lista para omitir los ya traducidos
                     files_to_translate = [
                         file_info for file_info in files_to_translate
@@ -831,7 +877,15 @@ class TranslatePanel(QWidget):
             temp_api_keys=self.temp_api_keys,  # <-- Pasar las API keys temporales
             allow_retranslation=allow_retranslation,  # <-- Pasar el flag de permitir re-traducción
             segmentation_config=effective_segmentation,
-            timeout=self.timeout_config  # <-- Pasar el timeout configurado
+            timeout=self.timeout_config,  # <-- Pasar el timeout configurado
+            lease_config=self.lease_config,  # <-- Pasar la configuración de workers distribuidos
+            scheduling_config=self.scheduling_config,  # <-- Pasar la planificación de capítulos
+            packing_config=self.packing_config,  # <-- Pasar el empaquetado de capítulos cortos
+            precheck_config=self.precheck_config,  # <-- Pasar la comprobación local previa
+            check_sampling_config=self.check_sampling_config,  # <-- Pasar el muestreo de comprobación
+            incremental_config=self.incremental_config,  # <-- Pasar la retraducción incremental
+            glossary_config=self.glossary_config,  # <-- Pasar el filtrado del glosario
+            check_existing=check_existing  # <-- Pasar si se comprueban los ya traducidos
         )
 
     def stop_translation(self):
@@ -879,10 +933,12 @@ class TranslatePanel(QWidget):
                 break
 
     def set_working_directory(self, directory):
-        """Establece el directorio de trabajo y recarga los términos guardados"""
+        """Establece el directorio de trabajo y recarga los términos y prompts de la novela"""
         self.working_directory = directory
         # Recargar términos guardados cuando se cambia el directorio
         self.load_saved_terms()
+        # Los prompts personalizados de la novela se leen bajo demanda desde su base de datos
+        prompt_registry.set_novel_directory(directory)
 
     def copy_arrow_symbol(self):
         """Copia el símbolo → al portapapeles"""
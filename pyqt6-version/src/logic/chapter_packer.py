@@ -0,0 +1,109 @@
+import re
+from typing import Dict, List, Optional
+
+from .chapter_scheduler import CHARS_PER_TOKEN
+
+# Marcador que separa los capítulos dentro de una petición empaquetada.
+# Usa solo símbolos y dígitos para que el modelo no tenga nada que traducir.
+DELIMITER_TEMPLATE = "[[[#{index:03d}#]]]"
+DELIMITER_PATTERN = re.compile(r"\[\[\[#(\d{3})#\]\]\]")
+
+PACKING_INSTRUCTIONS = (
+    "The text contains several chapters. Each chapter starts with a marker line such as "
+    "[[[#001#]]]. Copy every marker exactly as it appears, on its own line and in the "
+    "same order, and translate only the text between markers. Never merge, drop or add markers."
+)
+
+# Límites de proporción entre traducción y original para aceptar un capítulo separado
+MIN_LENGTH_RATIO = 0.3
+MAX_LENGTH_RATIO = 3.0
+
+
+def pack_units(files: List[Dict], sizes: Dict[str, int], token_budget: int,
+               max_chapter_chars: int) -> List[List[Dict]]:
+    """
+    Agrupa capítulos cortos consecutivos en unidades de trabajo.
+
+    Un capítulo se considera corto si no supera max_chapter_chars. Los capítulos cortos
+    consecutivos se agrupan mientras el total estimado no supere token_budget; los
+    capítulos largos siempre forman su propia unidad.
+
+    Args:
+        files (List[Dict]): Capítulos en orden de la tabla (clave 'name')
+        sizes (Dict[str, int]): Longitud de cada capítulo
+        token_budget (int): Tokens de entrada máximos por petición empaquetada
+        max_chapter_chars (int): Longitud máxima de un capítulo para empaquetarlo
+
+    Returns:
+        List[List[Dict]]: Unidades de trabajo; las de un elemento se traducen como siempre
+    """
+    units: List[List[Dict]] = []
+    current: List[Dict] = []
+    current_tokens = 0
+
+    for file_info in files:
+        chars = sizes.get(file_info['name'], 0)
+        tokens = chars // CHARS_PER_TOKEN + 1
+        if chars == 0 or chars > max_chapter_chars:
+            if current:
+                units.append(current)
+                current, current_tokens = [], 0
+            units.append([file_info])
+            continue
+
+        if current and current_tokens + tokens > token_budget:
+            units.append(current)
+            current, current_tokens = [], 0
+        current.append(file_info)
+        current_tokens += tokens
+
+    if current:
+        units.append(current)
+    return units
+
+
+def build_packed_text(texts: List[str]) -> str:
+    """Une los capítulos con un marcador numerado antes de cada uno."""
+    parts = []
+    for index, text in enumerate(texts, 1):
+        parts.append(DELIMITER_TEMPLATE.format(index=index))
+        parts.append(text.strip())
+    return "\n\n".join(parts)
+
+
+def split_packed_response(response: str, source_texts: List[str]) -> Optional[List[str]]:
+    """
+    Separa la respuesta empaquetada en capítulos y valida cada uno.
+
+    La respuesta es válida solo si contiene cada marcador exactamente una vez y en
+    orden, y si cada capítulo tiene una longitud razonable frente a su original.
+
+    Args:
+        response (str): Traducción devuelta por el modelo
+        source_texts (List[str]): Textos originales en el mismo orden
+
+    Returns:
+        Optional[List[str]]: Traducción de cada capítulo, o None si la respuesta no es válida
+    """
+    matches = list(DELIMITER_PATTERN.finditer(response))
+    expected = list(range(1, len(source_texts) + 1))
+    if [int(match.group(1)) for match in matches] != expected:
+        return None
+
+    # Texto antes del primer marcador indica que el modelo añadió contenido propio
+    if response[:matches[0].start()].strip():
+        return None
+
+    chapters = []
+    for position, match in enumerate(matches):
+        end = matches[position + 1].start() if position + 1 < len(matches) else len(response)
+        chapter = response[match.end():end].strip()
+        source_length = len(source_texts[position].strip())
+        if not chapter:
+            return None
+        if source_length:
+            ratio = len(chapter) / source_length
+            if ratio < MIN_LENGTH_RATIO or ratio > MAX_LENGTH_RATIO:
+                return None
+        chapters.append(chapter)
+    return chapters
@@ -0,0 +1,132 @@
+import heapq
+import math
+import os
+from typing import Dict, List, Optional
+
+from .folder_structure import NovelFolderStructure
+
+# Aproximación de caracteres por token para estimar el costo de una petición
+CHARS_PER_TOKEN = 4
+
+# Estrategias de orden disponibles
+STRATEGY_TABLE = "table"    # Orden de la tabla (comportamiento original)
+STRATEGY_LPT = "lpt"        # Capítulos más largos primero
+STRATEGY_TOKENS = "tokens"  # Mayor costo estimado en tokens primero
+
+
+class ChapterEstimate:
+    """Estimación del trabajo necesario para traducir un capítulo."""
+
+    def __init__(self, file_info: Dict, chars: int, segments: int, tokens: int):
+        self.file_info = file_info
+        self.chars = chars
+        self.segments = segments
+        self.tokens = tokens
+
+    @property
+    def filename(self) -> str:
+        return self.file_info['name']
+
+
+def estimate_segments(chars: int, segment_size: Optional[int] = None,
+                      segmentation_config: Optional[Dict] = None) -> int:
+    """
+    Estima cuántos segmentos generará un texto, con la misma regla que TranslatorLogic.
+
+    Args:
+        chars (int): Longitud del texto
+        segment_size (Optional[int]): Tamaño de segmento manual
+        segmentation_config (Optional[Dict]): Configuración de segmentación automática
+
+    Returns:
+        int: Número estimado de segmentos (mínimo 1)
+    """
+    size = segment_size
+    if segmentation_config and segmentation_config.get("enabled", False):
+        if chars > segmentation_config.get("threshold", 10000):
+            size = segmentation_config.get("segment_size", 5000)
+    if not size:
+        return 1
+    return max(1, math.ceil(chars / size))
+
+
+def estimate_chapters(files: List[Dict], novel_path: str,
+                      segment_size: Optional[int] = None,
+                      segmentation_config: Optional[Dict] = None,
+                      prompt_chars: int = 0,
+                      catalog: Optional[Dict[str, Dict]] = None) -> List[ChapterEstimate]:
+    """
+    Pre-escanea los capítulos usando el catálogo de la base de datos o, si un capítulo
+    no está catalogado, su tamaño en disco, sin leer su contenido.
+
+    El costo en tokens incluye el prompt de sistema, que se repite en cada segmento,
+    más la entrada y la salida (se asume una salida de longitud similar a la entrada).
+
+    Args:
+        files (List[Dict]): Lista de archivos con la clave 'name'
+        novel_path (str): Directorio de la novela
+        segment_size (Optional[int]): Tamaño de segmento manual
+        segmentation_config (Optional[Dict]): Configuración de segmentación automática
+        prompt_chars (int): Longitud del prompt de traducción
+        catalog (Optional[Dict[str, Dict]]): Catálogo de TranslationDatabase.refresh_chapter_catalog()
+
+    Returns:
+        List[ChapterEstimate]: Estimaciones en el mismo orden que files
+    """
+    originals_path = NovelFolderStructure.get_originals_path(novel_path)
+    estimates = []
+    catalog = catalog or {}
+    for file_info in files:
+        entry = catalog.get(file_info['name'])
+        if entry and entry.get('original_chars') is not None:
+            chars = entry['original_chars']
+        else:
+            try:
+                chars = os.stat(originals_path / file_info['name']).st_size
+            except OSError:
+                chars = 0
+        segments = estimate_segments(chars, segment_size, segmentation_config)
+        tokens = (segments * prompt_chars + 2 * chars) // CHARS_PER_TOKEN
+        estimates.append(ChapterEstimate(file_info, chars, segments, tokens))
+    return estimates
+
+
+def estimate_makespan(costs: List[int], workers: int) -> int:
+    """
+    Calcula el tiempo total (en unidades de costo) de procesar los trabajos en el orden
+    dado, asignando cada uno al primer worker que queda libre.
+    """
+    if not costs:
+        return 0
+    finish_times = [0] * max(1, workers)
+    for cost in costs:
+        earliest = heapq.heappop(finish_times)
+        heapq.heappush(finish_times, earliest + cost)
+    return max(finish_times)
+
+
+def schedule_chapters(estimates: List[ChapterEstimate], strategy: str = STRATEGY_LPT) -> List[ChapterEstimate]:
+    """
+    Ordena los capítulos según la estrategia indicada.
+
+    Con LPT (longest processing time first) los capítulos más largos se despachan
+    primero, de modo que un capítulo gigante no queda para el final mientras el
+    resto de workers esperan sin trabajo.
+
+    Args:
+        estimates (List[ChapterEstimate]): Estimaciones en orden de la tabla
+        strategy (str): STRATEGY_TABLE, STRATEGY_LPT o STRATEGY_TOKENS
+
+    Returns:
+        List[ChapterEstimate]: Estimaciones en orden de despacho
+    """
+    if strategy == STRATEGY_LPT:
+        return sorted(estimates, key=lambda e: (e.segments, e.chars), reverse=True)
+    if strategy == STRATEGY_TOKENS:
+        return sorted(estimates, key=lambda e: e.tokens, reverse=True)
+    return list(estimates)
+
+
+def cost_of(estimate: ChapterEstimate, strategy: str = STRATEGY_LPT) -> int:
+    """Costo usado para comparar órdenes de despacho"""
+    return estimate.tokens if strategy == STRATEGY_TOKENS else estimate.chars
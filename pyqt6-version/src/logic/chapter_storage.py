@@ -0,0 +1,375 @@
+"""
+Almacenamiento del texto de los capítulos.
+
+Por defecto cada capítulo es un archivo en originals/ o translated/. Una novela puede
+guardar sus capítulos dentro de .translation_records.db (comprimidos y sin duplicados)
+y volver a la estructura de carpetas en cualquier momento:
+
+    python -m src.logic.chapter_storage import /ruta/a/novela [--remove-files]
+    python -m src.logic.chapter_storage export /ruta/a/novela
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .database import TranslationDatabase, content_hash, get_connection
+from .folder_structure import NovelFolderStructure
+
+# Tipos de capítulo
+ORIGINAL = "original"
+TRANSLATED = "translated"
+
+# Backends disponibles; se guarda por novela en novel_settings
+BACKEND_FOLDERS = "folders"
+BACKEND_SQLITE = "sqlite"
+STORAGE_SETTING = "chapter_storage"
+
+CHAPTER_EXTENSIONS = ('.txt', '.md')
+
+# Un almacenamiento por novela y proceso, junto con la firma de la base de datos con la
+# que se eligió el backend: si otro proceso cambia la base, el backend se vuelve a leer
+_storages: Dict[str, Tuple[tuple, "ChapterStorage"]] = {}
+_storages_lock = threading.Lock()
+
+
+class ChapterStorage(ABC):
+    """
+    Interfaz común para leer y escribir el texto de los capítulos.
+
+    Los nombres de capítulo son los mismos en todos los backends (p. ej. "001.txt");
+    `kind` indica si se trata del original o de la traducción. Un backend al que le
+    falte algún método no se puede instanciar.
+    """
+
+    backend = None
+
+    def __init__(self, novel_path: str):
+        self.novel_path = str(novel_path)
+
+    def list(self, kind: str) -> List[str]:
+        """Nombres de los capítulos guardados"""
+        return list(self.entries(kind))
+
+    @abstractmethod
+    def entries(self, kind: str) -> Dict[str, Tuple[int, int]]:
+        """{filename: (mtime en ns, tamaño en bytes)} de todos los capítulos"""
+
+    @abstractmethod
+    def exists(self, kind: str, filename: str) -> bool:
+        """Indica si el capítulo está guardado"""
+
+    @abstractmethod
+    def read(self, kind: str, filename: str) -> str:
+        """Lee un capítulo; lanza FileNotFoundError si no existe"""
+
+    @abstractmethod
+    def write(self, kind: str, filename: str, text: str) -> None:
+        """Guarda un capítulo de forma atómica (el anterior se reemplaza completo o no se toca)"""
+
+    @abstractmethod
+    def delete(self, kind: str, filename: str) -> None:
+        """Elimina un capítulo (no hace nada si no existe)"""
+
+    @abstractmethod
+    def local_path(self, kind: str, filename: str) -> Path:
+        """Ruta de un archivo con el capítulo, para abrirlo con programas externos"""
+
+
+class FolderChapterStorage(ChapterStorage):
+    """Capítulos como archivos en originals/ y translated/ (estructura de siempre)."""
+
+    backend = BACKEND_FOLDERS
+
+    def _folder(self, kind: str) -> Path:
+        if kind == ORIGINAL:
+            return NovelFolderStructure.get_originals_path(self.novel_path)
+        return NovelFolderStructure.get_translated_path(self.novel_path)
+
+    def entries(self, kind: str) -> Dict[str, Tuple[int, int]]:
+        try:
+            with os.scandir(self._folder(kind)) as scanned:
+                result = {}
+                for entry in scanned:
+                    if entry.is_file() and entry.name.lower().endswith(CHAPTER_EXTENSIONS):
+                        stat = entry.stat()
+                        result[entry.name] = (stat.st_mtime_ns, stat.st_size)
+                return result
+        except OSError:
+            return {}
+
+    def exists(self, kind: str, filename: str) -> bool:
+        return (self._folder(kind) / filename).is_file()
+
+    def read(self, kind: str, filename: str) -> str:
+        with open(self._folder(kind) / filename, 'r', encoding='utf-8') as file:
+            return file.read()
+
+    def write(self, kind: str, filename: str, text: str) -> None:
+        folder = self._folder(kind)
+        folder.mkdir(parents=True, exist_ok=True)
+        temp_path = folder / f".temp_{filename}"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                file.write(text)
+            temp_path.replace(folder / filename)
+        finally:
+            if temp_path.exists():
+                temp_path.unlink()
+
+    def delete(self, kind: str, filename: str) -> None:
+        try:
+            (self._folder(kind) / filename).unlink()
+        except FileNotFoundError:
+            pass
+
+    def local_path(self, kind: str, filename: str) -> Path:
+        return self._folder(kind) / filename
+
+
+class SqliteChapterStorage(ChapterStorage):
+    """
+    Capítulos comprimidos dentro de la base de datos de la novela.
+
+    El contenido se guarda en chapter_blobs indexado por su hash, así que los textos
+    repetidos (p. ej. un original copiado como traducción) se guardan una sola vez.
+    chapter_files asocia cada capítulo con su contenido. Evita mantener miles de
+    archivos pequeños, lentos de listar y de sincronizar en discos de red.
+    """
+
+    backend = BACKEND_SQLITE
+
+    def __init__(self, novel_path: str):
+        super().__init__(novel_path)
+        # Crea las tablas si hace falta
+        self.db_path = TranslationDatabase(novel_path).db_path
+
+    def _connect(self):
+        return get_connection(self.db_path)
+
+    def entries(self, kind: str) -> Dict[str, Tuple[int, int]]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT filename, modified_ns, size FROM chapter_files WHERE kind = ?", (kind,)
+            ).fetchall()
+        return {filename: (modified_ns, size) for filename, modified_ns, size in rows}
+
+    def exists(self, kind: str, filename: str) -> bool:
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT 1 FROM chapter_files WHERE kind = ? AND filename = ?", (kind, filename)
+            ).fetchone() is not None
+
+    def read(self, kind: str, filename: str) -> str:
+        with self._connect() as conn:
+            row = conn.execute('''
+                SELECT b.data FROM chapter_files f JOIN chapter_blobs b ON b.hash = f.hash
+                WHERE f.kind = ? AND f.filename = ?
+            ''', (kind, filename)).fetchone()
+        if row is None:
+            raise FileNotFoundError(f"{kind}/{filename}")
+        return zlib.decompress(row[0]).decode('utf-8')
+
+    def write(self, kind: str, filename: str, text: str) -> None:
+        with self._connect() as conn:
+            self.write_rows(conn, kind, filename, text)
+
+    @staticmethod
+    def write_rows(conn, kind: str, filename: str, text: str) -> None:
+        """
+        Guarda un capítulo usando la conexión y transacción del llamador.
+
+        Permite publicar el capítulo en la misma transacción que otros cambios
+        (p. ej. al finalizar un lease).
+        """
+        data = text.encode('utf-8')
+        digest = content_hash(text)
+        previous = conn.execute(
+            "SELECT hash FROM chapter_files WHERE kind = ? AND filename = ?", (kind, filename)
+        ).fetchone()
+        conn.execute(
+            "INSERT OR IGNORE INTO chapter_blobs (hash, data) VALUES (?, ?)",
+            (digest, zlib.compress(data))
+        )
+        conn.execute(
+            "INSERT OR REPLACE INTO chapter_files (kind, filename, hash, size, modified_ns) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (kind, filename, digest, len(data), time.time_ns())
+        )
+        if previous and previous[0] != digest:
+            SqliteChapterStorage._collect(conn, previous[0])
+
+    @staticmethod
+    def _collect(conn, digest: str) -> None:
+        """Elimina un contenido que ya no usa ningún capítulo"""
+        conn.execute(
+            "DELETE FROM chapter_blobs WHERE hash = ? "
+            "AND NOT EXISTS (SELECT 1 FROM chapter_files WHERE hash = ?)",
+            (digest, digest)
+        )
+
+    def delete(self, kind: str, filename: str) -> None:
+        with self._connect() as conn:
+            previous = conn.execute(
+                "SELECT hash FROM chapter_files WHERE kind = ? AND filename = ?", (kind, filename)
+            ).fetchone()
+            if previous:
+                conn.execute("DELETE FROM chapter_files WHERE kind = ? AND filename = ?", (kind, filename))
+                self._collect(conn, previous[0])
+
+    def local_path(self, kind: str, filename: str) -> Path:
+        # Copia temporal de solo lectura: los cambios hechos sobre ella no se guardan.
+        # Cada novela usa su propia carpeta para no mezclar capítulos con el mismo nombre
+        novel_key = content_hash(str(Path(self.novel_path).resolve()))[:12]
+        folder = Path(tempfile.gettempdir()) / "novel-translator" / novel_key / kind
+        folder.mkdir(parents=True, exist_ok=True)
+        path = folder / filename
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(self.read(kind, filename))
+        return path
+
+
+def _db_signature(novel_path: str) -> tuple:
+    """Fechas de modificación de la base de datos y de su journal WAL"""
+    db_path = NovelFolderStructure.get_db_path(novel_path)
+    signature = []
+    for path in (db_path, db_path.with_name(db_path.name + '-wal')):
+        try:
+            stat = os.stat(path)
+            signature.append((stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            signature.append(None)
+    return tuple(signature)
+
+
+def get_chapter_storage(novel_path: str) -> ChapterStorage:
+    """
+    Retorna el almacenamiento de capítulos configurado para la novela.
+
+    Por defecto los capítulos son archivos en originals/ y translated/; las novelas
+    importadas con import_folders_to_database() usan el backend SQLite. El backend se
+    vuelve a leer cuando la base de datos cambia, así que una migración hecha por otro
+    proceso o equipo se aplica sin reiniciar.
+    """
+    key = str(Path(novel_path).resolve())
+    signature = _db_signature(novel_path)
+    with _storages_lock:
+        cached = _storages.get(key)
+        if cached and cached[0] == signature:
+            return cached[1]
+        backend = TranslationDatabase(novel_path).get_novel_setting(STORAGE_SETTING, BACKEND_FOLDERS)
+        if cached and cached[1].backend == backend:
+            storage = cached[1]
+        elif backend == BACKEND_SQLITE:
+            storage = SqliteChapterStorage(novel_path)
+        else:
+            storage = FolderChapterStorage(novel_path)
+        _storages[key] = (signature, storage)
+        return storage
+
+
+def _check_no_active_leases(novel_path: str) -> None:
+    """Impide migrar mientras hay workers traduciendo la novela con leases vigentes"""
+    db_path = TranslationDatabase(novel_path).db_path
+    with get_connection(db_path) as conn:
+        row = conn.execute(
+            "SELECT COUNT(*) FROM chapter_leases WHERE expires_at > ?", (time.time(),)
+        ).fetchone()
+    if row and row[0]:
+        raise RuntimeError(
+            f"Hay {row[0]} capítulos en traducción por workers; espere a que terminen antes de migrar"
+        )
+
+
+def _set_backend(novel_path: str, backend: str) -> None:
+    TranslationDatabase(novel_path).set_novel_setting(STORAGE_SETTING, backend)
+    with _storages_lock:
+        _storages.pop(str(Path(novel_path).resolve()), None)
+
+
+def import_folders_to_database(novel_path: str, remove_files: bool = False) -> int:
+    """
+    Pasa los capítulos de originals/ y translated/ a la base de datos de la novela.
+
+    Args:
+        novel_path (str): Directorio de la novela
+        remove_files (bool): Si True, borra los archivos una vez guardados en la base
+
+    Returns:
+        int: Número de capítulos importados
+
+    Raises:
+        RuntimeError: Si hay workers con leases vigentes sobre la novela
+    """
+    _check_no_active_leases(novel_path)
+    folders = FolderChapterStorage(novel_path)
+    target = SqliteChapterStorage(novel_path)
+    imported = []
+    with target._connect() as conn:
+        for kind in (ORIGINAL, TRANSLATED):
+            for filename in folders.list(kind):
+                target.write_rows(conn, kind, filename, folders.read(kind, filename))
+                imported.append((kind, filename))
+    _set_backend(novel_path, BACKEND_SQLITE)
+
+    if remove_files:
+        for kind, filename in imported:
+            folders.delete(kind, filename)
+    return len(imported)
+
+
+def export_database_to_folders(novel_path: str) -> int:
+    """
+    Escribe los capítulos guardados en la base de datos como archivos y vuelve al
+    backend de carpetas. Los capítulos se eliminan de la base una vez exportados.
+
+    Returns:
+        int: Número de capítulos exportados
+
+    Raises:
+        RuntimeError: Si hay workers con leases vigentes sobre la novela
+    """
+    _check_no_active_leases(novel_path)
+    NovelFolderStructure.ensure_structure(novel_path)
+    source = SqliteChapterStorage(novel_path)
+    folders = FolderChapterStorage(novel_path)
+    exported = 0
+    for kind in (ORIGINAL, TRANSLATED):
+        for filename in source.list(kind):
+            folders.write(kind, filename, source.read(kind, filename))
+            exported += 1
+    _set_backend(novel_path, BACKEND_FOLDERS)
+
+    with source._connect() as conn:
+        conn.execute("DELETE FROM chapter_files")
+        conn.execute("DELETE FROM chapter_blobs")
+    return exported
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mueve los capítulos entre las carpetas y la base de datos")
+    parser.add_argument("action", choices=["import", "export"],
+                        help="import: carpetas -> base de datos; export: base de datos -> carpetas")
+    parser.add_argument("directory", help="Directorio de la novela")
+    parser.add_argument("--remove-files", action="store_true",
+                        help="Al importar, borrar los archivos ya guardados en la base de datos")
+    args = parser.parse_args()
+
+    try:
+        if args.action == "import":
+            count = import_folders_to_database(args.directory, args.remove_files)
+        else:
+            count = export_database_to_folders(args.directory)
+    except RuntimeError as e:
+        print(e)
+        raise SystemExit(1)
+
+    if args.action == "import":
+        print(f"{count} capítulos importados a la base de datos")
+    else:
+        print(f"{count} capítulos exportados a originals/ y translated/")
@@ -0,0 +1,105 @@
+import threading
+from typing import Dict, Optional
+
+from .session_logger import session_logger
+
+DEFAULT_SAMPLING_CONFIG = {
+    "enabled": False,
+    "sample_rate": 0.25,
+    "failure_boost": 0.5,
+    "decay": 0.05,
+    "full_check_after_failures": 2,
+    "recovery_passes": 10,
+}
+
+
+class CheckSampler:
+    """
+    Decide qué capítulos pasan por la comprobación con el modelo.
+
+    Se comprueba una fracción `sample_rate` de los capítulos. Cada fallo sube la tasa
+    en `failure_boost` y cada aprobado la baja en `decay` hasta volver a la base.
+    Tras `full_check_after_failures` fallos seguidos se comprueba el 100% hasta
+    acumular `recovery_passes` aprobados seguidos.
+
+    La selección es determinista: cada capítulo suma la tasa actual a un crédito y
+    se comprueba cuando el crédito llega a 1, así que el primer capítulo siempre se
+    comprueba y la fracción real sigue a la tasa sin depender del azar.
+    """
+
+    def __init__(self, sample_rate: float = 0.25, failure_boost: float = 0.5, decay: float = 0.05,
+                 full_check_after_failures: int = 2, recovery_passes: int = 10):
+        self.base_rate = min(1.0, max(0.0, sample_rate))
+        self.failure_boost = failure_boost
+        self.decay = decay
+        self.full_check_after_failures = max(1, full_check_after_failures)
+        self.recovery_passes = max(1, recovery_passes)
+
+        self.rate = self.base_rate
+        self.full_check = False
+        self._credit = 1.0
+        self._consecutive_failures = 0
+        self._consecutive_passes = 0
+        self._decisions = 0
+        self._checked = 0
+        self._passed = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict]) -> Optional["CheckSampler"]:
+        """Crea el muestreador desde la sección "check_sampling", o None si está deshabilitado"""
+        settings = dict(DEFAULT_SAMPLING_CONFIG)
+        settings.update(config or {})
+        if not settings.pop("enabled"):
+            return None
+        return cls(**{key: settings[key] for key in DEFAULT_SAMPLING_CONFIG if key != "enabled"})
+
+    def should_check(self) -> bool:
+        """Decide si el siguiente capítulo se comprueba y registra la decisión."""
+        with self._lock:
+            self._decisions += 1
+            rate = 1.0 if self.full_check else self.rate
+            self._credit += rate
+            check = self._credit >= 1.0
+            if check:
+                self._credit -= 1.0
+            session_logger.log_info(
+                f"Muestreo de comprobación: {'comprobar' if check else 'omitir'} "
+                f"(tasa {rate:.0%}{', modo completo' if self.full_check else ''}; "
+                f"{self._checked} de {self._decisions - 1} comprobados hasta ahora)"
+            )
+            return check
+
+    def record(self, passed: bool) -> None:
+        """Ajusta la tasa según el resultado de una comprobación."""
+        with self._lock:
+            self._checked += 1
+            if passed:
+                self._passed += 1
+                self._consecutive_passes += 1
+                self._consecutive_failures = 0
+                self.rate = max(self.base_rate, self.rate - self.decay)
+                if self.full_check and self._consecutive_passes >= self.recovery_passes:
+                    self.full_check = False
+                    session_logger.log_info(
+                        f"Muestreo de comprobación: {self._consecutive_passes} aprobados seguidos, "
+                        f"se vuelve a la tasa {self.rate:.0%}"
+                    )
+            else:
+                self._consecutive_failures += 1
+                self._consecutive_passes = 0
+                self.rate = min(1.0, self.rate + self.failure_boost)
+                # Comprobar el siguiente capítulo sin esperar a acumular crédito
+                self._credit = max(self._credit, 1.0 - self.rate)
+                if self._consecutive_failures >= self.full_check_after_failures and not self.full_check:
+                    self.full_check = True
+                    session_logger.log_warning(
+                        f"Muestreo de comprobación: {self._consecutive_failures} fallos seguidos, "
+                        "se comprueba el 100% de los capítulos"
+                    )
+
+            session_logger.log_info(
+                f"Muestreo de comprobación: {'aprobado' if passed else 'fallo'}; "
+                f"tasa de aprobación observada {self._passed}/{self._checked} "
+                f"({self._passed / self._checked:.0%}), tasa de muestreo {self.rate:.0%}"
+            )
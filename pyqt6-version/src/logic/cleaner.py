@@ -1,4 +1,6 @@
+import io
 import os
+from typing import Optional
 from .folder_structure import NovelFolderStructure
 
 class CleanerLogic:
@@ -19,21 +21,20 @@ class CleanerLogic:
         files_processed = 0
         files_modified = 0
 
-        originals_path = NovelFolderStructure.get_originals_path(directory)
-        translated_path = NovelFolderStructure.get_translated_path(directory)
+        storage = NovelFolderStructure.get_storage(directory)
 
         for filename in files:
-            # Limpiar en 'translated' si el archivo existe
-            translated_file = translated_path / filename
-            if translated_file.exists():
-                if self.clean_file(str(translated_file), str(translated_file), clean_mode, search_text, replace_text):
-                    files_modified += 1
-
-            # Limpiar en 'originals' si el archivo existe
-            originals_file = originals_path / filename
-            if originals_file.exists():
-                if self.clean_file(str(originals_file), str(originals_file), clean_mode, search_text, replace_text):
-                    files_modified += 1
+            # Limpiar la traducción y luego el original, si existen
+            for kind in ("translated", "original"):
+                if not storage.exists(kind, filename):
+                    continue
+                try:
+                    cleaned = self.clean_text(storage.read(kind, filename), clean_mode, search_text, replace_text)
+                    if cleaned is not None:
+                        storage.write(kind, filename, cleaned)
+                        files_modified += 1
+                except Exception as e:
+                    print(f"Error processing {kind}/{filename}: {str(e)}")
 
             files_processed += 1
 
@@ -43,37 +44,45 @@ class CleanerLogic:
         """Limpia un archivo según el modo especificado"""
         try:
             with open(input_path, 'r', encoding='utf-8') as file:
-                original_lines = file.readlines()
+                cleaned = self.clean_text(file.read(), clean_mode, search_text, replace_text)
 
-            lines = original_lines.copy()
-
-            # Eliminar líneas en blanco al inicio
-            while lines and not lines[0].strip():
-                lines.pop(0)
-
-            # Aplicar el modo de limpieza seleccionado
-            if clean_mode in self.tasks:
-                if clean_mode == "search_replace":
-                    lines = self.tasks[clean_mode](lines, search_text, replace_text)
-                else:
-                    lines = self.tasks[clean_mode](lines, search_text)
-
-            # Eliminar líneas en blanco al final
-            while lines and not lines[-1].strip():
-                lines.pop()
-
-            # Verificar si el contenido cambió
-            if lines == original_lines:
+            if cleaned is None:
                 return False  # No hubo cambios
 
             with open(output_path, 'w', encoding='utf-8') as file:
-                file.writelines(lines)
+                file.write(cleaned)
             return True  # Hubo cambios
 
         except Exception as e:
             print(f"Error processing {input_path}: {str(e)}")
             return False
 
+    def clean_text(self, text: str, clean_mode, search_text, replace_text="") -> Optional[str]:
+        """Limpia un texto según el modo especificado; retorna None si no cambió"""
+        original_lines = io.StringIO(text).readlines()
+        lines = original_lines.copy()
+
+        # Eliminar líneas en blanco al inicio
+        while lines and not lines[0].strip():
+            lines.pop(0)
+
+        # Aplicar el modo de limpieza seleccionado
+        if clean_mode in self.tasks:
+            if clean_mode == "search_replace":
+                lines = self.tasks[clean_mode](lines, search_text, replace_text)
+            else:
+                lines = self.tasks[clean_mode](lines, search_text)
+
+        # Eliminar líneas en blanco al final
+        while lines and not lines[-1].strip():
+            lines.pop()
+
+        # Verificar si el contenido cambió
+        if lines == original_lines:
+            return None
+
+        return ''.join(lines)
+
     def _remove_after_text(self, lines, search_text):
         """Elimina todo el contenido después del texto especificado"""
         for i, line in enumerate(lines):
@@ -153,16 +153,13 @@ class EpubConverterLogic(QObject):
     def _process_chapter_data(self, file_info):
         """Procesa un archivo de capítulo y retorna ChapterData"""
         try:
-            # Leer desde la carpeta 'translated'
-            translated_path = NovelFolderStructure.get_translated_path(self.directory)
-            file_path = translated_path / file_info['name']
-
-            if not file_path.exists():
-                print(f"Archivo traducido no encontrado: {file_path}")
+            # Leer la traducción (carpeta 'translated' o base de datos, según la novela)
+            storage = NovelFolderStructure.get_storage(self.directory)
+            if not storage.exists("translated", file_info['name']):
+                print(f"Archivo traducido no encontrado: {file_info['name']}")
                 return None
 
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read().strip()
+            content = storage.read("translated", file_info['name']).strip()
 
             # Obtener título capítulo (primera línea)
             lines = content.split('\n')
@@ -196,15 +193,12 @@ class EpubConverterLogic(QObject):
     def _extract_chapter_title(self, file_info):
         """Extrae el título del capítulo del archivo (método legacy)"""
         try:
-            # Leer desde la carpeta 'translated'
-            translated_path = NovelFolderStructure.get_translated_path(self.directory)
-            file_path = translated_path / file_info['name']
-
-            if not file_path.exists():
+            # Leer la traducción (carpeta 'translated' o base de datos, según la novela)
+            storage = NovelFolderStructure.get_storage(self.directory)
+            if not storage.exists("translated", file_info['name']):
                 return f"Capítulo {file_info['chapter']}"
 
-            with open(file_path, 'r', encoding='utf-8') as f:
-                first_line = f.readline().strip()
+            first_line = storage.read("translated", file_info['name']).split('\n', 1)[0].strip()
 
             # Limpiar el título
             title = self._clean_chapter_title(first_line)
@@ -215,16 +209,13 @@ class EpubConverterLogic(QObject):
     def process_chapter(self, file_info):
         """Procesa un capítulo individual y retorna HTML (método legacy)"""
         try:
-            # Leer desde la carpeta 'translated'
-            translated_path = NovelFolderStructure.get_translated_path(self.directory)
-            file_path = translated_path / file_info['name']
-
-            if not file_path.exists():
-                print(f"Archivo traducido no encontrado: {file_path}")
+            # Leer la traducción (carpeta 'translated' o base de datos, según la novela)
+            storage = NovelFolderStructure.get_storage(self.directory)
+            if not storage.exists("translated", file_info['name']):
+                print(f"Archivo traducido no encontrado: {file_info['name']}")
                 return None
 
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read().strip()
+            content = storage.read("translated", file_info['name']).strip()
 
             # Obtener título capítulo (primera línea)
             lines = content.split('\n')
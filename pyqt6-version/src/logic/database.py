@@ -1,10 +1,338 @@
 import sqlite3
 import os
-import json
+import hashlib
+import threading
+import zlib
 from typing import List, Dict, Union, Optional
 from datetime import datetime
 from pathlib import Path
 from .folder_structure import NovelFolderStructure
+from .chapter_scheduler import CHARS_PER_TOKEN
+from .json_journal import JsonJournal, get_journal
+
+# Modo de journal de SQLite por defecto. WAL permite leer mientras otro hilo escribe,
+# pero necesita memoria compartida entre procesos: las bibliotecas compartidas por red
+# entre varios equipos (worker.py, leases distribuidos) guardan "DELETE" en el ajuste
+# journal_mode de la propia novela con set_journal_mode(), y todas las conexiones a esa
+# base lo aplican al abrirse.
+JOURNAL_MODE = "WAL"
+JOURNAL_MODE_SETTING = "journal_mode"
+SYNCHRONOUS = "NORMAL"
+BUSY_TIMEOUT_SECONDS = 30.0
+
+# Una conexión persistente por hilo y base de datos
+_thread_state = threading.local()
+# Modo de journal configurado para cada base de datos (leído de novel_settings)
+_journal_modes: Dict[str, str] = {}
+# Bases de datos cuyas tablas ya se crearon en este proceso
+_initialized_paths = set()
+_initialized_lock = threading.Lock()
+
+
+class JournalModeError(sqlite3.OperationalError):
+    """No se pudo aplicar el modo de journal que la base de datos requiere."""
+
+
+def _configured_journal_mode(conn: sqlite3.Connection, db_path: str) -> str:
+    """Modo de journal configurado para la base (ajuste journal_mode o JOURNAL_MODE)"""
+    mode = _journal_modes.get(db_path)
+    if mode is None:
+        try:
+            row = conn.execute(
+                "SELECT value FROM novel_settings WHERE key = ?", (JOURNAL_MODE_SETTING,)
+            ).fetchone()
+        except sqlite3.OperationalError:
+            row = None  # Base nueva o anterior a novel_settings
+        mode = row[0].upper() if row and row[0] else JOURNAL_MODE
+        _journal_modes[db_path] = mode
+    return mode
+
+
+def _apply_journal_mode(conn: sqlite3.Connection, mode: str) -> bool:
+    """Aplica el modo de journal; retorna False si la base sigue en otro modo"""
+    try:
+        result = conn.execute(f"PRAGMA journal_mode={mode}").fetchone()
+    except sqlite3.OperationalError:
+        # Salir de WAL requiere acceso exclusivo: otra conexión o equipo tiene la base abierta
+        return False
+    return bool(result) and result[0].upper() == mode
+
+
+def set_journal_mode(db_path: str, mode: str) -> None:
+    """
+    Guarda el modo de journal de una base de datos y lo aplica a la conexión del hilo.
+
+    El modo queda en novel_settings, así que cualquier proceso o equipo que abra la
+    base después lo usa también (p. ej. "DELETE" para bibliotecas en red).
+
+    Raises:
+        JournalModeError: Si no se pudo cambiar el modo, normalmente porque otro
+            programa o equipo tiene la base abierta en otro modo
+    """
+    mode = mode.upper()
+    conn = get_connection(db_path)
+    with conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO novel_settings (key, value) VALUES (?, ?)",
+            (JOURNAL_MODE_SETTING, mode)
+        )
+    _journal_modes[db_path] = mode
+    if not _apply_journal_mode(conn, mode):
+        raise JournalModeError(
+            f"No se pudo cambiar el modo de journal de {db_path} a {mode}: "
+            "otro programa o equipo tiene la base de datos abierta"
+        )
+    _thread_state.connections[db_path] = (conn, mode)
+
+
+def get_connection(db_path: str) -> sqlite3.Connection:
+    """
+    Retorna la conexión del hilo actual a db_path, abriéndola la primera vez.
+
+    Mantener la conexión abierta evita reabrir el archivo en cada consulta y permite
+    que sqlite3 reutilice las sentencias ya preparadas (caché por conexión). Si el
+    modo de journal configurado no se pudo aplicar, se reintenta en el siguiente uso.
+    """
+    connections = getattr(_thread_state, "connections", None)
+    if connections is None:
+        connections = _thread_state.connections = {}
+
+    entry = connections.get(db_path)
+    if entry is None:
+        conn = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT_SECONDS)
+        conn.execute(f"PRAGMA synchronous={SYNCHRONOUS}")
+        active_mode = None
+    else:
+        conn, active_mode = entry
+
+    mode = _configured_journal_mode(conn, db_path)
+    if active_mode != mode:
+        if _apply_journal_mode(conn, mode):
+            active_mode = mode
+        elif entry is None:
+            print(f"No se pudo cambiar el modo de journal a {mode}; se reintentará en el siguiente uso")
+        connections[db_path] = (conn, active_mode)
+    return conn
+
+
+def close_connection(db_path: str) -> None:
+    """Cierra la conexión del hilo actual a db_path, si existe"""
+    connections = getattr(_thread_state, "connections", None)
+    if connections and db_path in connections:
+        connections.pop(db_path)[0].close()
+
+
+def content_hash(text: str) -> str:
+    """Hash SHA-256 del texto, usado para detectar cambios en capítulos y prompts"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def _migration_base_tables(cursor: sqlite3.Cursor) -> None:
+    # Tabla de traducciones
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS translations (
+            filename TEXT PRIMARY KEY,
+            source_lang TEXT,
+            target_lang TEXT,
+            status INTEGER DEFAULT 1,
+            translated_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    # Tabla para términos personalizados
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS custom_terms (
+            id TEXT PRIMARY KEY,
+            terms TEXT,
+            last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    # Tabla para metadatos del libro
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS book_metadata (
+            id TEXT PRIMARY KEY,
+            title TEXT,
+            author TEXT,
+            description TEXT,
+            notes TEXT,
+            language TEXT,
+            collection TEXT,
+            collection_type TEXT,
+            collection_position TEXT,
+            created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    # Tabla para prompts personalizados
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS custom_prompts (
+            id TEXT PRIMARY KEY,
+            source_lang TEXT,
+            target_lang TEXT,
+            type TEXT,
+            content TEXT,
+            last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    # Tabla de refinamientos
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS refines (
+            filename TEXT PRIMARY KEY,
+            source_lang TEXT,
+            target_lang TEXT,
+            status INTEGER DEFAULT 4,
+            refined_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+
+def _migration_legacy_columns(cursor: sqlite3.Cursor) -> None:
+    # Bases creadas con esquemas antiguos: añadir las columnas que falten
+    legacy_columns = [
+        ("translations", "status INTEGER DEFAULT 1"),
+        ("book_metadata", "description TEXT"),
+        ("book_metadata", "notes TEXT"),
+        ("book_metadata", "language TEXT"),
+        ("book_metadata", "collection TEXT"),
+        ("book_metadata", "collection_type TEXT"),
+        ("book_metadata", "collection_position TEXT"),
+    ]
+    for table, column in legacy_columns:
+        try:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column}")
+        except sqlite3.OperationalError:
+            pass
+
+    # Registros antiguos sin estado: se consideraban traducidos
+    cursor.execute('''
+        UPDATE translations
+        SET status = 1
+        WHERE status IS NULL OR status = 0
+    ''')
+
+
+def _migration_check_results(cursor: sqlite3.Cursor) -> None:
+    # Caché de veredictos de comprobación, indexada por el contenido comprobado
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS check_results (
+            source_hash TEXT,
+            translation_hash TEXT,
+            check_provider TEXT,
+            check_model TEXT,
+            prompt_hash TEXT,
+            passed INTEGER,
+            comments TEXT,
+            checked_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (source_hash, translation_hash, check_provider, check_model, prompt_hash)
+        )
+    ''')
+
+
+def _migration_chapter_leases(cursor: sqlite3.Cursor) -> None:
+    # Leases de capítulos para workers distribuidos (ver lease_queue.py)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS chapter_leases (
+            filename TEXT PRIMARY KEY,
+            worker_id TEXT,
+            token TEXT,
+            expires_at REAL,
+            attempts INTEGER DEFAULT 0
+        )
+    ''')
+
+
+def _migration_chapter_catalog(cursor: sqlite3.Cursor) -> None:
+    # Catálogo de capítulos: tamaños, hashes y mtimes de original y traducción
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS chapters (
+            filename TEXT PRIMARY KEY,
+            original_bytes INTEGER,
+            original_chars INTEGER,
+            original_hash TEXT,
+            original_mtime INTEGER,
+            translated_bytes INTEGER,
+            translated_chars INTEGER,
+            translated_hash TEXT,
+            translated_mtime INTEGER,
+            estimated_tokens INTEGER,
+            updated_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+
+def _migration_translation_source_hash(cursor: sqlite3.Cursor) -> None:
+    # Hash del original con el que se hizo cada traducción, para detectar desactualizadas
+    cursor.execute("PRAGMA table_info(translations)")
+    if 'source_hash' not in [column[1] for column in cursor.fetchall()]:
+        cursor.execute("ALTER TABLE translations ADD COLUMN source_hash TEXT")
+
+
+def _migration_translation_sources(cursor: sqlite3.Cursor) -> None:
+    # Copia comprimida del original con el que se hizo cada traducción (retraducción incremental)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS translation_sources (
+            filename TEXT PRIMARY KEY,
+            source_hash TEXT,
+            source_text BLOB
+        )
+    ''')
+
+
+def _migration_chapter_store(cursor: sqlite3.Cursor) -> None:
+    # Texto de los capítulos para el almacenamiento en SQLite (chapter_storage):
+    # contenido comprimido sin duplicados, indexado por hash, y capítulos que lo usan
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS chapter_blobs (
+            hash TEXT PRIMARY KEY,
+            data BLOB NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS chapter_files (
+            kind TEXT NOT NULL,
+            filename TEXT NOT NULL,
+            hash TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            modified_ns INTEGER NOT NULL,
+            PRIMARY KEY (kind, filename)
+        )
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_chapter_files_hash ON chapter_files (hash)")
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS novel_settings (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        )
+    ''')
+
+
+# Migraciones en orden. Cada una se aplica una sola vez por base de datos y su número
+# queda registrado en schema_version; los cambios de esquema nuevos se añaden al final.
+MIGRATIONS = [
+    (1, "tablas base", _migration_base_tables),
+    (2, "columnas de esquemas antiguos", _migration_legacy_columns),
+    (3, "caché de comprobaciones", _migration_check_results),
+    (4, "leases de capítulos", _migration_chapter_leases),
+    (5, "catálogo de capítulos", _migration_chapter_catalog),
+    (6, "hash del original en traducciones", _migration_translation_source_hash),
+    (7, "originales traducidos", _migration_translation_sources),
+    (8, "almacenamiento de capítulos", _migration_chapter_store),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+# Columnas del catálogo de capítulos, en el orden de get_chapter_catalog()
+CATALOG_COLUMNS = (
+    "filename",
+    "original_bytes", "original_chars", "original_hash", "original_mtime",
+    "translated_bytes", "translated_chars", "translated_hash", "translated_mtime",
+    "estimated_tokens",
+)
+
+
+def _empty_catalog_row(filename: str) -> Dict:
+    row = dict.fromkeys(CATALOG_COLUMNS)
+    row["filename"] = filename
+    return row
+
 
 class TranslationDatabase:
     def __init__(self, directory: str):
@@ -20,130 +348,111 @@ class TranslationDatabase:
         # La base de datos ahora está en la raíz del directorio de la novela
         self.db_path = str(NovelFolderStructure.get_db_path(directory))
         self.directory = directory # Guardar la ruta para los backups en JSON
-        self.initialize_database()
+
+        # Las tablas se crean una sola vez por proceso; las siguientes instancias solo
+        # reutilizan la conexión del hilo
+        with _initialized_lock:
+            if self.db_path not in _initialized_paths or not os.path.exists(self.db_path):
+                if self.initialize_database():
+                    _initialized_paths.add(self.db_path)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Conexión persistente del hilo actual; usar con `with` para delimitar la transacción"""
+        return get_connection(self.db_path)
+
+    def close(self) -> None:
+        """Cierra la conexión del hilo actual (se reabre automáticamente si se vuelve a usar)"""
+        close_connection(self.db_path)
 
 
-    def initialize_database(self) -> None:
-        """Crea la base de datos y las tablas si no existen"""
+    def initialize_database(self) -> bool:
+        """
+        Crea la base de datos o la actualiza aplicando las migraciones pendientes.
+
+        Con la base al día el costo es una sola consulta a schema_version.
+
+        Returns:
+            bool: True si la base de datos quedó lista
+        """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
+            conn = self._connect()
+            if self._get_schema_version(conn) >= SCHEMA_VERSION:
+                return True
 
-                # --- Creación de Tablas (si no existen) ---
-                # Tabla de traducciones (sin cambios)
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS translations (
-                        filename TEXT PRIMARY KEY,
-                        source_lang TEXT,
-                        target_lang TEXT,
-                        status INTEGER DEFAULT 1,
-                        translated_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
-                ''')
-                # Tabla para términos personalizados (nuevo esquema)
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS custom_terms (
-                        id TEXT PRIMARY KEY,
-                        terms TEXT,
-                        last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
-                ''')
-                # Tabla para metadatos del libro (nuevo esquema)
+            with conn:
+                # Bloquear escrituras y volver a leer: otro proceso pudo migrar mientras tanto
+                conn.execute("BEGIN IMMEDIATE")
+                cursor = conn.cursor()
                 cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS book_metadata (
-                        id TEXT PRIMARY KEY,
-                        title TEXT,
-                        author TEXT,
+                    CREATE TABLE IF NOT EXISTS schema_version (
+                        version INTEGER PRIMARY KEY,
                         description TEXT,
-                        notes TEXT,
-                        language TEXT,
-                        collection TEXT,
-                        collection_type TEXT,
-                        collection_position TEXT,
-                        created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                        applied_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                     )
                 ''')
-                # Tabla para prompts personalizados
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS custom_prompts (
-                        id TEXT PRIMARY KEY,
-                        source_lang TEXT,
-                        target_lang TEXT,
-                        type TEXT,
-                        content TEXT,
-                        last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                current = self._get_schema_version(conn)
+                for version, description, migration in MIGRATIONS:
+                    if version <= current:
+                        continue
+                    migration(cursor)
+                    cursor.execute(
+                        "INSERT INTO schema_version (version, description) VALUES (?, ?)",
+                        (version, description)
                     )
-                ''')
-                # Tabla de refinamientos
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS refines (
-                        filename TEXT PRIMARY KEY,
-                        source_lang TEXT,
-                        target_lang TEXT,
-                        status INTEGER DEFAULT 4,
-                        refined_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
-                ''')
-
-                # --- Migraciones de Datos Antiguas (se mantienen por si acaso) ---
-                try:
-                    cursor.execute("ALTER TABLE translations ADD COLUMN status INTEGER DEFAULT 1")
-                except sqlite3.OperationalError:
-                    pass
-                
-                cursor.execute('''
-                    UPDATE translations 
-                    SET status = 1 
-                    WHERE status IS NULL OR status = 0
-                ''')
-
-                try:
-                    cursor.execute("ALTER TABLE book_metadata ADD COLUMN description TEXT")
-                except sqlite3.OperationalError:
-                    pass
-
-                try:
-                    cursor.execute("ALTER TABLE book_metadata ADD COLUMN notes TEXT")
-                except sqlite3.OperationalError:
-                    pass
-
-                try:
-                    cursor.execute("ALTER TABLE book_metadata ADD COLUMN language TEXT")
-                except sqlite3.OperationalError:
-                    pass
-
-                try:
-                    cursor.execute("ALTER TABLE book_metadata ADD COLUMN collection TEXT")
-                except sqlite3.OperationalError:
-                    pass
-
-                try:
-                    cursor.execute("ALTER TABLE book_metadata ADD COLUMN collection_type TEXT")
-                except sqlite3.OperationalError:
-                    pass
-
-                try:
-                    cursor.execute("ALTER TABLE book_metadata ADD COLUMN collection_position TEXT")
-                except sqlite3.OperationalError:
-                    pass
-
-                conn.commit()
+                if current < SCHEMA_VERSION:
+                    print(f"Esquema de base de datos actualizado de la versión {current} a la {SCHEMA_VERSION}")
+            return True
         except sqlite3.Error as e:
             print(f"Error inicializando la base de datos: {e}")
             self._create_json_backup()
+            return False
+
+    @staticmethod
+    def _get_schema_version(conn: sqlite3.Connection) -> int:
+        """Versión del esquema aplicada (0 si la base es nueva o anterior a las migraciones)"""
+        try:
+            result = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+        except sqlite3.OperationalError:
+            return 0
+        return result[0] or 0
+
+    def _json_journal(self) -> JsonJournal:
+        """Almacén de respaldo en JSON (snapshot + diario) usado si SQLite falla"""
+        return get_journal(NovelFolderStructure.get_db_path(self.directory).with_suffix('.json'))
+
+    def _storage(self):
+        """Almacenamiento de capítulos de la novela (carpetas o SQLite)"""
+        # Importación diferida: chapter_storage depende de este módulo
+        from .chapter_storage import get_chapter_storage
+        return get_chapter_storage(self.directory)
+
+    def get_novel_setting(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        """Lee un ajuste propio de la novela (p. ej. el backend de almacenamiento)."""
+        try:
+            with self._connect() as conn:
+                row = conn.execute("SELECT value FROM novel_settings WHERE key = ?", (key,)).fetchone()
+                return row[0] if row else default
+        except sqlite3.Error:
+            return default
+
+    def set_novel_setting(self, key: str, value: str) -> bool:
+        """Guarda un ajuste propio de la novela."""
+        try:
+            with self._connect() as conn:
+                conn.execute("INSERT OR REPLACE INTO novel_settings (key, value) VALUES (?, ?)", (key, value))
+            return True
+        except sqlite3.Error as e:
+            print(f"Error guardando ajuste de la novela: {e}")
+            return False
 
     def _create_json_backup(self) -> None:
         """Crea un archivo JSON como respaldo si SQLite falla"""
-        json_path = NovelFolderStructure.get_db_path(self.directory).with_suffix('.json')
-        if not json_path.exists():
-            with open(json_path, 'w', encoding='utf-8') as f:
-                json.dump({"translations": [], "custom_terms": "", "book_metadata": {}}, f)
+        self._json_journal().ensure_snapshot({"translations": [], "custom_terms": "", "book_metadata": {}})
 
     def is_file_translated(self, filename: str) -> bool:
         """Verifica si un archivo ya ha sido traducido."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 cursor.execute(
                     "SELECT status FROM translations WHERE filename = ?",
@@ -151,65 +460,288 @@ class TranslationDatabase:
                 )
                 result = cursor.fetchone()
                 if result and result[0] == 1:
-                    # Verificar que el archivo traducido realmente exista en la carpeta translated
-                    translated_path = NovelFolderStructure.get_translated_path(self.directory)
-                    translated_file = translated_path / filename
-                    return translated_file.exists()
+                    # Verificar que la traducción realmente exista
+                    return self._storage().exists("translated", filename)
                 return False
         except sqlite3.Error:
             return self._check_json_record(filename)
 
     def _check_json_record(self, filename: str) -> bool:
         """Verifica el registro en el archivo JSON de respaldo"""
-        json_path = NovelFolderStructure.get_db_path(self.directory).with_suffix('.json')
-        try:
-            with open(json_path, 'r', encoding='utf-8') as f:
-                records = json.load(f)
-                return any(record['filename'] == filename
-                          for record in records.get('translations', []))
-        except (FileNotFoundError, json.JSONDecodeError):
-            return False
+        return self._json_journal().has_translation(filename)
 
     def add_translation_record(self, filename: str, source_lang: str,
-                             target_lang: str) -> bool:
-        """Registra una traducción exitosa."""
+                             target_lang: str, source_hash: Optional[str] = None) -> bool:
+        """
+        Registra una traducción exitosa.
+
+        Args:
+            filename (str): Capítulo traducido
+            source_lang (str): Idioma de origen
+            target_lang (str): Idioma de destino
+            source_hash (Optional[str]): content_hash() del original traducido
+        """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     INSERT OR REPLACE INTO translations
-                    (filename, source_lang, target_lang, status)
-                    VALUES (?, ?, ?, 1)
-                ''', (filename, source_lang, target_lang))
+                    (filename, source_lang, target_lang, status, source_hash)
+                    VALUES (?, ?, ?, 1, ?)
+                ''', (filename, source_lang, target_lang, source_hash))
                 conn.commit()
                 return True
         except sqlite3.Error:
             return self._add_json_record(filename, source_lang, target_lang)
 
-    def _add_json_record(self, filename: str, source_lang: str,
-                         target_lang: str) -> bool:
-        """Añade un registro al archivo JSON de respaldo"""
-        json_path = NovelFolderStructure.get_db_path(self.directory).with_suffix('.json')
+    def add_translation_records(self, filenames: List[str], source_lang: str,
+                                target_lang: str, source_hashes: Optional[Dict[str, str]] = None) -> bool:
+        """
+        Registra varias traducciones exitosas en una sola transacción.
+
+        Args:
+            filenames (List[str]): Capítulos traducidos
+            source_lang (str): Idioma de origen
+            target_lang (str): Idioma de destino
+            source_hashes (Optional[Dict[str, str]]): content_hash() del original de cada capítulo
+
+        Returns:
+            bool: True si se registraron todos
+        """
+        if not filenames:
+            return True
+        source_hashes = source_hashes or {}
         try:
-            if json_path.exists():
-                with open(json_path, 'r', encoding='utf-8') as f:
-                    records = json.load(f)
-            else:
-                records = {"translations": [], "custom_terms": ""}
+            with self._connect() as conn:
+                conn.executemany('''
+                    INSERT OR REPLACE INTO translations
+                    (filename, source_lang, target_lang, status, source_hash)
+                    VALUES (?, ?, ?, 1, ?)
+                ''', [(filename, source_lang, target_lang, source_hashes.get(filename))
+                      for filename in filenames])
+                return True
+        except sqlite3.Error:
+            return self._add_json_records(filenames, source_lang, target_lang)
+
+    def save_translation_source(self, filename: str, source_text: str) -> bool:
+        """
+        Guarda el original con el que se tradujo un capítulo.
+
+        Permite retraducir después solo los párrafos que cambiaron en el original.
+
+        Args:
+            filename (str): Capítulo traducido
+            source_text (str): Texto original traducido
+
+        Returns:
+            bool: True si se guardó
+        """
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO translation_sources (filename, source_hash, source_text) "
+                    "VALUES (?, ?, ?)",
+                    (filename, content_hash(source_text), zlib.compress(source_text.encode('utf-8')))
+                )
+                return True
+        except sqlite3.Error as e:
+            print(f"Error guardando el original traducido de {filename}: {e}")
+            return False
 
-            record = {
-                "filename": filename,
-                "source_lang": source_lang,
-                "target_lang": target_lang,
-                "translated_date": str(datetime.now())
+    def get_translation_source(self, filename: str) -> Optional[str]:
+        """Retorna el original con el que se tradujo el capítulo, o None si no se guardó"""
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT source_text FROM translation_sources WHERE filename = ?", (filename,)
+                ).fetchone()
+        except sqlite3.Error:
+            return None
+        if not row or row[0] is None:
+            return None
+        return zlib.decompress(row[0]).decode('utf-8')
+
+    def get_stale_chapters(self, filenames: Optional[List[str]] = None) -> List[str]:
+        """
+        Lista los capítulos traducidos cuyo original cambió desde la traducción.
+
+        Compara el hash registrado al traducir con el del catálogo, que solo vuelve a
+        leer los originales cuyo mtime o tamaño cambió. Las traducciones anteriores a
+        este registro no tienen hash: se toma el original actual como referencia, así
+        que se detectan los cambios a partir de ese momento.
+
+        Args:
+            filenames (Optional[List[str]]): Capítulos a revisar (None = todos)
+
+        Returns:
+            List[str]: Capítulos desactualizados
+        """
+        catalog = self.refresh_chapter_catalog()
+        try:
+            with self._connect() as conn:
+                rows = conn.execute(
+                    "SELECT filename, source_hash FROM translations WHERE status = 1"
+                ).fetchall()
+                baseline = [(catalog[filename]["original_hash"], filename) for filename, source_hash in rows
+                            if source_hash is None and filename in catalog]
+                if baseline:
+                    conn.executemany("UPDATE translations SET source_hash = ? WHERE filename = ?", baseline)
+        except sqlite3.Error:
+            return []
+
+        wanted = None if filenames is None else set(filenames)
+        return [
+            filename for filename, source_hash in rows
+            if source_hash is not None and filename in catalog
+            and catalog[filename]["original_hash"] != source_hash
+            and (wanted is None or filename in wanted)
+        ]
+
+    def get_chapter_statuses(self, filenames: Optional[List[str]] = None) -> Dict[str, Dict[str, bool]]:
+        """
+        Obtiene el estado de traducción y refinamiento de muchos capítulos a la vez.
+
+        Equivale a llamar is_file_translated e is_file_refined para cada capítulo, pero
+        con una sola consulta y un solo listado de las traducciones.
+
+        Args:
+            filenames (Optional[List[str]]): Capítulos a consultar (None = todos los registrados)
+
+        Returns:
+            Dict[str, Dict[str, bool]]: {filename: {"translated": bool, "refined": bool}}
+        """
+        on_disk = set(self._storage().list("translated"))
+
+        records: Dict[str, tuple] = {}
+        try:
+            with self._connect() as conn:
+                cursor = conn.execute('''
+                    SELECT filename, MAX(translation_status), MAX(refine_status) FROM (
+                        SELECT filename, status AS translation_status, NULL AS refine_status FROM translations
+                        UNION ALL
+                        SELECT filename, NULL, status FROM refines
+                    ) GROUP BY filename
+                ''')
+                records = {row[0]: (row[1], row[2]) for row in cursor}
+        except sqlite3.Error:
+            records = {record['filename']: (1, None) for record in self._get_json_records()}
+
+        names = records.keys() if filenames is None else filenames
+        statuses = {}
+        for filename in names:
+            translation_status, refine_status = records.get(filename, (None, None))
+            exists = filename in on_disk
+            statuses[filename] = {
+                "translated": translation_status == 1 and exists,
+                "refined": refine_status == 4 and exists,  # STATUS_REFINED
             }
+        return statuses
+
+    def refresh_chapter_catalog(self) -> Dict[str, Dict]:
+        """
+        Actualiza la tabla chapters con los capítulos originales y traducidos.
 
-            translations = records.get('translations', [])
-            translations.append(record)
-            records['translations'] = translations
+        Solo se leen y se vuelven a hashear los capítulos cuyo mtime o tamaño cambió
+        desde la última actualización; el resto se resuelve con un listado por tipo
+        (un os.scandir por carpeta, o una consulta con el almacenamiento en SQLite).
 
-            with open(json_path, 'w', encoding='utf-8') as f:
-                json.dump(records, f, indent=2)
+        Returns:
+            Dict[str, Dict]: Catálogo completo, igual que get_chapter_catalog()
+        """
+        storage = self._storage()
+        catalog = self.get_chapter_catalog()
+        seen = set()
+        changed: Dict[str, Dict] = {}
+
+        for side in ("original", "translated"):
+            files = storage.entries(side)
+            if side == "original":
+                seen = set(files)
+            else:
+                # Traducciones borradas: se vacían sus campos
+                for filename, row in catalog.items():
+                    if row["translated_mtime"] is not None and filename not in files:
+                        changed[filename] = dict(row, translated_bytes=None, translated_chars=None,
+                                                 translated_hash=None, translated_mtime=None)
+            for filename, (mtime_ns, size) in files.items():
+                row = changed.get(filename) or dict(catalog.get(filename) or _empty_catalog_row(filename))
+                if row[f"{side}_mtime"] == mtime_ns and row[f"{side}_bytes"] == size:
+                    continue
+                try:
+                    text = storage.read(side, filename)
+                except (OSError, UnicodeDecodeError) as e:
+                    print(f"Error leyendo {filename} para el catálogo: {e}")
+                    continue
+                row.update({
+                    f"{side}_bytes": size,
+                    f"{side}_chars": len(text),
+                    f"{side}_hash": content_hash(text),
+                    f"{side}_mtime": mtime_ns,
+                })
+                if side == "original":
+                    row["estimated_tokens"] = len(text) // CHARS_PER_TOKEN
+                changed[filename] = row
+
+        # Capítulos cuyo original ya no existe
+        removed = [filename for filename in catalog if filename not in seen]
+
+        changed = {filename: row for filename, row in changed.items() if filename in seen}
+        if changed or removed:
+            try:
+                with self._connect() as conn:
+                    conn.executemany(
+                        f"INSERT OR REPLACE INTO chapters ({', '.join(CATALOG_COLUMNS)}) "
+                        f"VALUES ({', '.join('?' for _ in CATALOG_COLUMNS)})",
+                        [tuple(row[column] for column in CATALOG_COLUMNS) for row in changed.values()]
+                    )
+                    conn.executemany("DELETE FROM chapters WHERE filename = ?",
+                                     [(filename,) for filename in removed])
+            except sqlite3.Error as e:
+                print(f"Error actualizando el catálogo de capítulos: {e}")
+
+        catalog.update(changed)
+        return {filename: catalog[filename] for filename in sorted(seen) if filename in catalog}
+
+    def get_chapter_catalog(self, filenames: Optional[List[str]] = None) -> Dict[str, Dict]:
+        """
+        Lee el catálogo de capítulos tal como quedó en la última actualización.
+
+        Args:
+            filenames (Optional[List[str]]): Capítulos a consultar (None = todos)
+
+        Returns:
+            Dict[str, Dict]: {filename: fila de chapters}; los campos de la traducción
+            son None si el capítulo no tiene traducción
+        """
+        try:
+            with self._connect() as conn:
+                cursor = conn.execute(f"SELECT {', '.join(CATALOG_COLUMNS)} FROM chapters")
+                catalog = {row[0]: dict(zip(CATALOG_COLUMNS, row)) for row in cursor}
+        except sqlite3.Error:
+            return {}
+        if filenames is None:
+            return catalog
+        return {filename: catalog[filename] for filename in filenames if filename in catalog}
+
+    def _add_json_record(self, filename: str, source_lang: str,
+                         target_lang: str) -> bool:
+        """Añade un registro al archivo JSON de respaldo"""
+        return self._add_json_records([filename], source_lang, target_lang)
+
+    def _add_json_records(self, filenames: List[str], source_lang: str,
+                          target_lang: str) -> bool:
+        """Añade varios registros al diario del respaldo JSON en una sola escritura"""
+        try:
+            translated_date = str(datetime.now())
+            self._json_journal().add_translations([
+                {
+                    "filename": filename,
+                    "source_lang": source_lang,
+                    "target_lang": target_lang,
+                    "translated_date": translated_date
+                }
+                for filename in filenames
+            ])
             return True
         except Exception as e:
             print(f"Error guardando en JSON: {e}")
@@ -218,7 +750,7 @@ class TranslationDatabase:
     def get_all_translated_files(self) -> List[Dict[str, str]]:
         """Obtiene la lista de todos los archivos traducidos."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 cursor.execute(
                     "SELECT filename, source_lang, target_lang, translated_date "
@@ -238,18 +770,12 @@ class TranslationDatabase:
 
     def _get_json_records(self) -> List[Dict[str, str]]:
         """Obtiene los registros del archivo JSON de respaldo"""
-        json_path = NovelFolderStructure.get_db_path(self.directory).with_suffix('.json')
-        try:
-            with open(json_path, 'r', encoding='utf-8') as f:
-                records = json.load(f)
-                return records.get('translations', [])
-        except (FileNotFoundError, json.JSONDecodeError):
-            return []
+        return self._json_journal().translations()
 
     def save_custom_terms(self, terms: str) -> bool:
         """Guarda los términos personalizados para el proyecto actual."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     INSERT OR REPLACE INTO custom_terms (id, terms, last_updated)
@@ -263,7 +789,7 @@ class TranslationDatabase:
     def get_custom_terms(self) -> str:
         """Recupera los términos personalizados para el proyecto actual."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 cursor.execute(
                     "SELECT terms FROM custom_terms WHERE id = ?",
@@ -276,18 +802,8 @@ class TranslationDatabase:
 
     def _save_terms_to_json(self, terms: str) -> bool:
         """Guarda los términos en el archivo JSON de respaldo"""
-        json_path = NovelFolderStructure.get_db_path(self.directory).with_suffix('.json')
         try:
-            if json_path.exists():
-                with open(json_path, 'r', encoding='utf-8') as f:
-                    records = json.load(f)
-            else:
-                records = {"translations": [], "custom_terms": ""}
-
-            records['custom_terms'] = terms
-
-            with open(json_path, 'w', encoding='utf-8') as f:
-                json.dump(records, f, indent=2)
+            self._json_journal().set('custom_terms', terms)
             return True
         except Exception as e:
             print(f"Error guardando términos en JSON: {e}")
@@ -295,19 +811,13 @@ class TranslationDatabase:
 
     def _get_terms_from_json(self) -> str:
         """Recupera los términos del archivo JSON de respaldo"""
-        json_path = NovelFolderStructure.get_db_path(self.directory).with_suffix('.json')
-        try:
-            with open(json_path, 'r', encoding='utf-8') as f:
-                records = json.load(f)
-                return records.get('custom_terms', "")
-        except (FileNotFoundError, json.JSONDecodeError):
-            return ""
+        return self._json_journal().get('custom_terms', "")
 
     def save_book_metadata(self, title: str, author: str, description: str = "", notes: str = "", language: str = "",
                          collection: str = "", collection_type: str = "", collection_position: str = "") -> bool:
         """Guarda los metadatos del libro para el proyecto actual."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     INSERT OR REPLACE INTO book_metadata
@@ -322,7 +832,7 @@ class TranslationDatabase:
     def get_book_metadata(self) -> Dict[str, str]:
         """Recupera los metadatos del libro para el proyecto actual."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 cursor.execute(
                     "SELECT title, author, description, notes, language, collection, collection_type, collection_position FROM book_metadata WHERE id = ?",
@@ -355,15 +865,8 @@ class TranslationDatabase:
     def _save_metadata_to_json(self, title: str, author: str, description: str = "", notes: str = "", language: str = "",
                              collection: str = "", collection_type: str = "", collection_position: str = "") -> bool:
         """Guarda los metadatos en el archivo JSON de respaldo"""
-        json_path = NovelFolderStructure.get_db_path(self.directory).with_suffix('.json')
         try:
-            if json_path.exists():
-                with open(json_path, 'r', encoding='utf-8') as f:
-                    records = json.load(f)
-            else:
-                records = {"translations": [], "custom_terms": "", "book_metadata": {}}
-
-            records['book_metadata'] = {
+            self._json_journal().set('book_metadata', {
                 "title": title,
                 "author": author,
                 "description": description,
@@ -373,10 +876,7 @@ class TranslationDatabase:
                 "collection_type": collection_type,
                 "collection_position": collection_position,
                 "last_updated": str(datetime.now())
-            }
-
-            with open(json_path, 'w', encoding='utf-8') as f:
-                json.dump(records, f, indent=2)
+            })
             return True
         except Exception as e:
             print(f"Error guardando metadatos en JSON: {e}")
@@ -384,37 +884,23 @@ class TranslationDatabase:
 
     def _get_metadata_from_json(self) -> Dict[str, str]:
         """Recupera los metadatos del archivo JSON de respaldo"""
-        json_path = NovelFolderStructure.get_db_path(self.directory).with_suffix('.json')
-        try:
-            with open(json_path, 'r', encoding='utf-8') as f:
-                records = json.load(f)
-                metadata = records.get('book_metadata', {})
-                return {
-                    "title": metadata.get('title', ''),
-                    "author": metadata.get('author', ''),
-                    "description": metadata.get('description', ''),
-                    "notes": metadata.get('notes', ''),
-                    "language": metadata.get('language', ''),
-                    "collection": metadata.get('collection', ''),
-                    "collection_type": metadata.get('collection_type', ''),
-                    "collection_position": metadata.get('collection_position', '')
-                }
-        except (FileNotFoundError, json.JSONDecodeError):
-            return {
-                "title": "",
-                "author": "",
-                "description": "",
-                "notes": "",
-                "collection": "",
-                "collection_type": "",
-                "collection_position": ""
-            }
+        metadata = self._json_journal().get('book_metadata') or {}
+        return {
+            "title": metadata.get('title', ''),
+            "author": metadata.get('author', ''),
+            "description": metadata.get('description', ''),
+            "notes": metadata.get('notes', ''),
+            "language": metadata.get('language', ''),
+            "collection": metadata.get('collection', ''),
+            "collection_type": metadata.get('collection_type', ''),
+            "collection_position": metadata.get('collection_position', '')
+        }
 
     def save_custom_prompt(self, source_lang: str, target_lang: str, prompt_type: str, content: str) -> bool:
         """Guarda un prompt personalizado para el proyecto actual."""
         prompt_id = f"{source_lang}_{target_lang}_{prompt_type}"
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     INSERT OR REPLACE INTO custom_prompts (id, source_lang, target_lang, type, content, last_updated)
@@ -430,7 +916,7 @@ class TranslationDatabase:
         """Recupera un prompt personalizado para el proyecto actual."""
         prompt_id = f"{source_lang}_{target_lang}_{prompt_type}"
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 cursor.execute(
                     "SELECT content FROM custom_prompts WHERE id = ?",
@@ -445,7 +931,7 @@ class TranslationDatabase:
     def is_file_refined(self, filename: str) -> bool:
         """Verifica si un archivo ya ha sido refinado."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 cursor.execute(
                     "SELECT status FROM refines WHERE filename = ?",
@@ -453,10 +939,8 @@ class TranslationDatabase:
                 )
                 result = cursor.fetchone()
                 if result and result[0] == 4:  # STATUS_REFINED
-                    # Verificar que el archivo refinado realmente exista en la carpeta translated
-                    translated_path = NovelFolderStructure.get_translated_path(self.directory)
-                    translated_file = translated_path / filename
-                    return translated_file.exists()
+                    # Verificar que la traducción refinada realmente exista
+                    return self._storage().exists("translated", filename)
                 return False
         except sqlite3.Error as e:
             print(f"Error verificando refinamiento: {e}")
@@ -466,7 +950,7 @@ class TranslationDatabase:
                          target_lang: str) -> bool:
         """Registra un refinamiento exitoso."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 cursor.execute('''
                     INSERT OR REPLACE INTO refines
@@ -477,4 +961,59 @@ class TranslationDatabase:
                 return True
         except sqlite3.Error as e:
             print(f"Error registrando refinamiento: {e}")
-            return False
\ No newline at end of file
+            return False
+
+    def get_check_result(self, source_hash: str, translation_hash: str, check_provider: str,
+                         check_model: str, prompt_hash: str) -> Optional[Dict]:
+        """
+        Busca un veredicto de comprobación guardado.
+
+        Como la clave incluye los hashes del original y de la traducción, cualquier
+        cambio en alguno de los dos textos deja de coincidir con el veredicto anterior.
+
+        Returns:
+            Optional[Dict]: {"passed": bool, "comments": str, "checked_date": str} o None
+        """
+        try:
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT passed, comments, checked_date FROM check_results
+                    WHERE source_hash = ? AND translation_hash = ? AND check_provider = ?
+                      AND check_model = ? AND prompt_hash = ?
+                ''', (source_hash, translation_hash, check_provider, check_model, prompt_hash))
+                result = cursor.fetchone()
+                if result:
+                    return {"passed": bool(result[0]), "comments": result[1] or "", "checked_date": result[2]}
+                return None
+        except sqlite3.Error as e:
+            print(f"Error consultando caché de comprobación: {e}")
+            return None
+
+    def save_check_result(self, source_hash: str, translation_hash: str, check_provider: str,
+                          check_model: str, prompt_hash: str, passed: bool, comments: str = "") -> bool:
+        """
+        Guarda el veredicto de una comprobación.
+
+        Los veredictos anteriores del mismo original con otra traducción se eliminan:
+        ya no pueden volver a usarse una vez que la traducción cambió.
+        """
+        try:
+            with self._connect() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    DELETE FROM check_results
+                    WHERE source_hash = ? AND translation_hash != ?
+                ''', (source_hash, translation_hash))
+                cursor.execute('''
+                    INSERT OR REPLACE INTO check_results
+                    (source_hash, translation_hash, check_provider, check_model, prompt_hash,
+                     passed, comments, checked_date)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+                ''', (source_hash, translation_hash, check_provider, check_model, prompt_hash,
+                      1 if passed else 0, comments or ""))
+                conn.commit()
+                return True
+        except sqlite3.Error as e:
+            print(f"Error guardando caché de comprobación: {e}")
+            return False
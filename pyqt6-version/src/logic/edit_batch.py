@@ -0,0 +1,108 @@
+from bisect import bisect_left
+from typing import List, Optional, Tuple
+
+
+class TextEdit:
+    """Cambio sobre el texto original: sustituye original[start:end] por replacement."""
+
+    def __init__(self, start: int, end: int, replacement: str, label: str = ""):
+        self.start = start
+        self.end = end
+        self.replacement = replacement
+        self.label = label
+
+    @property
+    def is_insert(self) -> bool:
+        return self.start == self.end
+
+    def overlaps(self, start: int, end: int) -> bool:
+        """True si el cambio choca con el rango [start, end) del original."""
+        if self.is_insert and start == end:
+            return False  # Dos inserciones en el mismo punto se aplican en orden
+        if self.is_insert:
+            return start < self.start < end
+        if start == end:
+            return self.start < start < self.end
+        return start < self.end and self.start < end
+
+
+class EditBatch:
+    """
+    Lote de cambios resueltos contra el texto original y aplicados en una sola pasada.
+
+    Todas las posiciones se refieren al texto sin modificar, así que localizar un
+    cambio nunca depende de los anteriores. Los cambios que se solapan con otro ya
+    aceptado se rechazan. Al aplicar, el resultado se arma como una tabla de piezas
+    (tramos del original intercalados con los textos nuevos): O(n + k) en lugar de
+    reconstruir la cadena completa por cada cambio.
+    """
+
+    def __init__(self, original: str):
+        self.original = original
+        self._edits: List[TextEdit] = []
+        self._keys: List[Tuple[int, int, int]] = []  # (inicio, fin, orden) para bisect
+        self.rejected: List[TextEdit] = []
+
+    def __len__(self) -> int:
+        return len(self._edits)
+
+    def conflict_for(self, start: int, end: int) -> Optional[TextEdit]:
+        """Retorna el cambio aceptado que choca con [start, end), o None."""
+        # Solo los vecinos en orden de inicio pueden solaparse; se revisan hacia ambos lados
+        position = bisect_left(self._keys, (start, -1, -1))
+        for index in range(position - 1, -1, -1):
+            edit = self._edits[index]
+            if edit.overlaps(start, end):
+                return edit
+            if edit.end <= start and not edit.is_insert:
+                break
+        for index in range(position, len(self._edits)):
+            edit = self._edits[index]
+            if edit.start > end or (edit.start == end and start != end):
+                break
+            if edit.overlaps(start, end):
+                return edit
+        return None
+
+    def _has_insert(self, position: int, replacement: str) -> bool:
+        index = bisect_left(self._keys, (position, position, -1))
+        while index < len(self._keys) and self._keys[index][:2] == (position, position):
+            if self._edits[index].replacement == replacement:
+                return True
+            index += 1
+        return False
+
+    def add(self, start: int, end: int, replacement: str, label: str = "") -> bool:
+        """
+        Registra un cambio sobre original[start:end].
+
+        Returns:
+            bool: False si el cambio se solapa con otro ya aceptado (queda en rejected)
+        """
+        edit = TextEdit(start, end, replacement, label)
+        if start == end and self._has_insert(start, replacement):
+            return True  # La misma inserción repetida se aplica una sola vez
+        conflict = self.conflict_for(start, end)
+        if conflict is not None:
+            # Repetir exactamente el mismo cambio no es un conflicto
+            if (conflict.start, conflict.end, conflict.replacement) == (start, end, replacement):
+                return True
+            self.rejected.append(edit)
+            return False
+
+        key = (start, end, len(self._edits))
+        position = bisect_left(self._keys, key)
+        self._keys.insert(position, key)
+        self._edits.insert(position, edit)
+        return True
+
+    def apply(self) -> str:
+        """Construye el texto resultante recorriendo el original una sola vez."""
+        pieces = []
+        cursor = 0
+        for edit in self._edits:
+            pieces.append(self.original[cursor:edit.start])
+            pieces.append(edit.replacement)
+            cursor = edit.end
+        pieces.append(self.original[cursor:])
+        return ''.join(pieces)
@@ -171,10 +171,28 @@ class NovelFolderStructure:
         except Exception:
             return None
 
+    @staticmethod
+    def get_storage(novel_path: str):
+        """
+        Obtiene el almacenamiento de capítulos de la novela.
+
+        Por defecto son las carpetas originals/ y translated/; una novela puede
+        guardar sus capítulos en la base de datos (ver chapter_storage).
+
+        Args:
+            novel_path: Ruta al directorio de la novela
+
+        Returns:
+            ChapterStorage: Almacenamiento para leer y escribir capítulos
+        """
+        # Importación diferida: chapter_storage depende de este módulo
+        from .chapter_storage import get_chapter_storage
+        return get_chapter_storage(novel_path)
+
     @staticmethod
     def get_original_files(novel_path: str) -> List[str]:
         """
-        Obtiene lista de archivos TXT en la carpeta originals.
+        Obtiene lista de capítulos originales (TXT o MD).
 
         Args:
             novel_path: Ruta al directorio de la novela
@@ -183,20 +201,14 @@ class NovelFolderStructure:
             List[str]: Lista de nombres de archivos
         """
         try:
-            originals_path = NovelFolderStructure.get_originals_path(novel_path)
-            if not originals_path.exists():
-                return []
-
-            return [f for f in os.listdir(originals_path)
-                   if f.lower().endswith(('.txt', '.md')) and (originals_path / f).is_file()]
-
+            return NovelFolderStructure.get_storage(novel_path).list("original")
         except Exception:
             return []
 
     @staticmethod
     def get_translated_files(novel_path: str) -> List[str]:
         """
-        Obtiene lista de archivos TXT en la carpeta translated.
+        Obtiene lista de capítulos traducidos (TXT o MD).
 
         Args:
             novel_path: Ruta al directorio de la novela
@@ -205,16 +217,20 @@ class NovelFolderStructure:
             List[str]: Lista de nombres de archivos
         """
         try:
-            translated_path = NovelFolderStructure.get_translated_path(novel_path)
-            if not translated_path.exists():
-                return []
-
-            return [f for f in os.listdir(translated_path)
-                   if f.lower().endswith(('.txt', '.md')) and (translated_path / f).is_file()]
-
+            return NovelFolderStructure.get_storage(novel_path).list("translated")
         except Exception:
             return []
 
+    @staticmethod
+    def _store_original(novel_path: str, file_path: Path) -> bool:
+        """Guarda el archivo como capítulo original si la novela usa la base de datos"""
+        storage = NovelFolderStructure.get_storage(novel_path)
+        if storage.backend != "sqlite":
+            return False
+        with open(file_path, 'r', encoding='utf-8') as file:
+            storage.write("original", file_path.name, file.read())
+        return True
+
     @staticmethod
     def move_file_to_originals(novel_path: str, file_path: str) -> bool:
         """
@@ -233,6 +249,10 @@ class NovelFolderStructure:
             file_path = Path(file_path)
             originals_path = NovelFolderStructure.get_originals_path(novel_path)
 
+            if NovelFolderStructure._store_original(novel_path, file_path):
+                file_path.unlink()
+                return True
+
             # Mover archivo
             shutil.move(str(file_path), str(originals_path / file_path.name))
 
@@ -260,6 +280,9 @@ class NovelFolderStructure:
             file_path = Path(file_path)
             originals_path = NovelFolderStructure.get_originals_path(novel_path)
 
+            if NovelFolderStructure._store_original(novel_path, file_path):
+                return True
+
             # Copiar archivo
             shutil.copy2(str(file_path), str(originals_path / file_path.name))
 
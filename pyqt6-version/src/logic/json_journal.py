@@ -0,0 +1,163 @@
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+# Entradas del diario a partir de las cuales se compacta en el snapshot
+COMPACT_EVERY = 500
+
+# Un diario por archivo y proceso, compartido por todas las instancias de TranslationDatabase
+_journals: Dict[str, "JsonJournal"] = {}
+_journals_lock = threading.Lock()
+
+
+def get_journal(snapshot_path: Path) -> "JsonJournal":
+    """Retorna el diario del archivo de respaldo, creándolo la primera vez."""
+    key = str(snapshot_path)
+    with _journals_lock:
+        if key not in _journals:
+            _journals[key] = JsonJournal(snapshot_path)
+        return _journals[key]
+
+
+class JsonJournal:
+    """
+    Almacén de respaldo en JSON con diario de solo escritura al final.
+
+    El estado se guarda en dos archivos: el snapshot (`.translation_records.json`, con
+    el mismo formato de siempre) y el diario (`.translation_records.jsonl`), donde cada
+    cambio se añade como una línea. Escribir un registro cuesta una línea en lugar de
+    reescribir todo el archivo. Cada COMPACT_EVERY entradas el estado se vuelca a un
+    temporal que reemplaza al snapshot con un rename atómico y el diario se vacía.
+
+    Si el proceso se interrumpe a mitad de una línea, esa línea se ignora al cargar.
+    Aplicar el diario es idempotente (las traducciones se indexan por nombre de
+    archivo), así que una compactación interrumpida tampoco duplica registros.
+    """
+
+    def __init__(self, snapshot_path: Path):
+        self.snapshot_path = Path(snapshot_path)
+        self.journal_path = self.snapshot_path.with_suffix('.jsonl')
+        self._lock = threading.Lock()
+        self._translations: Dict[str, Dict] = {}
+        self._values: Dict[str, Any] = {}
+        self._entries = 0
+        self._signature: Optional[Tuple] = None
+
+    def _current_signature(self) -> Tuple:
+        """Identifica el estado de ambos archivos para detectar escrituras de otros procesos"""
+        signature = []
+        for path in (self.snapshot_path, self.journal_path):
+            try:
+                stat = os.stat(path)
+                signature.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                signature.append(None)
+        return tuple(signature)
+
+    def _apply(self, entry: Dict) -> None:
+        if entry.get("op") == "translation":
+            record = entry["record"]
+            self._translations[record["filename"]] = record
+        elif entry.get("op") == "set":
+            self._values[entry["key"]] = entry["value"]
+
+    def _load(self) -> None:
+        """Carga snapshot y diario si cambiaron desde la última lectura (requiere el lock)."""
+        signature = self._current_signature()
+        if signature == self._signature:
+            return
+
+        self._translations = {}
+        self._values = {}
+        self._entries = 0
+        try:
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            snapshot = {}
+        for record in snapshot.get('translations', []):
+            self._translations[record['filename']] = record
+        for key, value in snapshot.items():
+            if key != 'translations':
+                self._values[key] = value
+
+        try:
+            with open(self.journal_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        self._apply(json.loads(line))
+                    except (json.JSONDecodeError, KeyError):
+                        continue  # Línea incompleta por una escritura interrumpida
+                    self._entries += 1
+        except FileNotFoundError:
+            pass
+        self._signature = signature
+
+    def _append(self, entries: List[Dict]) -> None:
+        """Añade entradas al diario y las aplica en memoria (requiere el lock)."""
+        self._load()
+        lines = ''.join(json.dumps(entry, ensure_ascii=False) + '\n' for entry in entries)
+        with open(self.journal_path, 'ab') as f:
+            # Cerrar una línea incompleta para no pegarle la siguiente entrada
+            if f.tell() > 0:
+                with open(self.journal_path, 'rb') as tail:
+                    tail.seek(-1, os.SEEK_END)
+                    if tail.read(1) != b'\n':
+                        lines = '\n' + lines
+            f.write(lines.encode('utf-8'))
+            f.flush()
+            os.fsync(f.fileno())
+        for entry in entries:
+            self._apply(entry)
+        self._entries += len(entries)
+        self._signature = self._current_signature()
+        if self._entries >= COMPACT_EVERY:
+            self._compact()
+
+    def _compact(self) -> None:
+        """Vuelca el estado al snapshot con un rename atómico y vacía el diario (requiere el lock)."""
+        snapshot = dict(self._values)
+        snapshot['translations'] = list(self._translations.values())
+        temp_path = self.snapshot_path.with_name(self.snapshot_path.name + '.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.snapshot_path)
+        # Con el snapshot ya reemplazado, volver a aplicar el diario no cambia nada
+        open(self.journal_path, 'w', encoding='utf-8').close()
+        self._entries = 0
+        self._signature = self._current_signature()
+
+    def ensure_snapshot(self, defaults: Dict) -> None:
+        """Crea el snapshot con los valores iniciales si todavía no existe."""
+        with self._lock:
+            if not self.snapshot_path.exists():
+                with open(self.snapshot_path, 'w', encoding='utf-8') as f:
+                    json.dump(defaults, f)
+
+    def add_translations(self, records: List[Dict]) -> None:
+        """Registra traducciones (una línea del diario por registro, una sola escritura)."""
+        with self._lock:
+            self._append([{"op": "translation", "record": record} for record in records])
+
+    def has_translation(self, filename: str) -> bool:
+        with self._lock:
+            self._load()
+            return filename in self._translations
+
+    def translations(self) -> List[Dict]:
+        with self._lock:
+            self._load()
+            return list(self._translations.values())
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._append([{"op": "set", "key": key, "value": value}])
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            self._load()
+            return self._values.get(key, default)
@@ -0,0 +1,308 @@
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Iterable, Optional
+
+from .database import TranslationDatabase
+from .chapter_storage import BACKEND_SQLITE, TRANSLATED, SqliteChapterStorage, get_chapter_storage
+from .session_logger import session_logger
+
+
+class ChapterLease:
+    """Lease vigente sobre un capítulo, identificado por un token único."""
+
+    def __init__(self, filename: str, token: str, expires_at: float):
+        self.filename = filename
+        self.token = token
+        self.expires_at = expires_at
+
+
+class ChapterLeaseQueue:
+    """
+    Cola de trabajo compartida entre procesos y hosts basada en leases temporales.
+
+    Los leases se guardan en la tabla chapter_leases de .translation_records.db,
+    de modo que varios equipos que acceden a la misma biblioteca (p. ej. en un NAS)
+    pueden repartirse los capítulos. Cada reclamación, renovación y finalización se
+    ejecuta dentro de una transacción BEGIN IMMEDIATE, y la finalización comprueba
+    el token del lease antes de mover el archivo traducido y registrar la fila en
+    translations, por lo que solo el poseedor actual puede finalizar un capítulo.
+    """
+
+    def __init__(self, novel_path: str, worker_id: Optional[str] = None,
+                 lease_seconds: int = 600, busy_timeout: float = 30.0):
+        """
+        Inicializa la cola de leases para una novela.
+
+        Args:
+            novel_path (str): Directorio de la novela
+            worker_id (Optional[str]): Identificador del worker (por defecto host:pid)
+            lease_seconds (int): Duración de cada lease antes de considerarse expirado
+            busy_timeout (float): Segundos de espera cuando otro proceso tiene la base bloqueada
+        """
+        self.novel_path = novel_path
+        # La tabla chapter_leases la crean las migraciones de TranslationDatabase
+        self.db_path = TranslationDatabase(novel_path).db_path
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.lease_seconds = lease_seconds
+        self.busy_timeout = busy_timeout
+
+    def _connect(self) -> sqlite3.Connection:
+        # isolation_level=None para controlar las transacciones manualmente
+        return sqlite3.connect(self.db_path, timeout=self.busy_timeout, isolation_level=None)
+
+    def claim(self, filename: str, allow_retranslation: bool = False) -> Optional[ChapterLease]:
+        """
+        Intenta reclamar un capítulo. Los leases expirados se recuperan automáticamente.
+
+        Args:
+            filename (str): Nombre del capítulo
+            allow_retranslation (bool): Si False, no reclama capítulos ya traducidos
+
+        Returns:
+            Optional[ChapterLease]: Lease obtenido, o None si el capítulo no está disponible
+        """
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            if not allow_retranslation:
+                row = conn.execute(
+                    "SELECT status FROM translations WHERE filename = ?", (filename,)
+                ).fetchone()
+                if row and row[0] == 1 and get_chapter_storage(self.novel_path).exists(TRANSLATED, filename):
+                    conn.execute("ROLLBACK")
+                    return None
+
+            row = conn.execute(
+                "SELECT worker_id, expires_at, attempts FROM chapter_leases WHERE filename = ?",
+                (filename,)
+            ).fetchone()
+            attempts = 0
+            if row:
+                holder, expires_at, attempts = row
+                if expires_at is not None and expires_at > now:
+                    conn.execute("ROLLBACK")
+                    return None
+                session_logger.log_warning(
+                    f"Recuperando lease expirado de {filename} (anterior: {holder})"
+                )
+
+            token = uuid.uuid4().hex
+            expires_at = now + self.lease_seconds
+            conn.execute('''
+                INSERT OR REPLACE INTO chapter_leases (filename, worker_id, token, expires_at, attempts)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (filename, self.worker_id, token, expires_at, (attempts or 0) + 1))
+            conn.execute("COMMIT")
+            return ChapterLease(filename, token, expires_at)
+        except sqlite3.Error as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            session_logger.log_error(f"Error reclamando lease de {filename}: {e}")
+            return None
+        finally:
+            conn.close()
+
+    def claim_next(self, filenames: Iterable[str], allow_retranslation: bool = False) -> Optional[ChapterLease]:
+        """
+        Reclama el primer capítulo disponible de la lista, respetando su orden.
+
+        Los capítulos con lease vigente o ya traducidos se descartan con una sola
+        lectura, sin bloquear la base; solo se abre una transacción de escritura por
+        candidato, y claim() vuelve a comprobarlo todo con la base bloqueada.
+        """
+        unavailable = set()
+        conn = self._connect()
+        try:
+            unavailable = {row[0] for row in conn.execute(
+                "SELECT filename FROM chapter_leases WHERE expires_at > ?", (time.time(),)
+            )}
+            if not allow_retranslation:
+                translated = {row[0] for row in conn.execute(
+                    "SELECT filename FROM translations WHERE status = 1"
+                )}
+                unavailable |= translated & set(get_chapter_storage(self.novel_path).list(TRANSLATED))
+        except sqlite3.Error as e:
+            session_logger.log_warning(f"No se pudieron filtrar los capítulos disponibles: {e}")
+        finally:
+            conn.close()
+
+        for filename in filenames:
+            if filename in unavailable:
+                continue
+            lease = self.claim(filename, allow_retranslation)
+            if lease:
+                return lease
+        return None
+
+    def renew(self, lease: ChapterLease) -> bool:
+        """Extiende un lease propio. Retorna False si el lease se perdió."""
+        expires_at = time.time() + self.lease_seconds
+        conn = self._connect()
+        try:
+            cursor = conn.execute(
+                "UPDATE chapter_leases SET expires_at = ? WHERE filename = ? AND token = ?",
+                (expires_at, lease.filename, lease.token)
+            )
+            if cursor.rowcount == 1:
+                lease.expires_at = expires_at
+                return True
+            return False
+        except sqlite3.Error as e:
+            session_logger.log_error(f"Error renovando lease de {lease.filename}: {e}")
+            return False
+        finally:
+            conn.close()
+
+    def release(self, lease: ChapterLease) -> None:
+        """Libera un lease propio sin finalizar (p. ej. tras un fallo de traducción)."""
+        conn = self._connect()
+        try:
+            conn.execute(
+                "DELETE FROM chapter_leases WHERE filename = ? AND token = ?",
+                (lease.filename, lease.token)
+            )
+        except sqlite3.Error as e:
+            session_logger.log_error(f"Error liberando lease de {lease.filename}: {e}")
+        finally:
+            conn.close()
+
+    def finalize(self, lease: ChapterLease, translated_text: str,
+                 source_lang: str, target_lang: str, source_hash: Optional[str] = None) -> bool:
+        """
+        Publica la traducción de un capítulo exactamente una vez.
+
+        El texto se escribe primero en un temporal propio del worker. Después, con la
+        base de datos bloqueada para escritura, se verifica que el token siga siendo el
+        del lease y se registra la traducción sin soltar el lease. Solo cuando ese COMMIT
+        tuvo éxito se mueve el temporal a translated/ y se elimina el lease (de nuevo
+        comprobando el token). Mientras tanto ningún otro worker puede reclamar el
+        capítulo, y si el proceso muere entre ambos pasos el registro queda sin archivo:
+        claim() lo trata como no traducido y el capítulo se vuelve a reclamar al expirar
+        el lease. Un archivo publicado nunca queda sin su registro.
+
+        Si la novela guarda los capítulos en la base de datos, el texto se escribe dentro
+        de la misma transacción que el registro y el lease se elimina en ella.
+
+        Returns:
+            bool: True si este worker finalizó el capítulo, False si perdió el lease
+        """
+        storage = get_chapter_storage(self.novel_path)
+        in_database = storage.backend == BACKEND_SQLITE
+        output_path = storage.local_path(TRANSLATED, lease.filename) if not in_database else None
+        temp_output_path = None
+
+        if not in_database:
+            temp_output_path = output_path.with_name(f".temp_{lease.token}_{lease.filename}")
+            try:
+                with open(temp_output_path, 'w', encoding='utf-8') as file:
+                    file.write(translated_text)
+            except OSError as e:
+                session_logger.log_error(f"Error escribiendo temporal de {lease.filename}: {e}")
+                return False
+
+        conn = self._connect()
+        try:
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                row = conn.execute(
+                    "SELECT token FROM chapter_leases WHERE filename = ?", (lease.filename,)
+                ).fetchone()
+                if not row or row[0] != lease.token:
+                    conn.execute("ROLLBACK")
+                    session_logger.log_warning(
+                        f"Lease perdido para {lease.filename}; se descarta la traducción de {self.worker_id}"
+                    )
+                    self._remove_temp(temp_output_path)
+                    return False
+
+                if in_database:
+                    SqliteChapterStorage.write_rows(conn, TRANSLATED, lease.filename, translated_text)
+                conn.execute('''
+                    INSERT OR REPLACE INTO translations
+                    (filename, source_lang, target_lang, status, source_hash)
+                    VALUES (?, ?, ?, 1, ?)
+                ''', (lease.filename, source_lang, target_lang, source_hash))
+                if in_database:
+                    conn.execute("DELETE FROM chapter_leases WHERE filename = ?", (lease.filename,))
+                conn.execute("COMMIT")
+            except sqlite3.Error as e:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                session_logger.log_error(f"Error finalizando {lease.filename}: {e}")
+                self._remove_temp(temp_output_path)
+                return False
+
+            if in_database:
+                return True
+
+            # El registro ya está confirmado y el lease sigue siendo nuestro: publicar el archivo
+            try:
+                temp_output_path.replace(output_path)
+            except OSError as e:
+                session_logger.log_error(f"Error publicando {lease.filename}: {e}")
+                self._remove_temp(temp_output_path)
+                # Sin archivo publicado, claim() trata el capítulo como no traducido
+                self.release(lease)
+                return False
+
+            try:
+                conn.execute(
+                    "DELETE FROM chapter_leases WHERE filename = ? AND token = ?",
+                    (lease.filename, lease.token)
+                )
+            except sqlite3.Error as e:
+                # El capítulo ya está publicado y registrado; el lease expirará solo
+                session_logger.log_warning(f"No se pudo liberar el lease de {lease.filename}: {e}")
+            return True
+        finally:
+            conn.close()
+
+    def active_leases(self) -> int:
+        """Cuenta los leases no expirados de todos los workers."""
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT COUNT(*) FROM chapter_leases WHERE expires_at > ?", (time.time(),)
+            ).fetchone()
+            return row[0] if row else 0
+        except sqlite3.Error:
+            return 0
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _remove_temp(path: Optional[Path]) -> None:
+        if path is None:
+            return
+        try:
+            path.unlink()
+        except OSError:
+            pass
+
+
+class LeaseRenewer(threading.Thread):
+    """Hilo que renueva periódicamente un lease mientras se traduce el capítulo."""
+
+    def __init__(self, queue: ChapterLeaseQueue, lease: ChapterLease, interval: Optional[float] = None):
+        super().__init__(daemon=True)
+        self.queue = queue
+        self.lease = lease
+        self.interval = interval or max(1.0, queue.lease_seconds / 3)
+        self.lost = False
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            if not self.queue.renew(self.lease):
+                self.lost = True
+                session_logger.log_warning(f"No se pudo renovar el lease de {self.lease.filename}")
+                return
+
+    def stop(self):
+        self._stop_event.set()
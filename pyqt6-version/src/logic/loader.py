@@ -2,7 +2,7 @@ from typing import List
 from PyQt6.QtCore import QObject, pyqtSignal
 import os
 from .database import TranslationDatabase
-from .status_manager import STATUS_UNPROCESSED, STATUS_TRANSLATED, get_status_text
+from .status_manager import STATUS_UNPROCESSED, STATUS_TRANSLATED, STATUS_STALE, get_status_text
 from .folder_structure import NovelFolderStructure
 from .functions import natural_sort_key
 
@@ -60,6 +60,10 @@ class FileLoader(QObject):
                 records = self.db.get_all_translated_files()
                 translated_in_db = set(r['filename'] for r in records)
 
+            # Traducciones cuyo original cambió desde que se tradujeron; el catálogo
+            # solo vuelve a leer los originales con mtime o tamaño distinto
+            stale = set(self.db.get_stale_chapters()) if self.db else set()
+
             # Para cada archivo, determinar su estado
             for filename in sorted_files:
                 if filename in translated_files:
@@ -72,6 +76,9 @@ class FileLoader(QObject):
                     # No traducido
                     status_code = STATUS_UNPROCESSED
 
+                if status_code == STATUS_TRANSLATED and filename in stale:
+                    status_code = STATUS_STALE
+
                 status = get_status_text(status_code, self.lang_manager)
                 txt_files.append({
                     'name': filename,
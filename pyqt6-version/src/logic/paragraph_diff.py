@@ -0,0 +1,151 @@
+from collections import Counter
+from difflib import SequenceMatcher
+from typing import List, Optional, Tuple
+
+from .edit_batch import EditBatch
+
+
+def paragraph_spans(text: str) -> List[Tuple[int, int]]:
+    """Posiciones (inicio, fin) de cada párrafo (línea no vacía) del texto."""
+    spans = []
+    position = 0
+    for line in text.split('\n'):
+        if line.strip():
+            spans.append((position, position + len(line)))
+        position += len(line) + 1
+    return spans
+
+
+def _paragraph_gap(text: str, spans: List[Tuple[int, int]]) -> Optional[str]:
+    """Separador más frecuente entre párrafos consecutivos (p. ej. "\\n" o "\\n\\n"), o None si hay un solo párrafo."""
+    gaps = Counter(text[spans[i][1]:spans[i + 1][0]] for i in range(len(spans) - 1))
+    return gaps.most_common(1)[0][0] if gaps else None
+
+
+class ParagraphChange:
+    """
+    Tramo de párrafos del original que cambió.
+
+    Attributes:
+        source (str): Párrafos nuevos del original a traducir (vacío si se eliminaron)
+        start (int): Inicio del tramo a sustituir en la traducción anterior
+        end (int): Fin del tramo a sustituir (igual a start si es una inserción)
+        prefix (str): Separador que va antes del texto traducido
+        suffix (str): Separador que va después del texto traducido
+    """
+
+    def __init__(self, source: str, start: int, end: int, prefix: str = "", suffix: str = ""):
+        self.source = source
+        self.start = start
+        self.end = end
+        self.prefix = prefix
+        self.suffix = suffix
+
+
+class IncrementalPlan:
+    """
+    Cambios necesarios para llevar una traducción al original actual.
+
+    Los párrafos que no cambiaron conservan su traducción; solo los tramos de
+    `changes` con texto en `source` necesitan traducirse.
+    """
+
+    def __init__(self, previous_translation: str, changes: List[ParagraphChange],
+                 gap: str, changed_ratio: float):
+        self.previous_translation = previous_translation
+        self.changes = changes
+        self.gap = gap
+        self.changed_ratio = changed_ratio
+
+    @property
+    def sources(self) -> List[str]:
+        """Textos del original a traducir, en orden"""
+        return [change.source for change in self.changes if change.source]
+
+    def apply(self, translations: List[str]) -> str:
+        """
+        Inserta las traducciones de los tramos cambiados en la traducción anterior.
+
+        Args:
+            translations (List[str]): Traducción de cada texto de `sources`, en el mismo orden
+
+        Returns:
+            str: Traducción actualizada
+        """
+        pending = iter(translations)
+        batch = EditBatch(self.previous_translation)
+        for index, change in enumerate(self.changes):
+            if not change.source:
+                batch.add(change.start, change.end, "", f"delete-{index}")
+                continue
+            # Mantener la separación entre párrafos de la traducción existente
+            paragraphs = [line.strip() for line in next(pending).split('\n') if line.strip()]
+            text = change.prefix + self.gap.join(paragraphs) + change.suffix
+            batch.add(change.start, change.end, text, f"paragraphs-{index}")
+        return batch.apply()
+
+
+def plan_incremental_update(previous_source: str, previous_translation: str,
+                            current_source: str) -> Optional[IncrementalPlan]:
+    """
+    Compara el original traducido con el actual párrafo por párrafo.
+
+    La traducción debe conservar un párrafo por cada párrafo del original (la misma
+    suposición que el refinamiento por segmentos): así el párrafo i de la traducción
+    anterior corresponde al párrafo i del original anterior y se puede reutilizar.
+
+    Args:
+        previous_source (str): Original con el que se hizo la traducción
+        previous_translation (str): Traducción existente
+        current_source (str): Original actual
+
+    Returns:
+        Optional[IncrementalPlan]: Plan de cambios, o None si los párrafos de la
+        traducción no se corresponden con los del original anterior
+    """
+    previous_source = previous_source.replace('\r\n', '\n')
+    previous_translation = previous_translation.replace('\r\n', '\n')
+    current_source = current_source.replace('\r\n', '\n')
+
+    old_spans = paragraph_spans(previous_source)
+    translated_spans = paragraph_spans(previous_translation)
+    new_spans = paragraph_spans(current_source)
+    if not old_spans or len(old_spans) != len(translated_spans):
+        return None
+
+    old_paragraphs = [previous_source[start:end].strip() for start, end in old_spans]
+    new_paragraphs = [current_source[start:end].strip() for start, end in new_spans]
+    # Una traducción de un solo párrafo no tiene separadores: se toma el del original
+    gap = (_paragraph_gap(previous_translation, translated_spans)
+           or _paragraph_gap(current_source, new_spans)
+           or _paragraph_gap(previous_source, old_spans)
+           or '\n')
+
+    changes = []
+    changed_chars = 0
+    matcher = SequenceMatcher(None, old_paragraphs, new_paragraphs, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            continue
+        source = current_source[new_spans[j1][0]:new_spans[j2 - 1][1]] if j2 > j1 else ""
+        changed_chars += len(source)
+        if tag == 'replace':
+            changes.append(ParagraphChange(source, translated_spans[i1][0], translated_spans[i2 - 1][1]))
+        elif tag == 'insert':
+            if i1 < len(translated_spans):
+                position = translated_spans[i1][0]
+                changes.append(ParagraphChange(source, position, position, suffix=gap))
+            else:
+                position = translated_spans[-1][1]
+                changes.append(ParagraphChange(source, position, position, prefix=gap))
+        elif i2 < len(translated_spans):
+            # Eliminación: se quita el tramo junto con el separador que lo sigue
+            changes.append(ParagraphChange("", translated_spans[i1][0], translated_spans[i2][0]))
+        elif i1 > 0:
+            changes.append(ParagraphChange("", translated_spans[i1 - 1][1], translated_spans[i2 - 1][1]))
+        else:
+            changes.append(ParagraphChange("", translated_spans[0][0], translated_spans[-1][1]))
+
+    total_chars = sum(end - start for start, end in new_spans)
+    changed_ratio = changed_chars / total_chars if total_chars else 1.0
+    return IncrementalPlan(previous_translation, changes, gap, changed_ratio)
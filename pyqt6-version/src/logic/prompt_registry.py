@@ -0,0 +1,228 @@
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from .database import TranslationDatabase
+from .folder_structure import NovelFolderStructure
+
+PROMPTS_DIR = Path(__file__).parent.parent / 'config' / 'prompts'
+BASE_PROMPTS_DIR_NAME = 'prompts-base'
+
+# Prompts que pueden personalizarse por novela en la tabla custom_prompts
+CUSTOMIZABLE_PROMPTS = ('translation', 'refine', 'check')
+
+PLACEHOLDER_PATTERN = re.compile(r"\{(source_lang|target_lang|terminology_reference)\}")
+TERMINOLOGY_SECTION_PATTERN = re.compile(r"<terminology_reference>.*?</terminology_reference>", re.DOTALL)
+
+
+def format_terms(custom_terms: str) -> str:
+    """Formatea el glosario como lista, una entrada por línea con prefijo '- '."""
+    lines = [
+        line.strip() if line.strip().startswith('- ') else f'- {line.strip()}'
+        for line in custom_terms.strip().split('\n')
+        if line.strip()
+    ]
+    return '\n'.join(lines)
+
+
+class CompiledPrompt:
+    """
+    Plantilla de prompt preparada para un par de idiomas.
+
+    Los idiomas se sustituyen una sola vez al compilar; renderizar solo inserta el
+    glosario en las posiciones ya localizadas de {terminology_reference}.
+    """
+
+    def __init__(self, template: str, source_lang: str, target_lang: str):
+        self.template = template
+        self._with_terms = self._split(template, source_lang, target_lang)
+        # Variante sin glosario: se elimina toda la sección <terminology_reference>
+        self._without_terms = ''.join(
+            self._split(TERMINOLOGY_SECTION_PATTERN.sub('', template), source_lang, target_lang)
+        )
+
+    @staticmethod
+    def _split(template: str, source_lang: str, target_lang: str) -> list:
+        """Divide la plantilla en fragmentos fijos separados por los huecos del glosario."""
+        values = {"source_lang": source_lang, "target_lang": target_lang}
+        parts = ['']
+        position = 0
+        for match in PLACEHOLDER_PATTERN.finditer(template):
+            parts[-1] += template[position:match.start()]
+            name = match.group(1)
+            if name == "terminology_reference":
+                parts.append('')
+            else:
+                parts[-1] += values[name]
+            position = match.end()
+        parts[-1] += template[position:]
+        return parts
+
+    def render(self, custom_terms: str = "") -> str:
+        """
+        Genera el prompt final.
+
+        Args:
+            custom_terms (str): Glosario a insertar; si está vacío se elimina la sección
+
+        Returns:
+            str: Prompt listo para enviar
+        """
+        if not custom_terms.strip():
+            return self._without_terms
+        return format_terms(custom_terms).join(self._with_terms)
+
+
+class PromptRegistry:
+    """
+    Registro en memoria de los prompts, organizado en capas.
+
+    Orden de búsqueda:
+    1. Cambios de la sesión (diálogo de configuración avanzada).
+    2. Prompts personalizados de la novela (tabla custom_prompts).
+    3. Directorio del par de idiomas en la configuración.
+    4. Directorio prompts-base.
+
+    Los archivos se vuelven a leer solo si cambia su fecha de modificación, y los
+    prompts de la base de datos solo si cambia el archivo de la base de datos.
+    """
+
+    def __init__(self, prompts_dir: Path = PROMPTS_DIR):
+        self.prompts_dir = Path(prompts_dir)
+        self._lock = threading.RLock()
+        self._session_overrides: Dict[Tuple[str, str, str], str] = {}
+        self._file_cache: Dict[Path, Tuple[int, Optional[str]]] = {}
+        self._compiled: Dict[Tuple[str, str, str], CompiledPrompt] = {}
+        self._db: Optional[TranslationDatabase] = None
+        self._db_signature = None
+        self._db_prompts: Dict[Tuple[str, str, str], str] = {}
+
+    def set_novel_directory(self, directory: Optional[str]) -> None:
+        """
+        Asocia el registro a una novela (o a ninguna con None).
+
+        Los cambios de sesión pertenecen a la novela anterior y se descartan.
+        """
+        with self._lock:
+            self._db = TranslationDatabase(directory) if directory else None
+            self._db_signature = None
+            self._db_prompts.clear()
+            self._session_overrides.clear()
+
+    def set_session_override(self, source_lang: str, target_lang: str, prompt_name: str, content: str) -> None:
+        """Sustituye un prompt solo durante la sesión actual"""
+        with self._lock:
+            self._session_overrides[(source_lang, target_lang, prompt_name)] = content
+
+    def clear_session_override(self, source_lang: str, target_lang: str, prompt_name: str) -> None:
+        """Elimina el cambio de sesión de un prompt, si existe"""
+        with self._lock:
+            self._session_overrides.pop((source_lang, target_lang, prompt_name), None)
+
+    def invalidate(self) -> None:
+        """Descarta todo lo cacheado; la siguiente consulta vuelve a leer archivos y base de datos"""
+        with self._lock:
+            self._file_cache.clear()
+            self._compiled.clear()
+            self._db_signature = None
+            self._db_prompts.clear()
+
+    def get_template(self, prompt_name: str, source_lang: str, target_lang: str) -> str:
+        """
+        Retorna la plantilla sin procesar de la capa con mayor prioridad.
+
+        Args:
+            prompt_name (str): Nombre del archivo de prompt (ej: "translation.txt")
+            source_lang (str): Código del idioma de origen
+            target_lang (str): Código del idioma de destino
+
+        Returns:
+            str: Contenido del prompt
+
+        Raises:
+            FileNotFoundError: Si el prompt no existe en ninguna capa
+        """
+        with self._lock:
+            key = (source_lang, target_lang, prompt_name)
+            if key in self._session_overrides:
+                return self._session_overrides[key]
+
+            content = self._get_db_prompt(source_lang, target_lang, prompt_name)
+            if content:
+                return content
+
+            for directory in (f"{source_lang}_{target_lang}", BASE_PROMPTS_DIR_NAME):
+                content = self._read_file(self.prompts_dir / directory / prompt_name)
+                if content is not None:
+                    return content
+
+        raise FileNotFoundError(f"No se pudo encontrar el prompt '{prompt_name}'")
+
+    def get_compiled(self, prompt_name: str, source_lang: str, target_lang: str) -> CompiledPrompt:
+        """Retorna la plantilla compilada, reutilizándola mientras su contenido no cambie"""
+        template = self.get_template(prompt_name, source_lang, target_lang)
+        key = (source_lang, target_lang, prompt_name)
+        with self._lock:
+            compiled = self._compiled.get(key)
+            if compiled is None or compiled.template != template:
+                compiled = CompiledPrompt(template, source_lang, target_lang)
+                self._compiled[key] = compiled
+            return compiled
+
+    def render(self, prompt_name: str, source_lang: str, target_lang: str, custom_terms: str = "") -> str:
+        """Atajo para obtener el prompt final con idiomas y glosario"""
+        return self.get_compiled(prompt_name, source_lang, target_lang).render(custom_terms)
+
+    def _read_file(self, path: Path) -> Optional[str]:
+        """Lee un archivo de prompt usando la caché mientras su mtime no cambie"""
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            self._file_cache.pop(path, None)
+            return None
+
+        cached = self._file_cache.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                content = file.read()
+        except OSError:
+            return None
+        self._file_cache[path] = (mtime, content)
+        return content
+
+    def _current_db_signature(self) -> tuple:
+        """Fechas de modificación de la base de datos y de su journal WAL"""
+        db_path = NovelFolderStructure.get_db_path(self._db.directory)
+        signature = []
+        for path in (db_path, db_path.with_name(db_path.name + '-wal')):
+            try:
+                stat = os.stat(path)
+                signature.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                signature.append(None)
+        return tuple(signature)
+
+    def _get_db_prompt(self, source_lang: str, target_lang: str, prompt_name: str) -> str:
+        """Retorna el prompt personalizado de la novela, o "" si no hay"""
+        prompt_type = prompt_name[:-4] if prompt_name.endswith('.txt') else prompt_name
+        if self._db is None or prompt_type not in CUSTOMIZABLE_PROMPTS:
+            return ""
+
+        signature = self._current_db_signature()
+        if signature != self._db_signature:
+            self._db_prompts.clear()
+            self._db_signature = signature
+
+        key = (source_lang, target_lang, prompt_type)
+        if key not in self._db_prompts:
+            self._db_prompts[key] = self._db.get_custom_prompt(source_lang, target_lang, prompt_type) or ""
+        return self._db_prompts[key]
+
+
+# Registro compartido por la interfaz, los managers y el worker
+prompt_registry = PromptRegistry()
@@ -0,0 +1,177 @@
+import re
+from typing import Dict, List, Mapping, Optional
+
+PRECHECK_FAIL = "fail"
+PRECHECK_PASS = "pass"
+PRECHECK_STRONG_PASS = "strong_pass"
+
+DEFAULT_PRECHECK_CONFIG = {
+    "enabled": False,
+    "min_length_ratio": 0.4,
+    "max_length_ratio": 3.0,
+    "max_paragraph_diff_ratio": 0.25,
+    "max_untranslated_ratio": 0.2,
+    "strong_length_ratio": [0.6, 1.8],
+    "skip_llm_check_on_strong_pass": False,
+}
+
+# Restos del razonamiento de modelos que deberían haberse eliminado
+THINK_PATTERN = re.compile(r"</?think>|<thinking>|</thinking>", re.IGNORECASE)
+
+# Escrituras sin espacios: cada carácter cuenta como una unidad (≈ una palabra)
+_UNSPACED_CHARS = "぀-ヿ㐀-䶿一-鿿豈-﫿"
+UNITS_PATTERN = re.compile(rf"[{_UNSPACED_CHARS}]|[^\s{_UNSPACED_CHARS}]+")
+
+# Párrafos más cortos que esto (números, nombres, "***") no cuentan como texto sin traducir
+MIN_UNTRANSLATED_PARAGRAPH_CHARS = 20
+
+
+def _script_of(char: str) -> Optional[str]:
+    """Escritura de una letra, o None si no es una letra."""
+    if not char.isalpha():
+        return None
+    code = ord(char)
+    if 0x4E00 <= code <= 0x9FFF or 0x3400 <= code <= 0x4DBF or 0xF900 <= code <= 0xFAFF:
+        return "han"
+    if 0x3040 <= code <= 0x30FF:
+        return "kana"
+    if 0xAC00 <= code <= 0xD7AF or 0x1100 <= code <= 0x11FF:
+        return "hangul"
+    if 0x0400 <= code <= 0x04FF:
+        return "cyrillic"
+    if code < 0x0250:
+        return "latin"
+    return "other"
+
+
+def _script_counts(text: str) -> Dict[str, int]:
+    counts: Dict[str, int] = {}
+    for char in text:
+        script = _script_of(char)
+        if script:
+            counts[script] = counts.get(script, 0) + 1
+    return counts
+
+
+def _paragraphs(text: str) -> List[str]:
+    return [line.strip() for line in text.split('\n') if line.strip()]
+
+
+def _normalize(paragraph: str) -> str:
+    return ' '.join(paragraph.lower().split())
+
+
+class PrecheckResult:
+    """
+    Resultado de la comprobación local de una traducción.
+
+    Attributes:
+        verdict (str): PRECHECK_FAIL, PRECHECK_PASS o PRECHECK_STRONG_PASS
+        issues (List[str]): Problemas encontrados (vacío si no hay)
+        metrics (Dict): Valores medidos, para el registro de sesión
+    """
+
+    def __init__(self, verdict: str, issues: List[str], metrics: Dict):
+        self.verdict = verdict
+        self.issues = issues
+        self.metrics = metrics
+
+    @property
+    def failed(self) -> bool:
+        return self.verdict == PRECHECK_FAIL
+
+    @property
+    def strong(self) -> bool:
+        return self.verdict == PRECHECK_STRONG_PASS
+
+    def summary(self) -> str:
+        metrics = ", ".join(f"{key}={value}" for key, value in self.metrics.items())
+        if self.issues:
+            return f"{'; '.join(self.issues)} ({metrics})"
+        return metrics
+
+
+def precheck_translation(source_text: str, translated_text: str,
+                         config: Optional[Mapping] = None) -> PrecheckResult:
+    """
+    Comprueba con heurísticas baratas si una traducción es claramente defectuosa.
+
+    Detecta restos de <think>, longitudes desproporcionadas, párrafos perdidos o
+    añadidos y texto que quedó en el idioma de origen. No sustituye a la comprobación
+    con el modelo: solo decide si se puede ahorrar.
+
+    Args:
+        source_text (str): Texto original
+        translated_text (str): Traducción a comprobar
+        config (Optional[Mapping]): Umbrales (sección "precheck" de config.json)
+
+    Returns:
+        PrecheckResult: Veredicto, problemas y métricas
+    """
+    settings = dict(DEFAULT_PRECHECK_CONFIG)
+    settings.update(config or {})
+    issues = []
+    metrics = {}
+
+    if THINK_PATTERN.search(translated_text):
+        issues.append("contiene etiquetas <think>")
+
+    # Longitud en unidades comparables entre escrituras con y sin espacios
+    source_units = len(UNITS_PATTERN.findall(source_text))
+    translated_units = len(UNITS_PATTERN.findall(translated_text))
+    length_ratio = translated_units / source_units if source_units else 1.0
+    metrics["length_ratio"] = round(length_ratio, 2)
+    if source_units and not settings["min_length_ratio"] <= length_ratio <= settings["max_length_ratio"]:
+        issues.append(f"longitud desproporcionada ({length_ratio:.2f})")
+
+    source_paragraphs = _paragraphs(source_text)
+    translated_paragraphs = _paragraphs(translated_text)
+    metrics["paragraphs"] = f"{len(translated_paragraphs)}/{len(source_paragraphs)}"
+    paragraph_diff = abs(len(translated_paragraphs) - len(source_paragraphs)) / max(1, len(source_paragraphs))
+    if paragraph_diff > settings["max_paragraph_diff_ratio"]:
+        issues.append(f"párrafos no coinciden ({metrics['paragraphs']})")
+
+    untranslated_ratio = _untranslated_ratio(source_text, translated_text,
+                                             source_paragraphs, translated_paragraphs)
+    metrics["untranslated"] = round(untranslated_ratio, 2)
+    if untranslated_ratio > settings["max_untranslated_ratio"]:
+        issues.append(f"texto sin traducir ({untranslated_ratio:.0%})")
+
+    if issues:
+        return PrecheckResult(PRECHECK_FAIL, issues, metrics)
+
+    strong_min, strong_max = settings["strong_length_ratio"]
+    if (len(translated_paragraphs) == len(source_paragraphs)
+            and untranslated_ratio == 0
+            and strong_min <= length_ratio <= strong_max):
+        return PrecheckResult(PRECHECK_STRONG_PASS, issues, metrics)
+    return PrecheckResult(PRECHECK_PASS, issues, metrics)
+
+
+def _untranslated_ratio(source_text: str, translated_text: str,
+                        source_paragraphs: List[str], translated_paragraphs: List[str]) -> float:
+    """
+    Fracción de la traducción que sigue en el idioma de origen.
+
+    Si original y traducción usan escrituras distintas (p. ej. chino → español) se
+    cuentan las letras de la escritura del original. Si comparten escritura, se
+    cuentan los párrafos copiados sin cambios del original.
+    """
+    source_scripts = _script_counts(source_text)
+    translated_scripts = _script_counts(translated_text)
+    total_letters = sum(translated_scripts.values())
+    if not source_scripts or not total_letters:
+        return 0.0
+
+    source_script = max(source_scripts, key=source_scripts.get)
+    translated_script = max(translated_scripts, key=translated_scripts.get)
+    # El japonés mezcla kanji y kana: ambos cuentan como escritura de origen
+    source_family = {"han", "kana"} if source_script in ("han", "kana") else {source_script}
+    if translated_script not in source_family:
+        leftover = sum(translated_scripts.get(script, 0) for script in source_family)
+        return leftover / total_letters
+
+    source_set = {_normalize(p) for p in source_paragraphs if len(p) >= MIN_UNTRANSLATED_PARAGRAPH_CHARS}
+    copied = sum(len(p) for p in translated_paragraphs
+                 if len(p) >= MIN_UNTRANSLATED_PARAGRAPH_CHARS and _normalize(p) in source_set)
+    return copied / max(1, sum(len(p) for p in translated_paragraphs))
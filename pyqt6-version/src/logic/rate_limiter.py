@@ -0,0 +1,104 @@
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from .session_logger import session_logger
+
+# Intervalo máximo de espera entre comprobaciones de cancelación
+_WAIT_STEP_SECONDS = 0.25
+
+
+class RateLimiter:
+    """
+    Cubeta de tokens que limita las peticiones por minuto.
+
+    Permite ráfagas de hasta `burst` peticiones y después reparte las siguientes a
+    ritmo constante. Es segura entre hilos: varios capítulos en paralelo comparten
+    la misma cubeta de su proveedor.
+    """
+
+    def __init__(self, requests_per_minute: float, burst: Optional[int] = None):
+        """
+        Args:
+            requests_per_minute (float): Peticiones permitidas por minuto
+            burst (Optional[int]): Peticiones que pueden salir seguidas (por defecto 1)
+        """
+        self.rate = requests_per_minute / 60.0
+        self.capacity = max(1, burst or 1)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Toma un token si hay; si no, retorna los segundos que faltan para el siguiente."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self, stop_callback: Optional[Callable[[], bool]] = None) -> bool:
+        """
+        Espera hasta poder enviar una petición.
+
+        Returns:
+            bool: False si se solicitó detener el proceso durante la espera
+        """
+        while True:
+            wait = self._reserve()
+            if wait <= 0:
+                return True
+            if stop_callback and stop_callback():
+                return False
+            time.sleep(min(wait, _WAIT_STEP_SECONDS))
+
+
+class ProviderRateLimits:
+    """Cubetas por proveedor configuradas desde la sección "rate_limits" de config.json"""
+
+    def __init__(self):
+        self._limiters: Dict[str, RateLimiter] = {}
+        self._config: Dict = {}
+        self._lock = threading.Lock()
+
+    def configure(self, config: Optional[Dict]) -> None:
+        """
+        Aplica la configuración de límites.
+
+        Args:
+            config (Optional[Dict]): {"default_requests_per_minute": 0,
+                "requests_per_minute": {"gemini": 15}, "burst": 1}; 0 o ausente = sin límite
+        """
+        with self._lock:
+            self._config = dict(config or {})
+            self._limiters.clear()
+
+    def _get_limiter(self, provider: str) -> Optional[RateLimiter]:
+        with self._lock:
+            if provider not in self._limiters:
+                per_provider = self._config.get("requests_per_minute", {})
+                rpm = per_provider.get(provider, self._config.get("default_requests_per_minute", 0))
+                self._limiters[provider] = RateLimiter(rpm, self._config.get("burst", 1)) if rpm else None
+            return self._limiters[provider]
+
+    def acquire(self, provider: str, stop_callback: Optional[Callable[[], bool]] = None) -> bool:
+        """
+        Espera el turno del proveedor. Sin límite configurado retorna de inmediato.
+
+        Returns:
+            bool: False si se solicitó detener el proceso durante la espera
+        """
+        limiter = self._get_limiter(provider)
+        if limiter is None:
+            return True
+        if not limiter.acquire(stop_callback):
+            session_logger.log_info(f"Espera de límite de peticiones cancelada ({provider})")
+            return False
+        return True
+
+
+# Límites compartidos por todos los translators del proceso
+rate_limits = ProviderRateLimits()
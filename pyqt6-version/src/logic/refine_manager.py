@@ -2,6 +2,8 @@ from typing import List, Dict, Optional, Callable
 from PyQt6.QtCore import QObject, pyqtSignal, QThread
 import os
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from .database import TranslationDatabase
 from .translator import TranslatorLogic
 from .session_logger import session_logger
@@ -21,7 +23,8 @@ class RefineWorker(QObject):
                  model: str, custom_terms: str = "",
                  status_callback: Optional[Callable[[str, str], None]] = None,
                  lang_manager=None, temp_api_keys: dict = None,
-                 timeout: int = 120):
+                 timeout: int = 120, refine_config: Optional[Dict] = None,
+                 db: Optional[TranslationDatabase] = None):
         super().__init__()
         self.files_to_refine = files_to_refine
         self.working_directory = working_directory
@@ -36,7 +39,11 @@ class RefineWorker(QObject):
         self.lang_manager = lang_manager
         self.temp_api_keys = temp_api_keys or {}
         self.timeout = timeout
+        self.refine_config = refine_config or {}
+        self.db = db
         self._stop_requested = False
+        self._successful_refines = 0
+        self._counter_lock = threading.Lock()
 
     def _get_status_string(self, key, default_text=""):
         """Get a localized status string from the language manager."""
@@ -84,42 +91,33 @@ class RefineWorker(QObject):
                 return
 
             total_files = len(self.files_to_refine)
-            successful_refines = 0
-
-            for i, file_info in enumerate(self.files_to_refine, 1):
-                if self._stop_requested:
-                    break
-
-                filename = file_info['name']
-                self.progress_updated.emit(self._get_status_string("refine_manager.progress.refining_chapter", "Refinando capítulo {index} de {total}: {filename}").format(
-                    index=i, total=total_files, filename=filename))
-
-                # Actualizar estado a "Procesando"
-                if self.status_callback:
-                    status_text = get_status_text(STATUS_PROCESSING, self.lang_manager)
-                    self.status_callback(filename, status_text)
-
-                # Registrar inicio de refinamiento
-                session_logger.log_refine_start(filename, self.source_lang, self.target_lang)
-
-                # Refinar el archivo usando el prompt alternativo
-                success = self._refine_single_file(filename, prompt_name="refine_alt.txt")
-
-                if success:
-                    successful_refines += 1
-                    session_logger.log_refine_complete(filename, True)
-                    self.refine_completed.emit(filename, True)
-                else:
-                    session_logger.log_refine_complete(filename, False)
-                    self.refine_completed.emit(filename, False)
-
-                # Esperar antes del siguiente refinamiento si no es el último archivo
-                if i < total_files and not self._stop_requested:
-                    time.sleep(5)
+            self._successful_refines = 0
+            max_parallel = max(1, int(self.refine_config.get("max_parallel_chapters", 1)))
+
+            if max_parallel == 1:
+                for i, file_info in enumerate(self.files_to_refine, 1):
+                    if self._stop_requested:
+                        break
+
+                    self._process_chapter(i, total_files, file_info)
+
+                    # Esperar antes del siguiente refinamiento si no es el último archivo
+                    if i < total_files and not self._stop_requested:
+                        time.sleep(5)
+            else:
+                # Como mucho max_parallel capítulos en vuelo; el ritmo de peticiones lo
+                # controla el límite por proveedor (rate_limiter)
+                with ThreadPoolExecutor(max_workers=max_parallel) as executor:
+                    futures = [
+                        executor.submit(self._process_chapter, i, total_files, file_info)
+                        for i, file_info in enumerate(self.files_to_refine, 1)
+                    ]
+                    for future in as_completed(futures):
+                        future.result()
 
             if not self._stop_requested:
                 final_message = self._get_status_string("refine_manager.progress.completed", "Refinamiento completado. {successful} de {total} archivos refinados exitosamente.").format(
-                    successful=successful_refines, total=total_files)
+                    successful=self._successful_refines, total=total_files)
                 self.progress_updated.emit(final_message)
                 self.all_refines_completed.emit()
 
@@ -128,48 +126,63 @@ class RefineWorker(QObject):
         finally:
             self.all_refines_completed.emit()
 
+    def _process_chapter(self, index: int, total_files: int, file_info: Dict[str, str]) -> bool:
+        """Refina un capítulo y notifica el resultado. Puede ejecutarse en paralelo."""
+        if self._stop_requested:
+            return False
+
+        filename = file_info['name']
+        self.progress_updated.emit(self._get_status_string("refine_manager.progress.refining_chapter", "Refinando capítulo {index} de {total}: {filename}").format(
+            index=index, total=total_files, filename=filename))
+
+        # Actualizar estado a "Procesando"
+        if self.status_callback:
+            status_text = get_status_text(STATUS_PROCESSING, self.lang_manager)
+            self.status_callback(filename, status_text)
+
+        # Registrar inicio de refinamiento
+        session_logger.log_refine_start(filename, self.source_lang, self.target_lang)
+
+        # Refinar el archivo usando el prompt alternativo
+        success = self._refine_single_file(filename, prompt_name="refine_alt.txt")
+
+        if success:
+            with self._counter_lock:
+                self._successful_refines += 1
+        session_logger.log_refine_complete(filename, success)
+        self.refine_completed.emit(filename, success)
+        return success
+
     def _refine_single_file(self, filename: str, prompt_name: str = "refine.txt") -> bool:
         try:
             # Asegurar que la estructura de carpetas exista
             NovelFolderStructure.ensure_structure(self.working_directory)
 
-            # Rutas usando la nueva estructura
-            originals_path = NovelFolderStructure.get_originals_path(self.working_directory)
-            translated_path = NovelFolderStructure.get_translated_path(self.working_directory)
-
-            source_path = originals_path / filename
-            translated_path_file = translated_path / filename
-            temp_output_path = translated_path / f".temp_refined_{filename}"
+            # Capítulos en carpetas o en la base de datos, según la novela
+            storage = NovelFolderStructure.get_storage(self.working_directory)
 
             # Verificar que el archivo original existe
-            if not source_path.exists():
-                error_msg = f"Archivo original no encontrado: {source_path}"
+            if not storage.exists("original", filename):
+                error_msg = f"Archivo original no encontrado: {filename}"
                 session_logger.log_error(error_msg)
                 self.error_occurred.emit(error_msg)
                 return False
 
             # Verificar que el archivo traducido existe
-            if not translated_path_file.exists():
-                error_msg = f"Archivo traducido no encontrado: {translated_path_file}"
+            if not storage.exists("translated", filename):
+                error_msg = f"Archivo traducido no encontrado: {filename}"
                 session_logger.log_error(error_msg)
                 self.error_occurred.emit(error_msg)
                 return False
 
-            # Leer archivo original
-            with open(source_path, 'r', encoding='utf-8') as file:
-                source_text = file.read()
-
-            # Leer archivo traducido
-            with open(translated_path_file, 'r', encoding='utf-8') as file:
-                translated_text = file.read()
+            source_text = storage.read("original", filename)
+            translated_text = storage.read("translated", filename)
 
             # Refinar la traducción
             # Detectar automáticamente si el modelo soporta tools
             use_tools = self._check_model_supports_tools()
             
-            refined_text = self.translator._refine_translation(
-                source_text=source_text,
-                translated_text=translated_text,
+            refine_kwargs = dict(
                 source_lang=self.source_lang,
                 target_lang=self.target_lang,
                 main_api_key=self.api_key,
@@ -180,9 +193,27 @@ class RefineWorker(QObject):
                 timeout=self.timeout,
                 stop_callback=self.is_stop_requested,
                 prompt_name=prompt_name,
-                use_tools=use_tools
+                use_tools=use_tools,
+                paragraph_ids=self.refine_config.get("paragraph_ids", False)
             )
 
+            # Capítulos largos: refinar por segmentos alineados en peticiones pequeñas
+            segmentation = self.refine_config.get("segmentation", {})
+            if segmentation.get("enabled", False) and len(source_text) > segmentation.get("threshold", 20000):
+                refined_text = self.translator._refine_translation_segmented(
+                    source_text,
+                    translated_text,
+                    segment_size=segmentation.get("segment_size", 10000),
+                    max_parallel=segmentation.get("max_parallel_segments", 1),
+                    **refine_kwargs
+                )
+            else:
+                refined_text = self.translator._refine_translation(
+                    source_text=source_text,
+                    translated_text=translated_text,
+                    **refine_kwargs
+                )
+
             if not refined_text:
                 error_msg = f"Error al refinar {filename}: No se obtuvo refinamiento"
                 session_logger.log_error(error_msg)
@@ -194,22 +225,12 @@ class RefineWorker(QObject):
                 session_logger.log_info(f"Guardado cancelado para {filename} por solicitud del usuario")
                 return False
 
-            # Guardar primero en archivo temporal
-            with open(temp_output_path, 'w', encoding='utf-8') as file:
-                file.write(refined_text)
-
-            # Verificar nuevamente antes de mover el archivo final
-            if self.is_stop_requested():
-                session_logger.log_info(f"Guardado final cancelado para {filename} por solicitud del usuario")
-                # Limpiar archivo temporal
-                try:
-                    temp_output_path.unlink()
-                except:
-                    pass
-                return False
+            # Escritura atómica: el capítulo anterior se reemplaza completo o no se toca
+            storage.write("translated", filename, refined_text)
 
-            # Si todo salió bien, mover el archivo temporal al destino final
-            temp_output_path.replace(translated_path_file)
+            # Registrar el refinamiento en la base de datos
+            if self.db:
+                self.db.add_refine_record(filename, self.source_lang, self.target_lang)
 
             return True
 
@@ -217,12 +238,6 @@ class RefineWorker(QObject):
             error_msg = f"Error al refinar {filename}: {str(e)}"
             session_logger.log_error(error_msg)
             self.error_occurred.emit(error_msg)
-            # Limpiar archivo temporal si existe
-            if temp_output_path.exists():
-                try:
-                    temp_output_path.unlink()
-                except:
-                    pass
             return False
 
 class RefineManager(QObject):
@@ -247,9 +262,9 @@ class RefineManager(QObject):
         """Set the language manager for status translations."""
         self.lang_manager = lang_manager
 
-    def update_temp_prompts_path(self, path):
-        """Actualiza la ruta de prompts temporales en el translator"""
-        self.translator.update_temp_prompts_path(path)
+    def set_request_engine(self, engine):
+        """Comparte el motor asíncrono de peticiones con el translator"""
+        self.translator.set_request_engine(engine)
 
     def _get_status_string(self, key, default_text=""):
         """Get a localized status string from the language manager."""
@@ -275,7 +290,7 @@ class RefineManager(QObject):
                      source_lang: str, target_lang: str, api_key: str,
                      status_callback: Optional[Callable[[str, str], None]] = None,
                      custom_terms: str = "", temp_api_keys: dict = None,
-                     timeout: int = 120) -> None:
+                     timeout: int = 120, refine_config: Optional[Dict] = None) -> None:
         """
         Inicia el refinamiento de archivos.
 
@@ -288,6 +303,7 @@ class RefineManager(QObject):
             custom_terms: Términos personalizados para el refinamiento
             temp_api_keys: Diccionario de API keys temporales
             timeout: Timeout para las llamadas API
+            refine_config: Opciones del modo de refinamiento (paragraph_ids, max_parallel_chapters, segmentation)
         """
         if not self.working_directory:
             self.error_occurred.emit(self.lang_manager.get_string("refine_manager.error.no_working_directory", "No se ha inicializado el directorio de trabajo"))
@@ -308,7 +324,9 @@ class RefineManager(QObject):
             status_callback,
             self.lang_manager,
             temp_api_keys,
-            timeout
+            timeout,
+            refine_config,
+            self.db
         )
 
         # Mover el worker al thread
@@ -99,3 +99,141 @@ def get_refine_tools():
         list: Lista de definiciones de tools para function calling
     """
     return REFINE_TOOLS
+
+
+# Herramientas para el modo de refinamiento por párrafos.
+# El texto traducido se envía con un identificador estable por párrafo ([P1], [P2]...)
+# y cada cambio indica el párrafo, de modo que se localiza sin buscar en todo el documento.
+
+PARAGRAPH_REFINE_TOOLS = [
+    {
+        "type": "function",
+        "function": {
+            "name": "replace_text",
+            "description": "Replaces a fragment inside one paragraph of the translated document with a corrected version. Use this to fix translation errors, improve phrasing, or correct terminology.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "paragraph_id": {
+                        "type": "string",
+                        "description": "Identifier of the paragraph that contains the fragment, e.g. \"P12\""
+                    },
+                    "original": {
+                        "type": "string",
+                        "description": "The exact text fragment inside that paragraph to replace (without the [P12] label)"
+                    },
+                    "replacement": {
+                        "type": "string",
+                        "description": "The corrected text that will replace the original"
+                    }
+                },
+                "required": ["paragraph_id", "original", "replacement"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "delete_text",
+            "description": "Removes a fragment from one paragraph of the translated document. Use this to remove redundant, hallucinated, or incorrectly added content.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "paragraph_id": {
+                        "type": "string",
+                        "description": "Identifier of the paragraph that contains the fragment, e.g. \"P12\""
+                    },
+                    "original": {
+                        "type": "string",
+                        "description": "The exact text fragment inside that paragraph to remove"
+                    }
+                },
+                "required": ["paragraph_id", "original"]
+            }
+        }
+    },
+    {
+        "type": "function",
+        "function": {
+            "name": "insert_text",
+            "description": "Inserts new text inside one paragraph, right after an anchor fragment. Use this to add missing translations or content.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "paragraph_id": {
+                        "type": "string",
+                        "description": "Identifier of the paragraph where the text is inserted, e.g. \"P12\""
+                    },
+                    "anchor": {
+                        "type": "string",
+                        "description": "The exact fragment inside that paragraph after which the content is inserted. Leave empty to append at the end of the paragraph"
+                    },
+                    "content": {
+                        "type": "string",
+                        "description": "The new text to insert"
+                    }
+                },
+                "required": ["paragraph_id", "content"]
+            }
+        }
+    },
+    REFINE_TOOLS[3],  # no_changes_needed
+]
+
+PARAGRAPH_ID_PREFIX = "P"
+
+
+class ParagraphDocument:
+    """
+    Texto dividido en párrafos con identificadores estables.
+
+    Cada línea no vacía es un párrafo; las líneas vacías se conservan en su lugar
+    para que el texto reconstruido mantenga exactamente la separación original.
+    """
+
+    def __init__(self, text: str):
+        self.lines = text.split('\n')
+        # Identificador de párrafo -> índice de línea
+        self.index = {}
+        # Posición de inicio de cada línea dentro del texto completo
+        self.offsets = []
+        position = 0
+        for line_number, line in enumerate(self.lines):
+            self.offsets.append(position)
+            position += len(line) + 1
+            if line.strip():
+                self.index[f"{PARAGRAPH_ID_PREFIX}{len(self.index) + 1}"] = line_number
+
+    @staticmethod
+    def normalize_id(paragraph_id) -> str:
+        """Acepta variantes como "p12", "[P12]" o 12 y devuelve "P12"."""
+        value = str(paragraph_id).strip().strip('[]').strip().upper()
+        if value.isdigit():
+            value = f"{PARAGRAPH_ID_PREFIX}{value}"
+        return value
+
+    def render(self) -> str:
+        """Texto con la etiqueta [Pn] delante de cada párrafo, para enviar al modelo."""
+        labels = {line_number: paragraph_id for paragraph_id, line_number in self.index.items()}
+        return '\n'.join(
+            f"[{labels[line_number]}] {line}" if line_number in labels else line
+            for line_number, line in enumerate(self.lines)
+        )
+
+    def get(self, paragraph_id) -> str:
+        """Retorna el párrafo, o None si el identificador no existe."""
+        line_number = self.index.get(self.normalize_id(paragraph_id))
+        return None if line_number is None else self.lines[line_number]
+
+    def text(self) -> str:
+        return '\n'.join(self.lines)
+
+
+def get_paragraph_refine_tools():
+    """
+    Retorna las herramientas del modo de refinamiento por párrafos.
+
+    Returns:
+        list: Lista de definiciones de tools para function calling
+    """
+    return PARAGRAPH_REFINE_TOOLS
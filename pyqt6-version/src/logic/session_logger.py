@@ -1,5 +1,6 @@
 import os
 import tempfile
+import threading
 import time
 from datetime import datetime
 from typing import Optional
@@ -14,6 +15,10 @@ class SessionLogger:
     def __init__(self):
         self.log_file_path: Optional[str] = None
         self.models_config = self._load_models_config()
+        # Totales de la sesión para mostrar el ahorro de la caché de prompts
+        self._usage_lock = threading.Lock()
+        self.prompt_tokens_total = 0
+        self.cached_tokens_total = 0
         self._create_log_file()
 
     def _load_models_config(self) -> dict:
@@ -82,6 +87,22 @@ class SessionLogger:
                 message += f"\nRespuesta de error: {response_text[:500]}{'...' if len(response_text) > 500 else ''}"
             self._write_log("API_ERROR", message)
 
+    def log_cache_usage(self, provider_name: str, prompt_tokens: int, cached_tokens: int) -> None:
+        """Registra los tokens de entrada de una petición y cuántos se sirvieron desde la caché"""
+        with self._usage_lock:
+            self.prompt_tokens_total += prompt_tokens
+            self.cached_tokens_total += cached_tokens
+            total_prompt = self.prompt_tokens_total
+            total_cached = self.cached_tokens_total
+
+        ratio = (cached_tokens / prompt_tokens * 100) if prompt_tokens else 0
+        total_ratio = (total_cached / total_prompt * 100) if total_prompt else 0
+        message = (
+            f"{provider_name}: {prompt_tokens} tokens de entrada, "
+            f"{cached_tokens} en caché ({ratio:.0f}%) - Sesión: {total_cached}/{total_prompt} ({total_ratio:.0f}%)"
+        )
+        self._write_log("API_CACHE", message)
+
     def log_translation_start(self, filename: str, source_lang: str, target_lang: str) -> None:
         """Registra el inicio de una traducción"""
         message = f"Iniciando traducción - Archivo: {filename}, {source_lang} -> {target_lang}"
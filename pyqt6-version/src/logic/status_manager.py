@@ -8,6 +8,7 @@ STATUS_TRANSLATED = 1
 STATUS_PROCESSING = 2
 STATUS_ERROR = 3
 STATUS_REFINED = 4
+STATUS_STALE = 5  # Traducido, pero el original cambió después
 
 # Mapeo de código a claves de traducción
 STATUS_CODE_TO_KEY = {
@@ -15,7 +16,8 @@ STATUS_CODE_TO_KEY = {
     STATUS_TRANSLATED: "main_window.chapters_table.status.translated",
     STATUS_PROCESSING: "main_window.chapters_table.status.processing",
     STATUS_ERROR: "main_window.chapters_table.status.error",
-    STATUS_REFINED: "main_window.chapters_table.status.refined"
+    STATUS_REFINED: "main_window.chapters_table.status.refined",
+    STATUS_STALE: "main_window.chapters_table.status.stale"
 }
 
 def get_status_text(status_code, lang_manager):
@@ -31,7 +33,8 @@ def get_status_color(status_code):
         STATUS_TRANSLATED: (34, 139, 34),  # Verde oscuro
         STATUS_PROCESSING: (255, 165, 0),  # Naranja
         STATUS_ERROR: (165, 42, 42),  # Rojo oscuro
-        STATUS_REFINED: (0, 100, 0)  # Verde más oscuro para refinado
+        STATUS_REFINED: (0, 100, 0),  # Verde más oscuro para refinado
+        STATUS_STALE: (184, 134, 11)  # Ocre para traducciones desactualizadas
     }
     return status_colors.get(status_code, None)
 
@@ -46,11 +49,13 @@ def get_status_code_from_text(status_text):
         "Procesando": STATUS_PROCESSING,
         "Error": STATUS_ERROR,
         "Refinado": STATUS_REFINED,
+        "Desactualizado": STATUS_STALE,
         # Inglés
         "Unprocessed": STATUS_UNPROCESSED,
         "Translated": STATUS_TRANSLATED,
         "Processing": STATUS_PROCESSING,
         "Error": STATUS_ERROR,
-        "Refined": STATUS_REFINED
+        "Refined": STATUS_REFINED,
+        "Stale": STATUS_STALE
     }
     return STATUS_TEXT_TO_CODE.get(status_text, STATUS_UNPROCESSED)
\ No newline at end of file
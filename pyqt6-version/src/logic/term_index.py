@@ -0,0 +1,153 @@
+import re
+import threading
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+# Separadores admitidos entre el término original y su traducción ("término → traducción").
+# ":" y "=" no cuentan: aparecen en reglas y notas ("Regla: ..."), que deben incluirse siempre
+TERM_SEPARATOR_PATTERN = re.compile(r"\s*(?:→|->|=>)\s*")
+
+
+def _is_spaced_word_char(char: str) -> bool:
+    """True para letras y dígitos de escrituras que separan palabras con espacios."""
+    return (char.isalnum() or char == "_") and ord(char) < 0x2E80
+
+
+class TermIndex:
+    """
+    Índice de términos del glosario basado en un autómata Aho-Corasick.
+
+    El autómata se construye una vez con las claves del lado original de cada línea
+    del glosario y encuentra en una sola pasada todas las claves presentes en un
+    segmento, sin importar cuántas líneas tenga el glosario. Las líneas sin separador
+    (reglas generales, notas) se incluyen siempre.
+    """
+
+    def __init__(self, custom_terms: str):
+        """
+        Args:
+            custom_terms (str): Glosario, una entrada por línea ("término → traducción")
+        """
+        self.lines: List[str] = []
+        self.always_included: List[int] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[Tuple[int, int]]] = [[]]  # (índice de línea, longitud de clave)
+
+        for raw_line in custom_terms.split('\n'):
+            line = raw_line.strip()
+            if not line:
+                continue
+            line_index = len(self.lines)
+            self.lines.append(line)
+            key = self._extract_key(line)
+            if key:
+                self._add_key(key.lower(), line_index)
+            else:
+                self.always_included.append(line_index)
+
+        self._build_failure_links()
+
+    @staticmethod
+    def _extract_key(line: str) -> Optional[str]:
+        """Obtiene el término original de una línea, o None si la línea no es un par."""
+        if line.startswith('- '):
+            line = line[2:]
+        parts = TERM_SEPARATOR_PATTERN.split(line, maxsplit=1)
+        if len(parts) < 2 or not parts[0].strip() or not parts[1].strip():
+            return None
+        return parts[0].strip().strip('"\'“”«»')
+
+    def _add_key(self, key: str, line_index: int) -> None:
+        state = 0
+        for char in key:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        self._output[state].append((line_index, len(key)))
+
+    def _build_failure_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                candidate = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = candidate if candidate != next_state else 0
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def find_hits(self, text: str) -> Dict[int, int]:
+        """
+        Cuenta las apariciones de cada término en el texto.
+
+        La búsqueda no distingue mayúsculas. Si la clave empieza o termina con una
+        letra o dígito, se exige que no esté pegada a otra palabra ("Lin" no coincide
+        dentro de "Linda"); las claves en escrituras sin espacios coinciden siempre.
+
+        Returns:
+            Dict[int, int]: Número de apariciones por índice de línea del glosario
+        """
+        hits: Dict[int, int] = {}
+        lowered = text.lower()
+        length = len(lowered)
+        state = 0
+        for position, char in enumerate(lowered):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for line_index, key_length in self._output[state]:
+                start = position - key_length + 1
+                end = position + 1
+                if start > 0 and _is_spaced_word_char(lowered[start]) \
+                        and _is_spaced_word_char(lowered[start - 1]):
+                    continue
+                if end < length and _is_spaced_word_char(lowered[position]) \
+                        and _is_spaced_word_char(lowered[end]):
+                    continue
+                hits[line_index] = hits.get(line_index, 0) + 1
+        return hits
+
+    def filter_terms(self, text: str) -> Tuple[str, Dict[int, int]]:
+        """
+        Devuelve solo las líneas del glosario relevantes para el texto.
+
+        Returns:
+            Tuple[str, Dict[int, int]]: (glosario filtrado, apariciones por línea)
+        """
+        hits = self.find_hits(text)
+        selected = sorted(set(hits) | set(self.always_included))
+        return '\n'.join(self.lines[i] for i in selected), hits
+
+    @property
+    def term_count(self) -> int:
+        return len(self.lines) - len(self.always_included)
+
+
+_index_cache: Dict[str, TermIndex] = {}
+_index_cache_lock = threading.Lock()
+_INDEX_CACHE_SIZE = 8
+
+
+def get_term_index(custom_terms: str) -> TermIndex:
+    """
+    Retorna el índice del glosario, construyéndolo solo la primera vez.
+
+    El mismo glosario se usa en todos los segmentos y capítulos de un trabajo, así
+    que el autómata se reutiliza mientras el texto del glosario no cambie.
+    """
+    with _index_cache_lock:
+        index = _index_cache.get(custom_terms)
+        if index is None:
+            if len(_index_cache) >= _INDEX_CACHE_SIZE:
+                _index_cache.pop(next(iter(_index_cache)))
+            index = TermIndex(custom_terms)
+            _index_cache[custom_terms] = index
+        return index
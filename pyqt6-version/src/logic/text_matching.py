@@ -0,0 +1,243 @@
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+# Longitud de los q-gramas del índice
+DEFAULT_Q = 3
+# Ventanas candidatas que se verifican con distancia de edición
+DEFAULT_TOP_CANDIDATES = 8
+
+
+def bounded_substring_distance(pattern: str, text: str, max_distance: int,
+                               start: int = 0, end: Optional[int] = None) -> Optional[Tuple[int, int, int]]:
+    """
+    Busca la subcadena de text[start:end] más parecida a pattern (algoritmo de Sellers).
+
+    Es una distancia de Levenshtein semiglobal: el patrón puede empezar y terminar en
+    cualquier posición del texto. Con el corte de Ukkonen solo se calculan las filas
+    que todavía pueden quedar dentro de max_distance, así que los candidatos que no
+    alcanzan el umbral se descartan sin recorrer la matriz completa.
+
+    Args:
+        pattern (str): Texto buscado
+        text (str): Texto donde buscar
+        max_distance (int): Distancia máxima aceptada
+        start (int): Inicio de la región de búsqueda
+        end (Optional[int]): Fin de la región de búsqueda (None = hasta el final)
+
+    Returns:
+        Optional[Tuple[int, int, int]]: (distancia, inicio, fin) en coordenadas de text,
+        o None si ninguna subcadena queda dentro de max_distance
+    """
+    m = len(pattern)
+    end = len(text) if end is None else min(end, len(text))
+    if m == 0 or start >= end:
+        return None
+
+    # Columna actual: distancia y posición de inicio de la alineación en cada fila
+    distances = list(range(m + 1))
+    origins = [start] * (m + 1)
+    last_active = min(max_distance + 1, m)
+    best = None
+
+    for j in range(start, end):
+        char = text[j]
+        prev_diag, prev_diag_origin = distances[0], origins[0]
+        distances[0], origins[0] = 0, j + 1
+        for i in range(1, last_active + 1):
+            up, up_origin = distances[i], origins[i]
+            if pattern[i - 1] == char:
+                value, origin = prev_diag, prev_diag_origin
+            else:
+                value, origin = prev_diag + 1, prev_diag_origin
+                if up + 1 < value:
+                    value, origin = up + 1, up_origin
+                if distances[i - 1] + 1 < value:
+                    value, origin = distances[i - 1] + 1, origins[i - 1]
+            prev_diag, prev_diag_origin = up, up_origin
+            distances[i], origins[i] = value, origin
+
+        # Las filas por encima de la última activa ya superan max_distance
+        while last_active > 0 and distances[last_active] > max_distance:
+            last_active -= 1
+        if last_active == m:
+            distance = distances[m]
+            if best is None or distance < best[0]:
+                best = (distance, origins[m], j + 1)
+                if distance == 0:
+                    break
+        else:
+            last_active += 1
+
+    return best
+
+
+def myers_best_end(pattern: str, text: str, max_distance: int,
+                   start: int = 0, end: Optional[int] = None) -> Optional[Tuple[int, int]]:
+    """
+    Recorre text[start:end] con el algoritmo bit-paralelo de Myers.
+
+    Cada columna de la matriz de Sellers se representa con vectores de bits del
+    tamaño del patrón, así que avanzar un carácter cuesta unas pocas operaciones
+    con enteros en lugar de un bucle sobre el patrón. La búsqueda termina en cuanto
+    aparece una coincidencia exacta.
+
+    Args:
+        pattern (str): Texto buscado
+        text (str): Texto donde buscar
+        max_distance (int): Distancia máxima aceptada
+        start (int): Inicio de la región de búsqueda
+        end (Optional[int]): Fin de la región de búsqueda (None = hasta el final)
+
+    Returns:
+        Optional[Tuple[int, int]]: (distancia, fin) de la mejor coincidencia, o None si
+        ninguna queda dentro de max_distance
+    """
+    m = len(pattern)
+    end = len(text) if end is None else min(end, len(text))
+    if m == 0 or start >= end:
+        return None
+
+    peq: Dict[str, int] = defaultdict(int)
+    for i, char in enumerate(pattern):
+        peq[char] |= 1 << i
+
+    full = (1 << m) - 1
+    last_bit = 1 << (m - 1)
+    pv, mv = full, 0
+    score = m
+    best = None
+
+    for j in range(start, end):
+        eq = peq.get(text[j], 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = (mv | ~(xh | pv)) & full
+        mh = pv & xh
+        if ph & last_bit:
+            score += 1
+        elif mh & last_bit:
+            score -= 1
+        # Sin acarreo en la fila 0: la coincidencia puede empezar en cualquier posición
+        ph = (ph << 1) & full
+        mh = (mh << 1) & full
+        pv = (mh | ~(xv | ph)) & full
+        mv = ph & xv
+
+        if score <= max_distance and (best is None or score < best[0]):
+            best = (score, j + 1)
+            if score == 0:
+                break
+
+    return best
+
+
+def find_best_span(pattern: str, text: str, max_distance: int,
+                   start: int = 0, end: Optional[int] = None) -> Optional[Tuple[int, int, int]]:
+    """
+    Localiza la subcadena más parecida a pattern con distancia acotada.
+
+    El recorrido completo usa el algoritmo de Myers para encontrar dónde termina la
+    mejor coincidencia; el inicio se recupera con Sellers sobre una ventana de
+    longitud m + distancia, la única zona donde puede empezar.
+
+    Returns:
+        Optional[Tuple[int, int, int]]: (distancia, inicio, fin) o None
+    """
+    found = myers_best_end(pattern, text, max_distance, start, end)
+    if found is None:
+        return None
+    distance, match_end = found
+    window_start = max(start, match_end - len(pattern) - distance)
+    return bounded_substring_distance(pattern, text, distance, window_start, match_end)
+
+
+class QGramIndex:
+    """
+    Índice invertido de q-gramas sobre un texto.
+
+    Se construye una vez por refinamiento sobre el texto original; las ediciones no lo
+    modifican, sino que se acumulan en un EditBatch y se aplican al final en una sola
+    pasada, así que todas las búsquedas usan coordenadas del texto original. Para buscar un fragmento, cada q-grama compartido vota por la diagonal
+    (posición de inicio) en la que aparecería; solo las ventanas con más votos se
+    verifican con distancia de edición acotada.
+    """
+
+    def __init__(self, text: str, q: int = DEFAULT_Q):
+        self.q = q
+        self.text = text
+        self._postings: Dict[str, List[int]] = defaultdict(list)
+        for position in range(len(text) - q + 1):
+            self._postings[text[position:position + q]].append(position)
+
+    def candidate_windows(self, pattern: str, max_distance: int,
+                          top: int = DEFAULT_TOP_CANDIDATES) -> Optional[List[Tuple[int, int]]]:
+        """
+        Retorna las regiones del texto que comparten más q-gramas con pattern.
+
+        Returns:
+            Optional[List[Tuple[int, int]]]: Regiones (inicio, fin) ordenadas, o None si el
+            patrón es demasiado corto o tiene demasiados errores permitidos para filtrar
+        """
+        q = self.q
+        m = len(pattern)
+        # Lema de q-gramas: una coincidencia con k errores comparte al menos m-q+1-k*q gramas
+        if m < q or m - q + 1 - max_distance * q <= 0:
+            return None
+
+        # Los q-gramas muy frecuentes aportan poco y cuestan mucho; se ignoran
+        max_postings = max(64, len(self.text) // 50)
+        band = max(1, max_distance)
+        votes: Dict[int, int] = defaultdict(int)
+        for offset in range(m - q + 1):
+            positions = self._postings.get(pattern[offset:offset + q])
+            if not positions or len(positions) > max_postings:
+                continue
+            for position in positions:
+                votes[(position - offset) // band] += 1
+
+        if not votes:
+            return []
+
+        best_buckets = sorted(votes, key=votes.get, reverse=True)[:top]
+        windows = []
+        for bucket in sorted(best_buckets):
+            window_start = max(0, bucket * band - max_distance)
+            window_end = min(len(self.text), bucket * band + band + m + max_distance)
+            if windows and window_start <= windows[-1][1]:
+                windows[-1] = (windows[-1][0], max(windows[-1][1], window_end))
+            else:
+                windows.append((window_start, window_end))
+        return windows
+
+    def find(self, pattern: str, threshold: float = 0.75) -> Optional[Tuple[int, int, float]]:
+        """
+        Busca la mejor coincidencia aproximada de pattern en el texto indexado.
+
+        Args:
+            pattern (str): Fragmento a localizar
+            threshold (float): Similitud mínima (1 - distancia / longitud del patrón)
+
+        Returns:
+            Optional[Tuple[int, int, float]]: (inicio, fin, similitud) o None
+        """
+        if not pattern:
+            return None
+        max_distance = int(len(pattern) * (1 - threshold))
+        windows = self.candidate_windows(pattern, max_distance)
+        if windows is None:
+            # Sin filtro posible: búsqueda acotada sobre todo el texto
+            windows = [(0, len(self.text))]
+
+        best = None
+        for window_start, window_end in windows:
+            bound = max_distance if best is None else min(max_distance, best[0])
+            match = find_best_span(pattern, self.text, bound, window_start, window_end)
+            if match and (best is None or match[0] < best[0]):
+                best = match
+                if best[0] == 0:
+                    break
+
+        if best is None:
+            return None
+        distance, start, end = best
+        return start, end, 1 - distance / len(pattern)
@@ -0,0 +1,84 @@
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Any, Callable, Mapping, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class TranslationJob:
+    """
+    Parámetros inmutables de una traducción.
+
+    TranslatorLogic solo guarda estado compartido de solo lectura (idiomas, modelos,
+    rutas de prompts); todo lo que varía entre llamadas viaja en este objeto, de modo
+    que una misma instancia del traductor puede atender varios hilos a la vez.
+
+    Attributes:
+        source_lang (str): Idioma de origen
+        target_lang (str): Idioma de destino
+        api_key (str): API key del proveedor principal
+        provider (str): Identificador del proveedor
+        model (str): Identificador del modelo
+        custom_terms (str): Términos personalizados para la traducción
+        enable_check (bool): Realizar comprobación de la traducción
+        enable_refine (bool): Refinar cada segmento tras traducirlo
+        check_refine_settings (Optional[Mapping]): Configuración para check/refine
+        segmentation_config (Optional[Mapping]): Configuración de segmentación automática
+        segment_size (Optional[int]): Tamaño de segmento manual (None = sin segmentar)
+        temp_api_keys (Mapping): API keys temporales por proveedor
+        timeout (int): Timeout de las llamadas API
+        extra_instructions (str): Instrucciones añadidas al final del prompt de traducción
+        filter_glossary (bool): Enviar en cada petición solo los términos presentes en su texto
+        precheck_config (Optional[Mapping]): Umbrales de la comprobación local previa al check
+        check_cache (Optional[TranslationDatabase]): Base de datos con los veredictos de comprobación
+        check_sampler (Optional[CheckSampler]): Decide qué capítulos se comprueban (None = todos)
+        stop_callback (Optional[Callable[[], bool]]): Función que indica si se debe detener
+    """
+    source_lang: str
+    target_lang: str
+    api_key: str
+    provider: str
+    model: str
+    custom_terms: str = ""
+    enable_check: bool = True
+    enable_refine: bool = False
+    check_refine_settings: Optional[Mapping] = None
+    segmentation_config: Optional[Mapping] = None
+    segment_size: Optional[int] = None
+    temp_api_keys: Mapping = field(default_factory=dict)
+    timeout: int = 120
+    extra_instructions: str = ""
+    filter_glossary: bool = True
+    precheck_config: Optional[Mapping] = None
+    check_cache: Optional[Any] = field(default=None, compare=False)
+    check_sampler: Optional[Any] = field(default=None, compare=False)
+    stop_callback: Optional[Callable[[], bool]] = field(default=None, compare=False)
+
+    def __post_init__(self):
+        # Copias de solo lectura para que el llamador no pueda modificar el trabajo en curso
+        for name in ("check_refine_settings", "segmentation_config", "precheck_config"):
+            value = getattr(self, name)
+            if value is not None:
+                object.__setattr__(self, name, MappingProxyType(dict(value)))
+        object.__setattr__(self, "temp_api_keys", MappingProxyType(dict(self.temp_api_keys or {})))
+
+    def is_stop_requested(self) -> bool:
+        """Retorna True si el llamador solicitó detener el trabajo"""
+        return bool(self.stop_callback and self.stop_callback())
+
+    def check_target(self) -> Tuple[str, str]:
+        """Retorna (proveedor, modelo) usados para comprobación y refinamiento"""
+        settings = self.check_refine_settings
+        if settings and settings.get('use_separate_model'):
+            return settings.get('provider', self.provider), settings.get('model', self.model)
+        return self.provider, self.model
+
+    def resolved_api_keys(self) -> dict:
+        """
+        Retorna las API keys temporales asegurando que la key principal se use
+        cuando check/refine comparten proveedor con la traducción.
+        """
+        keys = dict(self.temp_api_keys)
+        check_provider, _ = self.check_target()
+        if check_provider == self.provider and self.api_key:
+            keys[check_provider] = self.api_key
+        return keys
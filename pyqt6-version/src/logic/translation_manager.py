@@ -2,10 +2,19 @@ from typing import List, Dict, Optional, Tuple, Callable
 from PyQt6.QtCore import QObject, pyqtSignal, QThread
 import os
 import time
-from .database import TranslationDatabase
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import replace
+from .database import TranslationDatabase, JournalModeError, set_journal_mode, content_hash
 from .translator import TranslatorLogic
+from .translation_job import TranslationJob
+from .check_sampler import CheckSampler
 from .session_logger import session_logger
 from .folder_structure import NovelFolderStructure
+from .lease_queue import ChapterLeaseQueue, ChapterLease, LeaseRenewer
+from .chapter_scheduler import (STRATEGY_TABLE, STRATEGY_LPT, estimate_chapters,
+                                estimate_makespan, cost_of)
+from .chapter_packer import PACKING_INSTRUCTIONS, pack_units, build_packed_text, split_packed_response
 from src.logic.status_manager import STATUS_PROCESSING, STATUS_TRANSLATED, STATUS_ERROR, get_status_text
 
 class TranslationWorker(QObject):
@@ -27,7 +36,15 @@ class TranslationWorker(QObject):
                  lang_manager = None, temp_api_keys: dict = None,
                  allow_retranslation: bool = False,
                  segmentation_config: Optional[Dict] = None,
-                 timeout: int = 120):
+                 timeout: int = 120,
+                 lease_queue: Optional[ChapterLeaseQueue] = None,
+                 scheduling_config: Optional[Dict] = None,
+                 packing_config: Optional[Dict] = None,
+                 precheck_config: Optional[Dict] = None,
+                 check_sampling_config: Optional[Dict] = None,
+                 incremental_config: Optional[Dict] = None,
+                 glossary_config: Optional[Dict] = None,
+                 check_existing: bool = False):
         super().__init__()
         self.files_to_translate = files_to_translate
         self.working_directory = working_directory
@@ -49,8 +66,23 @@ class TranslationWorker(QObject):
         self.allow_retranslation = allow_retranslation
         self.segmentation_config = segmentation_config
         self.timeout = timeout
+        self.lease_queue = lease_queue
+        self.scheduling_config = scheduling_config or {}
+        self.packing_config = packing_config or {}
+        self.precheck_config = precheck_config
+        # Un muestreador por lote: la tasa se adapta a los resultados de este lote
+        self.check_sampler = CheckSampler.from_config(check_sampling_config) if enable_check else None
+        self.incremental_config = incremental_config or {}
+        self.glossary_config = glossary_config or {}
+        # Comprobar los capítulos ya traducidos en lugar de omitirlos
+        self.check_existing = check_existing and enable_check
         self._stop_requested = False
-        self.translator.segment_size = segment_size
+        self._successful_translations = 0
+        self._already_translated = set()
+        # Original de cada capítulo en curso; se guarda al registrar la traducción para
+        # detectar traducciones desactualizadas y retraducirlas por párrafos
+        self._source_texts: Dict[str, str] = {}
+        self._counter_lock = threading.Lock()
 
     def _get_status_string(self, key, default_text=""):
         """Get a localized status string from the language manager."""
@@ -65,150 +97,467 @@ class TranslationWorker(QObject):
         """Retorna True si se ha solicitado detener la traducción"""
         return self._stop_requested
 
+    def _build_job(self) -> TranslationJob:
+        """Crea los parámetros inmutables de traducción para este lote"""
+        return TranslationJob(
+            source_lang=self.source_lang,
+            target_lang=self.target_lang,
+            api_key=self.api_key,
+            provider=self.provider,
+            model=self.model,
+            custom_terms=self.custom_terms,
+            enable_check=self.enable_check,
+            enable_refine=self.enable_refine,
+            check_refine_settings=self.check_refine_settings,
+            segmentation_config=self.segmentation_config,
+            segment_size=self.segment_size,
+            temp_api_keys=self.temp_api_keys,
+            timeout=self.timeout,
+            filter_glossary=self.glossary_config.get("filter_terms", True),
+            precheck_config=self.precheck_config,
+            check_cache=self.db,
+            check_sampler=self.check_sampler,
+            stop_callback=self.is_stop_requested
+        )
+
+    def _build_units(self, max_parallel: int) -> List[List[Dict[str, str]]]:
+        """
+        Agrupa y ordena los capítulos en unidades de trabajo.
+
+        Si packing_config está habilitado, los capítulos cortos consecutivos se agrupan
+        en una sola petición. En paralelo, las unidades se ordenan según
+        scheduling_config; con un único hilo se conserva el orden de la tabla.
+        """
+        strategy = self.scheduling_config.get("strategy", STRATEGY_TABLE)
+        packing_enabled = self.packing_config.get("enabled", False)
+        schedule = max_parallel > 1 and strategy != STRATEGY_TABLE and len(self.files_to_translate) > 1
+
+        if not packing_enabled and not schedule:
+            return [[file_info] for file_info in self.files_to_translate]
+
+        try:
+            prompt_chars = len(self.translator._load_prompt("translation.txt", self.source_lang, self.target_lang))
+        except FileNotFoundError:
+            prompt_chars = 0
+
+        # El catálogo solo vuelve a leer los capítulos modificados desde la última vez
+        catalog = self.db.refresh_chapter_catalog()
+        estimates = estimate_chapters(
+            self.files_to_translate, self.working_directory,
+            self.segment_size, self.segmentation_config, prompt_chars, catalog
+        )
+        estimate_by_name = {estimate.filename: estimate for estimate in estimates}
+
+        if packing_enabled:
+            units = pack_units(
+                self.files_to_translate,
+                {estimate.filename: estimate.chars for estimate in estimates},
+                self.packing_config.get("token_budget", 3000),
+                self.packing_config.get("max_chapter_chars", 4000)
+            )
+            packed_units = [unit for unit in units if len(unit) > 1]
+            if packed_units:
+                session_logger.log_info(
+                    f"Empaquetado: {sum(len(unit) for unit in packed_units)} capítulos cortos "
+                    f"agrupados en {len(packed_units)} peticiones"
+                )
+        else:
+            units = [[file_info] for file_info in self.files_to_translate]
+
+        if not schedule:
+            return units
+
+        def unit_cost(unit):
+            return sum(cost_of(estimate_by_name[f['name']], strategy) for f in unit)
+
+        if strategy == STRATEGY_LPT:
+            ordered = sorted(units, key=lambda unit: (
+                sum(estimate_by_name[f['name']].segments for f in unit), unit_cost(unit)), reverse=True)
+        else:
+            ordered = sorted(units, key=unit_cost, reverse=True)
+
+        table_makespan = estimate_makespan([unit_cost(unit) for unit in units], max_parallel)
+        scheduled_makespan = estimate_makespan([unit_cost(unit) for unit in ordered], max_parallel)
+        session_logger.log_info(
+            f"Planificación '{strategy}' con {max_parallel} hilos: costo estimado "
+            f"{table_makespan} (orden de tabla) -> {scheduled_makespan}"
+        )
+        return ordered
+
     def run(self):
         try:
             total_files = len(self.files_to_translate)
-            successful_translations = 0
+            self._successful_translations = 0
+            # Estado de todo el lote con una sola consulta, en lugar de una por capítulo
+            self._already_translated = set()
+            if not self.allow_retranslation:
+                statuses = self.db.get_chapter_statuses([f['name'] for f in self.files_to_translate])
+                self._already_translated = {name for name, status in statuses.items() if status["translated"]}
+            if self.check_existing:
+                positions = {file_info['name']: i for i, file_info in enumerate(self.files_to_translate, 1)}
+                for file_info in self.files_to_translate:
+                    if self._stop_requested:
+                        break
+                    if file_info['name'] in self._already_translated:
+                        self._check_existing_chapter(positions[file_info['name']], total_files, file_info['name'])
+            max_parallel = max(1, int(self.scheduling_config.get("max_parallel_chapters", 1)))
+            units = self._build_units(max_parallel)
+            positions = {file_info['name']: i for i, file_info in enumerate(self.files_to_translate, 1)}
+
+            if max_parallel == 1:
+                for unit_index, unit in enumerate(units, 1):
+                    if self._stop_requested:
+                        break
+
+                    processed = self._process_unit(unit, positions, total_files)
+
+                    # Esperar antes de la siguiente traducción si no es el último archivo
+                    if processed and unit_index < len(units) and not self._stop_requested:
+                        time.sleep(5)
+            else:
+                # El translator es re-entrante, así que varios capítulos pueden compartirlo
+                with ThreadPoolExecutor(max_workers=max_parallel) as executor:
+                    futures = [
+                        executor.submit(self._process_unit, unit, positions, total_files)
+                        for unit in units
+                    ]
+                    for future in as_completed(futures):
+                        future.result()
 
-            # Configurar tamaño de segmento si se especificó
-            if self.segment_size is not None:
-                self.translator.segment_size = self.segment_size
+            if not self._stop_requested:
+                final_message = self._get_status_string("translation_manager.progress.completed", "Traducción completada. {successful} de {total} archivos traducidos exitosamente.").format(
+                    successful=self._successful_translations, total=total_files)
+                self.progress_updated.emit(final_message)
+                self.all_translations_completed.emit()
 
-            for i, file_info in enumerate(self.files_to_translate, 1):
-                if self._stop_requested:
-                    break
+        except Exception as e:
+            self.error_occurred.emit(self._get_status_string("translation_manager.error.general", "Error en el proceso de traducción: {error}").format(error=str(e)))
+        finally:
+            self.all_translations_completed.emit()
 
-                filename = file_info['name']
-                self.progress_updated.emit(self._get_status_string("translation_manager.progress.translating_chapter", "Traduciendo capítulo {index} de {total}: {filename}").format(
-                    index=i, total=total_files, filename=filename))
+    def _check_existing_chapter(self, index: int, total_files: int, filename: str) -> None:
+        """
+        Comprueba la traducción guardada de un capítulo sin volver a traducirlo.
 
-                # Actualizar estado a "Procesando"
-                if self.status_callback:
-                    status_text = get_status_text(STATUS_PROCESSING, self.lang_manager)
-                    self.status_callback(filename, status_text)
+        Si el original y la traducción no cambiaron desde la última comprobación, el
+        veredicto sale de la caché sin llamar al modelo.
+        """
+        self.progress_updated.emit(self._get_status_string("translation_manager.progress.checking_chapter", "Comprobando capítulo {index} de {total}: {filename}").format(
+            index=index, total=total_files, filename=filename))
+        if self.status_callback:
+            self.status_callback(filename, get_status_text(STATUS_PROCESSING, self.lang_manager))
 
-                # Verificar si ya está traducido
-                if self.db.is_file_translated(filename) and not self.allow_retranslation:
-                    session_logger.log_info(f"Archivo ya traducido, omitiendo: {filename}")
+        storage = NovelFolderStructure.get_storage(self.working_directory)
+        try:
+            text = storage.read("original", filename)
+            translated_text = storage.read("translated", filename)
+        except (OSError, UnicodeDecodeError) as e:
+            error_msg = f"Error al leer {filename}: {str(e)}"
+            session_logger.log_error(error_msg)
+            self.error_occurred.emit(error_msg)
+            self.translation_completed.emit(filename, False)
+            return
+
+        passed = self.translator._check_job_translation(text, translated_text, self._build_job())
+        session_logger.log_info(f"Comprobación de la traducción existente de {filename}: "
+                                f"{'aprobada' if passed else 'rechazada'}")
+        self.translation_completed.emit(filename, passed)
+
+    def _process_unit(self, unit: List[Dict[str, str]], positions: Dict[str, int], total_files: int) -> bool:
+        """Procesa una unidad de trabajo: un capítulo o un grupo empaquetado."""
+        if len(unit) == 1:
+            return self._process_chapter(positions[unit[0]['name']], total_files, unit[0])
+        return self._process_packed_group(unit, positions, total_files)
+
+    def _process_packed_group(self, unit: List[Dict[str, str]], positions: Dict[str, int],
+                              total_files: int) -> bool:
+        """
+        Traduce varios capítulos cortos en una sola petición.
+
+        Si la respuesta pierde algún delimitador o un capítulo no pasa la validación,
+        cada capítulo del grupo se traduce por separado.
+
+        Returns:
+            bool: True si se intentó traducir algún capítulo del grupo
+        """
+        if self._stop_requested:
+            return False
+
+        storage = NovelFolderStructure.get_storage(self.working_directory)
+        chapters = []  # (filename, texto, lease, renewer)
+        for file_info in unit:
+            filename = file_info['name']
+            self.progress_updated.emit(self._get_status_string("translation_manager.progress.translating_chapter", "Traduciendo capítulo {index} de {total}: {filename}").format(
+                index=positions[filename], total=total_files, filename=filename))
+            if self.status_callback:
+                self.status_callback(filename, get_status_text(STATUS_PROCESSING, self.lang_manager))
+
+            if filename in self._already_translated:
+                session_logger.log_info(f"Archivo ya traducido, omitiendo: {filename}")
+                continue
+
+            lease = None
+            renewer = None
+            if self.lease_queue:
+                lease = self.lease_queue.claim(filename, self.allow_retranslation)
+                if not lease:
+                    session_logger.log_info(f"Capítulo reclamado por otro worker, omitiendo: {filename}")
                     continue
+                renewer = LeaseRenewer(self.lease_queue, lease)
+                renewer.start()
 
-                # Registrar inicio de traducción
-                session_logger.log_translation_start(filename, self.source_lang, self.target_lang)
+            try:
+                text = storage.read("original", filename)
+            except (OSError, UnicodeDecodeError) as e:
+                error_msg = f"Error al leer {filename}: {str(e)}"
+                session_logger.log_error(error_msg)
+                self.error_occurred.emit(error_msg)
+                if renewer:
+                    renewer.stop()
+                if lease:
+                    self.lease_queue.release(lease)
+                self.translation_completed.emit(filename, False)
+                continue
+            session_logger.log_translation_start(filename, self.source_lang, self.target_lang)
+            self._source_texts[filename] = text
+            chapters.append((filename, text, lease, renewer))
+
+        if not chapters:
+            return False
 
-                # Traducir el archivo
-                success = self._translate_single_file(filename)
+        def should_stop() -> bool:
+            return self._stop_requested or any(r is not None and r.lost for _, _, _, r in chapters)
 
-                if success:
-                    successful_translations += 1
-                    self.db.add_translation_record(filename, self.source_lang, self.target_lang)
-                    session_logger.log_translation_complete(filename, True)
-                    self.translation_completed.emit(filename, True)
+        try:
+            translations = None
+            if len(chapters) > 1:
+                source_texts = [text for _, text, _, _ in chapters]
+                # El texto empaquetado se envía completo: sin segmentar ni refinar por segmento
+                job = replace(
+                    self._build_job(),
+                    segment_size=None,
+                    segmentation_config=None,
+                    enable_refine=False,
+                    extra_instructions=PACKING_INSTRUCTIONS,
+                    stop_callback=should_stop
+                )
+                response = self.translator.translate_job(build_packed_text(source_texts), job)
+                if response:
+                    translations = split_packed_response(response, source_texts)
+                if translations is None and not should_stop():
+                    session_logger.log_warning(
+                        f"Respuesta empaquetada inválida para {len(chapters)} capítulos; "
+                        f"traduciendo por separado"
+                    )
+
+            results = []
+            for position, (filename, text, lease, renewer) in enumerate(chapters):
+                chapter_stop = (lambda r=renewer: self._stop_requested or (r is not None and r.lost))
+                if translations is not None:
+                    success = self._save_translation(filename, translations[position], lease, chapter_stop)
+                    results.append((filename, success, lease))
                 else:
-                    session_logger.log_translation_complete(filename, False)
-                    self.translation_completed.emit(filename, False)
+                    success = self._translate_single_file(filename, lease, chapter_stop)
+                    self._report_chapter_result(filename, success, lease)
+
+            # Los capítulos de la respuesta empaquetada se registran en una sola transacción
+            self.db.add_translation_records(
+                [filename for filename, success, lease in results if success and not lease],
+                self.source_lang, self.target_lang,
+                {filename: content_hash(self._source_texts[filename]) for filename, _, _ in results}
+            )
+            for filename, success, lease in results:
+                self._report_chapter_result(filename, success, lease, record=False)
+        finally:
+            for _, _, _, renewer in chapters:
+                if renewer:
+                    renewer.stop()
+        return True
 
-                # Esperar antes de la siguiente traducción si no es el último archivo
-                if i < total_files and not self._stop_requested:
-                    time.sleep(5)
+    def _report_chapter_result(self, filename: str, success: bool, lease: Optional[ChapterLease],
+                               record: bool = True) -> None:
+        """
+        Registra el resultado de un capítulo y emite su señal de finalización.
 
-            if not self._stop_requested:
-                final_message = self._get_status_string("translation_manager.progress.completed", "Traducción completada. {successful} de {total} archivos traducidos exitosamente.").format(
-                    successful=successful_translations, total=total_files)
-                self.progress_updated.emit(final_message)
-                self.all_translations_completed.emit()
+        Con record=False el llamador registra la traducción en la base de datos (en lote).
+        """
+        source_text = self._source_texts.pop(filename, None)
+        if success:
+            with self._counter_lock:
+                self._successful_translations += 1
+            # Con lease, el registro se hace al finalizar dentro de la cola
+            if not lease and record:
+                self.db.add_translation_record(filename, self.source_lang, self.target_lang,
+                                               content_hash(source_text) if source_text is not None else None)
+            if source_text is not None:
+                self.db.save_translation_source(filename, source_text)
+            session_logger.log_translation_complete(filename, True)
+            self.translation_completed.emit(filename, True)
+        else:
+            session_logger.log_translation_complete(filename, False)
+            self.translation_completed.emit(filename, False)
+
+    def _process_chapter(self, index: int, total_files: int, file_info: Dict[str, str]) -> bool:
+        """
+        Traduce un capítulo y emite su señal de finalización.
 
-        except Exception as e:
-            self.error_occurred.emit(self._get_status_string("translation_manager.error.general", "Error en el proceso de traducción: {error}").format(error=str(e)))
+        Returns:
+            bool: True si se intentó la traducción, False si el capítulo se omitió
+        """
+        if self._stop_requested:
+            return False
+
+        filename = file_info['name']
+        self.progress_updated.emit(self._get_status_string("translation_manager.progress.translating_chapter", "Traduciendo capítulo {index} de {total}: {filename}").format(
+            index=index, total=total_files, filename=filename))
+
+        # Actualizar estado a "Procesando"
+        if self.status_callback:
+            status_text = get_status_text(STATUS_PROCESSING, self.lang_manager)
+            self.status_callback(filename, status_text)
+
+        # Verificar si ya está traducido
+        if filename in self._already_translated:
+            session_logger.log_info(f"Archivo ya traducido, omitiendo: {filename}")
+            return False
+
+        # Reclamar el capítulo si se trabaja con otros workers sobre la misma biblioteca
+        lease = None
+        renewer = None
+        if self.lease_queue:
+            lease = self.lease_queue.claim(filename, self.allow_retranslation)
+            if not lease:
+                session_logger.log_info(f"Capítulo reclamado por otro worker, omitiendo: {filename}")
+                return False
+            renewer = LeaseRenewer(self.lease_queue, lease)
+            renewer.start()
+
+        def should_stop() -> bool:
+            # Detener si el usuario lo pide o si otro worker recuperó el lease
+            return self._stop_requested or (renewer is not None and renewer.lost)
+
+        # Registrar inicio de traducción
+        session_logger.log_translation_start(filename, self.source_lang, self.target_lang)
+
+        # Traducir el archivo
+        try:
+            success = self._translate_single_file(filename, lease, should_stop)
         finally:
-            self.all_translations_completed.emit()
+            if renewer:
+                renewer.stop()
+
+        self._report_chapter_result(filename, success, lease)
+        return True
 
-    def _translate_single_file(self, filename: str) -> bool:
+    def _translate_single_file(self, filename: str, lease: Optional[ChapterLease] = None,
+                               stop_callback: Optional[Callable[[], bool]] = None) -> bool:
+        is_stop_requested = stop_callback or self.is_stop_requested
         try:
             # Asegurar que la estructura de carpetas exista
             NovelFolderStructure.ensure_structure(self.working_directory)
 
-            # Rutas usando la nueva estructura
-            originals_path = NovelFolderStructure.get_originals_path(self.working_directory)
-            translated_path = NovelFolderStructure.get_translated_path(self.working_directory)
-
-            input_path = originals_path / filename
-            output_path = translated_path / filename
-            temp_output_path = translated_path / f".temp_{filename}"
-
-            # Verificar que el archivo original existe
-            if not input_path.exists():
-                error_msg = f"Archivo original no encontrado: {input_path}"
+            # Leer el original (carpeta originals/ o base de datos, según la novela)
+            try:
+                text = NovelFolderStructure.get_storage(self.working_directory).read("original", filename)
+            except FileNotFoundError:
+                error_msg = f"Archivo original no encontrado: {filename}"
                 session_logger.log_error(error_msg)
                 self.error_occurred.emit(error_msg)
+                if lease:
+                    self.lease_queue.release(lease)
                 return False
-
-            # Leer archivo original
-            with open(input_path, 'r', encoding='utf-8') as file:
-                text = file.read()
+            self._source_texts[filename] = text
 
             # Intentar traducir usando parámetros enable_check y enable_refine
-            translated_text = self.translator.translate_text(
-                text,
-                self.source_lang,
-                self.target_lang,
-                self.api_key,
-                self.provider,
-                self.model,
-                self.custom_terms,
-                enable_check=self.enable_check,
-                enable_refine=self.enable_refine,
-                check_refine_settings=self.check_refine_settings,
-                temp_api_keys=self.temp_api_keys,
-                segmentation_config=self.segmentation_config,
-                timeout=self.timeout,
-                stop_callback=self.is_stop_requested
-            )
+            job = replace(self._build_job(), stop_callback=is_stop_requested)
+            translated_text = self._translate_incremental(filename, text, job)
+            if not translated_text and not is_stop_requested():
+                translated_text = self.translator.translate_job(text, job)
 
             if not translated_text:
                 error_msg = f"Error al traducir {filename}: No se obtuvo traducción"
                 session_logger.log_error(error_msg)
                 self.error_occurred.emit(error_msg)
+                if lease:
+                    self.lease_queue.release(lease)
                 return False
 
+            return self._save_translation(filename, translated_text, lease, is_stop_requested)
+
+        except Exception as e:
+            error_msg = f"Error al traducir {filename}: {str(e)}"
+            session_logger.log_error(error_msg)
+            self.error_occurred.emit(error_msg)
+            if lease:
+                self.lease_queue.release(lease)
+            return False
+
+    def _translate_incremental(self, filename: str, text: str, job: TranslationJob) -> Optional[str]:
+        """
+        Retraduce solo los párrafos que cambiaron si el original se modificó desde la
+        traducción existente.
+
+        Returns:
+            Optional[str]: Traducción actualizada, o None si hay que traducir el capítulo completo
+        """
+        if not self.allow_retranslation or not self.incremental_config.get("enabled", False):
+            return None
+
+        previous_source = self.db.get_translation_source(filename)
+        # Sin cambios en el original la retraducción se pidió explícitamente: completa
+        if previous_source is None or content_hash(previous_source) == content_hash(text):
+            return None
+
+        try:
+            previous_translation = NovelFolderStructure.get_storage(self.working_directory).read("translated", filename)
+        except (OSError, UnicodeDecodeError):
+            return None
+
+        session_logger.log_info(f"El original de {filename} cambió desde su traducción; retraduciendo por párrafos")
+        return self.translator.translate_incremental(
+            text, previous_source, previous_translation, job,
+            self.incremental_config.get("max_changed_ratio", 0.5)
+        )
+
+    def _save_translation(self, filename: str, translated_text: str,
+                          lease: Optional[ChapterLease],
+                          is_stop_requested: Callable[[], bool]) -> bool:
+        """
+        Guarda la traducción de un capítulo en el almacenamiento de la novela; la
+        escritura es atómica (archivo temporal o transacción).
+
+        Returns:
+            bool: True si la traducción quedó guardada
+        """
+        try:
             # Verificar si se ha solicitado detener antes de guardar archivos
-            if self.is_stop_requested():
+            if is_stop_requested():
                 session_logger.log_info(f"Guardado cancelado para {filename} por solicitud del usuario")
+                if lease:
+                    self.lease_queue.release(lease)
                 return False
 
-            # Guardar primero en archivo temporal
-            with open(temp_output_path, 'w', encoding='utf-8') as file:
-                file.write(translated_text)
-
-            # Verificar nuevamente antes de mover el archivo final
-            if self.is_stop_requested():
-                session_logger.log_info(f"Guardado final cancelado para {filename} por solicitud del usuario")
-                # Limpiar archivo temporal
-                try:
-                    temp_output_path.unlink()
-                except:
-                    pass
-                return False
+            # Con lease, la cola publica el archivo y el registro solo si el lease sigue vigente
+            if lease:
+                source_text = self._source_texts.get(filename)
+                return self.lease_queue.finalize(lease, translated_text, self.source_lang, self.target_lang,
+                                                 content_hash(source_text) if source_text is not None else None)
 
-            # Si todo salió bien, mover el archivo temporal al destino final
-            temp_output_path.replace(output_path)
+            NovelFolderStructure.get_storage(self.working_directory).write("translated", filename, translated_text)
 
             # Verificar antes de registrar en base de datos
-            if self.is_stop_requested():
+            if is_stop_requested():
                 session_logger.log_info(f"Registro en DB cancelado para {filename} por solicitud del usuario")
                 return False
 
             return True
 
         except Exception as e:
-            error_msg = f"Error al traducir {filename}: {str(e)}"
+            error_msg = f"Error al guardar {filename}: {str(e)}"
             session_logger.log_error(error_msg)
             self.error_occurred.emit(error_msg)
-            # Limpiar archivo temporal si existe
-            if temp_output_path.exists():
-                try:
-                    temp_output_path.unlink()
-                except:
-                    pass
+            if lease:
+                self.lease_queue.release(lease)
             return False
 
 class TranslationManager(QObject):
@@ -233,9 +582,9 @@ class TranslationManager(QObject):
         """Set the language manager for status translations."""
         self.lang_manager = lang_manager
 
-    def update_temp_prompts_path(self, path):
-        """Actualiza la ruta de prompts temporales en el translator"""
-        self.translator.update_temp_prompts_path(path)
+    def set_request_engine(self, engine):
+        """Comparte el motor asíncrono de peticiones con el translator"""
+        self.translator.set_request_engine(engine)
 
     def _get_status_string(self, key, default_text=""):
         """Get a localized status string from the language manager."""
@@ -265,7 +614,15 @@ class TranslationManager(QObject):
                        check_refine_settings: Optional[Dict] = None,
                        temp_api_keys: dict = None, allow_retranslation: bool = False,
                        segmentation_config: Optional[Dict] = None,
-                       timeout: int = 120) -> None:
+                       timeout: int = 120,
+                       lease_config: Optional[Dict] = None,
+                       scheduling_config: Optional[Dict] = None,
+                       packing_config: Optional[Dict] = None,
+                       precheck_config: Optional[Dict] = None,
+                       check_sampling_config: Optional[Dict] = None,
+                       incremental_config: Optional[Dict] = None,
+                       glossary_config: Optional[Dict] = None,
+                       check_existing: bool = False) -> None:
         """
         Inicia la traducción de archivos.
 
@@ -281,6 +638,14 @@ class TranslationManager(QObject):
             enable_refine: Bool para habilitar o no el refinamiento de la traducción
             temp_api_keys: Diccionario de API keys temporales
             allow_retranslation: Bool para permitir re-traducción de archivos ya traducidos
+            lease_config: Configuración de leases para compartir la biblioteca con otros workers
+            scheduling_config: Estrategia de orden y número de capítulos en paralelo
+            packing_config: Configuración para agrupar capítulos cortos en una petición
+            precheck_config: Umbrales de la comprobación local previa al check con el modelo
+            check_sampling_config: Fracción de capítulos comprobados y su ajuste automático
+            incremental_config: Retraducción por párrafos de capítulos cuyo original cambió
+            glossary_config: Filtrado del glosario según los términos presentes en cada petición
+            check_existing: Comprobar los capítulos ya traducidos en lugar de omitirlos
         """
         if not self.working_directory or not self.db:
                 self.error_occurred.emit(self.lang_manager.get_string("translation_manager.error.no_working_directory", "No se ha inicializado el directorio de trabajo"))
@@ -289,6 +654,22 @@ class TranslationManager(QObject):
         # Guardar términos personalizados
         self.db.save_custom_terms(custom_terms)
 
+        # Cola de leases opcional para coordinarse con workers en otros equipos
+        lease_queue = None
+        if lease_config and lease_config.get("enabled", False):
+            # Varios equipos comparten la base de datos por red: WAL no es seguro ahí.
+            # El modo queda guardado en la novela y no afecta a otras novelas
+            try:
+                set_journal_mode(self.db.db_path, "DELETE")
+            except JournalModeError as e:
+                session_logger.log_error(str(e))
+                self.error_occurred.emit(str(e))
+                return
+            lease_queue = ChapterLeaseQueue(
+                self.working_directory,
+                lease_seconds=lease_config.get("lease_seconds", 600)
+            )
+
         # Crear y configurar el worker
         self.thread = QThread()
         self.worker = TranslationWorker(
@@ -311,7 +692,15 @@ class TranslationManager(QObject):
             temp_api_keys,  # Pasar las API keys temporales
             allow_retranslation,  # Pasar el flag de permitir re-traducción
             segmentation_config,  # Pasar config de segmentación
-            timeout  # Pasar timeout
+            timeout,  # Pasar timeout
+            lease_queue,  # Pasar cola de leases compartida
+            scheduling_config,  # Pasar configuración de planificación
+            packing_config,  # Pasar configuración de empaquetado
+            precheck_config,  # Pasar umbrales de la comprobación local
+            check_sampling_config,  # Pasar configuración del muestreo de comprobación
+            incremental_config,  # Pasar configuración de la retraducción incremental
+            glossary_config,  # Pasar configuración del glosario
+            check_existing  # Pasar si se comprueban los capítulos ya traducidos
         )
 
         # Mover el worker al thread
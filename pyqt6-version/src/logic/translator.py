@@ -2,13 +2,23 @@ import time
 import json
 import os
 import re
-import difflib
 import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
 from dotenv import load_dotenv
 from typing import Optional, Dict, List, Callable
 from pathlib import Path
 from src.logic import translator_req
 from src.logic.session_logger import session_logger
+from src.logic.term_index import get_term_index
+from src.logic.prompt_registry import prompt_registry
+from src.logic.text_matching import QGramIndex
+from src.logic.edit_batch import EditBatch
+from src.logic.rate_limiter import rate_limits
+from src.logic.quality_precheck import precheck_translation
+from src.logic.database import content_hash
+from src.logic.translation_job import TranslationJob
+from src.logic.paragraph_diff import plan_incremental_update
 
 class TranslatorLogic:
     def __init__(self, segment_size=None):
@@ -32,51 +42,68 @@ class TranslatorLogic:
         with open(models_path, 'r') as f:
             self.models_config = json.load(f)
 
-        self.segment_size = segment_size  # Tamaño objetivo para cada segmento
-        self.temp_prompts_path = None  # Ruta al directorio de prompts temporales
+        self.segment_size = segment_size  # Tamaño por defecto; nunca se modifica por llamada
+        self.prompt_registry = prompt_registry  # Prompts en memoria (sesión, novela, par de idiomas, base)
+        self.request_engine = None  # AsyncEngineBridge opcional para las peticiones HTTP
 
         # Cargar variables de entorno desde .env
         env_path = Path(__file__).parent.parent.parent / '.env'
         if env_path.exists():
             load_dotenv(dotenv_path=env_path)
 
-    def update_temp_prompts_path(self, path: Path):
-        """Actualiza la ruta al directorio de prompts temporales"""
-        self.temp_prompts_path = path
-    def _handle_terminology_section(self, prompt_template: str, custom_terms: str) -> str:
+    def set_request_engine(self, engine):
         """
-        Maneja la sección de terminología en los prompts.
-        Si hay términos personalizados, los formatea y reemplaza {terminology_reference}.
-        Si no hay términos, elimina toda la sección <terminology_reference>...</terminology_reference>.
+        Configura el motor asíncrono que ejecutará las peticiones HTTP.
 
         Args:
-            prompt_template (str): Template del prompt
-            custom_terms (str): Términos personalizados
+            engine: AsyncEngineBridge, o None para usar peticiones síncronas
+        """
+        self.request_engine = engine
+
+    def _send_request(self, provider: str, text: str, api_key: str, model_config: Dict,
+                      prompt, timeout: int, tools: list = None,
+                      stop_callback: Optional[Callable[[], bool]] = None) -> Optional[str]:
+        """Envía una petición mediante el motor asíncrono si existe, o con translator_req."""
+        # Respetar el límite de peticiones por minuto del proveedor
+        if not rate_limits.acquire(provider, stop_callback):
+            return None
+        if self.request_engine is not None:
+            return self.request_engine.translate_segment(
+                provider, text, api_key, model_config, prompt, timeout, tools, stop_callback
+            )
+        return translator_req.translate_segment(
+            provider, text, api_key, model_config, prompt, self.models_config, timeout, tools
+        )
+
+    def _terms_for_text(self, custom_terms: str, text: str, label: str) -> str:
+        """
+        Filtra el glosario dejando solo los términos que aparecen en el texto.
+
+        Args:
+            custom_terms (str): Glosario completo
+            text (str): Texto original que se enviará en la petición
+            label (str): Descripción de la petición para el log
 
         Returns:
-            str: Prompt modificado
+            str: Glosario filtrado (puede quedar vacío)
         """
-        if custom_terms.strip():
-            # Formatear los términos personalizados
-            terms = custom_terms.strip().split('\n')
-            terms = [
-                line if line.strip().startswith('- ') else f'- {line.strip()}'
-                for line in terms
-                if line.strip()
-            ]
-            formatted_terms = '\n'.join(terms)
-            # Reemplazar la etiqueta {terminology_reference} con los términos formateados
-            return prompt_template.replace("{terminology_reference}", formatted_terms)
-        else:
-            # Si no hay términos personalizados, eliminar toda la sección <terminology_reference>
-            return re.sub(r'<terminology_reference>.*?</terminology_reference>', '', prompt_template, flags=re.DOTALL)
+        if not custom_terms.strip():
+            return custom_terms
+        index = get_term_index(custom_terms)
+        filtered_terms, hits = index.filter_terms(text)
+        session_logger.log_info(
+            f"Glosario en {label}: {len(hits)} de {index.term_count} términos presentes "
+            f"({sum(hits.values())} apariciones)"
+        )
+        return filtered_terms
 
     def _load_prompt(self, prompt_name: str, source_lang: str, target_lang: str) -> str:
         """
-        Carga una plantilla de prompt desde un archivo, buscando en el siguiente orden:
-        1. Directorio de prompts temporales de la sesión.
-        2. Directorio específico del par de idiomas en la configuración.
-        3. Directorio de prompts base en la configuración.
+        Retorna la plantilla de un prompt desde el registro, buscando en el siguiente orden:
+        1. Cambios de la sesión.
+        2. Prompts personalizados de la novela.
+        3. Directorio específico del par de idiomas en la configuración.
+        4. Directorio de prompts base en la configuración.
 
         Args:
             prompt_name (str): Nombre del archivo de prompt (ej: "translation.txt").
@@ -87,47 +114,23 @@ class TranslatorLogic:
             str: Contenido del prompt.
 
         Raises:
-            FileNotFoundError: Si no se encuentra el archivo de prompt en ninguna de las ubicaciones.
+            FileNotFoundError: Si no se encuentra el prompt en ninguna de las capas.
         """
-        lang_pair_dir_name = f"{source_lang}_{target_lang}"
-
-        # 1. Buscar en el directorio de prompts temporales
-        if self.temp_prompts_path:
-            temp_prompt_path = self.temp_prompts_path / lang_pair_dir_name / prompt_name
-            if temp_prompt_path.exists():
-                with open(temp_prompt_path, 'r', encoding='utf-8') as file:
-                    return file.read()
-
-        # 2. Si no se encuentra, buscar en el directorio específico del par de idiomas
-        prompt_dir = Path(__file__).parent.parent / 'config' / 'prompts' / lang_pair_dir_name
-        prompt_path = prompt_dir / prompt_name
-        if prompt_path.exists():
-            with open(prompt_path, 'r', encoding='utf-8') as file:
-                return file.read()
-
-        # 3. Si no existe, intentar en prompts-base
-        base_prompt_dir = Path(__file__).parent.parent / 'config' / 'prompts' / 'prompts-base'
-        base_prompt_path = base_prompt_dir / prompt_name
-        if base_prompt_path.exists():
-            with open(base_prompt_path, 'r', encoding='utf-8') as file:
-                return file.read()
-
-        # Si no se encuentra en ninguno de los dos lugares, lanzar error
-        raise FileNotFoundError(f"No se pudo encontrar el prompt '{prompt_name}'")
-
-
-    def _segment_text(self, text: str) -> List[str]:
+        return self.prompt_registry.get_template(prompt_name, source_lang, target_lang)
+
+    def _segment_text(self, text: str, segment_size: Optional[int]) -> List[str]:
         """
         Segmenta el texto en partes manejables basadas en un tamaño objetivo,
         respetando oraciones y párrafos usando búsqueda hacia atrás inteligente.
 
         Args:
             text (str): Texto completo a segmentar
+            segment_size (Optional[int]): Tamaño objetivo de cada segmento (None = sin segmentar)
 
         Returns:
             List[str]: Lista de segmentos de texto con cortes naturales
         """
-        if self.segment_size is None:
+        if segment_size is None:
             return [text]
 
         segments = []
@@ -138,7 +141,7 @@ class TranslatorLogic:
 
         while current_position < len(text):
             # Calcular posición objetivo (guía, no corte fijo)
-            target_position = min(current_position + self.segment_size, len(text))
+            target_position = min(current_position + segment_size, len(text))
 
             # Buscar punto de corte óptimo hacia atrás desde el objetivo
             cut_position = self._find_optimal_cut_point(text, target_position)
@@ -325,7 +328,7 @@ class TranslatorLogic:
 
     def _build_check_prompt(self, source_lang: str, target_lang: str,
                             original_text: str, translated_text: str,
-                            custom_terms: str = "") -> Dict:
+                            custom_terms: str = "", filter_terms: bool = True) -> Dict:
         """
         Construye el prompt para comprobar la calidad de la traducción.
         
@@ -335,14 +338,14 @@ class TranslatorLogic:
             original_text (str): Texto original completo
             translated_text (str): Texto traducido completo
             custom_terms (str): Términos personalizados para la traducción
+            filter_terms (bool): Incluir solo los términos presentes en el texto original
 
         Returns:
             Dict: Prompt estructurado con roles system y user
         """
-        check_prompt_template = self._load_prompt("check.txt", source_lang, target_lang)
-        prompt_content = self._handle_terminology_section(check_prompt_template, custom_terms)
-        prompt_content = prompt_content.replace("{source_lang}", source_lang)
-        prompt_content = prompt_content.replace("{target_lang}", target_lang)
+        if filter_terms:
+            custom_terms = self._terms_for_text(custom_terms, original_text, "comprobación")
+        prompt_content = self.prompt_registry.render("check.txt", source_lang, target_lang, custom_terms)
         
         # Crear estructura con roles
         messages = [
@@ -354,7 +357,8 @@ class TranslatorLogic:
 
     def _build_refine_prompt(self, source_lang: str, target_lang: str,
                               source_text: str, translated_text: str,
-                              custom_terms: str = "", prompt_name: str = "refine.txt") -> Dict:
+                              custom_terms: str = "", prompt_name: str = "refine.txt",
+                              filter_terms: bool = True) -> Dict:
         """
         Construye el prompt para refinar la traducción.
 
@@ -365,14 +369,14 @@ class TranslatorLogic:
             translated_text (str): Texto traducido a refinar
             custom_terms (str): Términos personalizados para la traducción
             prompt_name (str): Nombre del archivo de prompt a usar
+            filter_terms (bool): Incluir solo los términos presentes en el texto original
 
         Returns:
             Dict: Prompt estructurado con roles system y user
         """
-        refine_prompt_template = self._load_prompt(prompt_name, source_lang, target_lang)
-        prompt_content = self._handle_terminology_section(refine_prompt_template, custom_terms)
-        prompt_content = prompt_content.replace("{source_lang}", source_lang)
-        prompt_content = prompt_content.replace("{target_lang}", target_lang)
+        if filter_terms:
+            custom_terms = self._terms_for_text(custom_terms, source_text, "refinamiento")
+        prompt_content = self.prompt_registry.render(prompt_name, source_lang, target_lang, custom_terms)
 
         # Preparar el contenido del texto traducido
         # Formato consistente para todos los prompts
@@ -389,7 +393,9 @@ class TranslatorLogic:
     def _apply_refinement_changes(self, translated_text: str, xml_response: str) -> str:
         """
         Aplica los cambios de refinamiento desde la respuesta XML al texto traducido.
-        Busca y reemplaza cadenas exactas en lugar de trabajar con líneas numeradas.
+        Busca y reemplaza cadenas (con la misma tolerancia que el modo por tools) en
+        lugar de trabajar con líneas numeradas. Las posiciones se resuelven sobre el texto original y todos los cambios se
+        aplican juntos en una sola pasada.
 
         Args:
             translated_text (str): Texto traducido original
@@ -430,25 +436,32 @@ class TranslatorLogic:
                         replacement_text = replacement.text.strip()
                         changes.append(('add', position_text, replacement_text, None))
 
-            # Aplicar cambios en orden inverso para no afectar posiciones
+            # Todas las posiciones se resuelven contra el texto original y se aplican juntas
             applied_changes = 0
-            result_text = translated_text
+            batch = EditBatch(translated_text)
+            index = QGramIndex(translated_text)
 
             # Procesar cambios de eliminación y reemplazo primero
-            for change_type, original, replacement, _ in reversed(changes):
+            for change_type, original, replacement, _ in changes:
                 try:
                     if change_type == 'delete':
-                        if original and original in result_text:
-                            result_text = result_text.replace(original, '', 1)  # Reemplazar solo la primera ocurrencia
-                            applied_changes += 1
-                            session_logger.log_info(f"Eliminado: '{original}'")
+                        match = self._resolve_span(batch, translated_text, original, index)
+                        if original and match:
+                            if batch.add(match[0], match[1], '', change_type):
+                                applied_changes += 1
+                                session_logger.log_info(f"Eliminado: '{original}'")
+                            else:
+                                session_logger.log_warning(f"No se pudo eliminar: '{original}' se solapa con otro cambio")
                         else:
                             session_logger.log_warning(f"No se pudo eliminar: '{original}' no encontrado o vacío")
                     elif change_type == 'replace':
-                        if original and replacement and original in result_text:
-                            result_text = result_text.replace(original, replacement, 1)  # Reemplazar solo la primera ocurrencia
-                            applied_changes += 1
-                            session_logger.log_info(f"Reemplazado: '{original}' → '{replacement}'")
+                        match = self._resolve_span(batch, translated_text, original, index)
+                        if original and replacement and match:
+                            if batch.add(match[0], match[1], replacement, change_type):
+                                applied_changes += 1
+                                session_logger.log_info(f"Reemplazado: '{original}' → '{replacement}'")
+                            else:
+                                session_logger.log_warning(f"No se pudo reemplazar: '{original}' se solapa con otro cambio")
                         else:
                             session_logger.log_warning(f"No se pudo reemplazar: '{original}' o '{replacement}' no encontrado/vacío")
                 except Exception as e:
@@ -458,17 +471,20 @@ class TranslatorLogic:
             for change_type, position, replacement, _ in changes:
                 try:
                     if change_type == 'add':
-                        if position and replacement and position in result_text:
+                        match = self._resolve_span(batch, translated_text, position, index, insert=True)
+                        if position and replacement and match:
                             # Insertar después de la posición de referencia
-                            pos = result_text.find(position) + len(position)
-                            result_text = result_text[:pos] + replacement + result_text[pos:]
-                            applied_changes += 1
-                            session_logger.log_info(f"Agregado después de: '{position}' → '{replacement}'")
+                            if batch.add(match[1], match[1], replacement, change_type):
+                                applied_changes += 1
+                                session_logger.log_info(f"Agregado después de: '{position}' → '{replacement}'")
+                            else:
+                                session_logger.log_warning(f"No se pudo agregar: '{position}' queda dentro de otro cambio")
                         else:
                             session_logger.log_warning(f"No se pudo agregar: posición '{position}' no encontrada o datos incompletos")
                 except Exception as e:
                     session_logger.log_error(f"Error aplicando adición: {e}")
 
+            result_text = batch.apply()
             session_logger.log_info(f"Cambios aplicados exitosamente: {applied_changes}")
             return result_text
 
@@ -508,10 +524,23 @@ class TranslatorLogic:
 
         return xml_response
 
-    def _find_best_match(self, text: str, search_string: str, threshold: float = 0.75) -> tuple:
+    def _find_best_match(self, text: str, search_string: str, threshold: float = 0.75,
+                         index: Optional[QGramIndex] = None) -> tuple:
         """
         Busca la mejor coincidencia de search_string dentro de text usando 3 niveles de tolerancia.
-        Version optimizada para mitigar cuellos de botella de CPU.
+
+        El nivel difuso usa un índice de q-gramas para elegir pocas ventanas candidatas
+        y las verifica con distancia de edición acotada por el umbral (Myers
+        bit-paralelo), descartando sin más cálculo las que no pueden alcanzarlo.
+
+        Args:
+            text (str): Texto donde buscar
+            search_string (str): Fragmento a localizar
+            threshold (float): Similitud mínima para aceptar una coincidencia difusa
+            index (Optional[QGramIndex]): Índice de text reutilizable entre búsquedas
+
+        Returns:
+            tuple: (inicio, fin, similitud) o None si no hay coincidencia
         """
         if not search_string or not text:
             return None
@@ -536,69 +565,52 @@ class TranslatorLogic:
         except Exception:
             pass
 
-        # Nivel 3: Busqueda difusa anclada (Altamente optimizada)
-        # Identificar las palabras mas largas para usarlas como anclas de busqueda
-        words = [w for w in search_string.split() if len(w) > 4]
-        if not words:
-            words = search_string.split()
-          
-        anchor_words = sorted(words, key=len, reverse=True)[:3]
-        candidate_indices = set()
-      
-        # Encontrar indices donde aparecen las palabras ancla
-        for word in anchor_words:
-            idx = 0
-            while True:
-                idx = text.find(word, idx)
-                if idx == -1:
-                    break
-                candidate_indices.add(idx)
-                idx += 1
-              
-        search_len = len(search_string)
-        best_ratio = 0.0
-        best_start = 0
-        best_end = 0
-      
-        # Si no hay anclas, iterar por bloques de texto (fallback seguro)
-        if not candidate_indices:
-            candidate_indices = set(range(0, len(text), search_len // 2))
+        # Nivel 3: Busqueda difusa sobre las ventanas que comparten más q-gramas
+        if index is None or index.text != text:
+            index = QGramIndex(text)
+        return index.find(search_string, threshold)
 
-        # Evaluar ventanas unicamente alrededor de los indices candidatos
-        min_window = max(1, int(search_len * 0.8))
-        max_window = min(len(text), int(search_len * 1.2))
-      
-        for base_idx in candidate_indices:
-            # Ampliar el rango de busqueda alrededor del ancla
-            start_range = max(0, base_idx - search_len)
-            end_range = min(len(text), base_idx + search_len)
-          
-            for i in range(start_range, end_range, max(1, search_len // 10)):
-                for window_size in (min_window, search_len, max_window):
-                    if i + window_size > len(text):
-                        continue
-                      
-                    candidate = text[i:i + window_size]
-                    ratio = difflib.SequenceMatcher(None, search_string, candidate).ratio()
-                  
-                    if ratio > best_ratio:
-                        best_ratio = ratio
-                        best_start = i
-                        best_end = i + window_size
-                  
-                    if best_ratio > 0.95:
-                        return (best_start, best_end, best_ratio)
-
-        if best_ratio >= threshold:
-            return (best_start, best_end, best_ratio)
-      
-        return None
+    def _next_free_occurrence(self, batch: EditBatch, text: str, fragment: str,
+                              match: tuple, insert: bool = False) -> tuple:
+        """
+        Si una coincidencia exacta choca con un cambio ya aceptado en el lote, busca la
+        siguiente aparición del mismo fragmento que esté libre.
 
+        Args:
+            batch (EditBatch): Lote de cambios en construcción
+            text (str): Texto original sobre el que se resuelven las posiciones
+            fragment (str): Fragmento buscado
+            match (tuple): Coincidencia encontrada (inicio, fin, similitud)
+            insert (bool): True si el cambio es una inserción al final del fragmento
+
+        Returns:
+            tuple: Coincidencia libre, o la original si no hay otra aparición
+        """
+        start, end, ratio = match
+        fragment = fragment.strip()
+        while ratio == 1.0 and batch.conflict_for(end if insert else start, end) is not None:
+            start = text.find(fragment, start + 1)
+            if start == -1:
+                return match
+            end = start + len(fragment)
+        return start, end, ratio
+
+    def _resolve_span(self, batch: EditBatch, text: str, fragment: str,
+                      index: QGramIndex, insert: bool = False) -> Optional[tuple]:
+        """Localiza fragment en el texto original con tolerancia y evita choques con el lote"""
+        match = self._find_best_match(text, fragment, index=index)
+        if not match:
+            return None
+        return self._next_free_occurrence(batch, text, fragment, match, insert)
 
     def _apply_tool_refinement(self, translated_text: str, tool_response: str) -> str:
         """
         Aplica los cambios de refinamiento desde tool calls al texto traducido
         utilizando búsqueda difusa (fuzzy matching) para tolerar variaciones del LLM.
+
+        Todos los fragmentos se localizan sobre el texto original, los cambios que se
+        solapan con otro anterior se descartan y el resultado se construye en una sola
+        pasada al final.
         """
         try:
             response_data = json.loads(tool_response)
@@ -616,7 +628,9 @@ class TranslatorLogic:
                 session_logger.log_info("No se recibieron tool calls - sin cambios necesarios")
                 return translated_text
 
-            result_text = translated_text
+            # Índice de q-gramas del texto original, compartido por todas las búsquedas difusas
+            index = QGramIndex(translated_text)
+            batch = EditBatch(translated_text)
             applied = 0
             failed = 0
 
@@ -630,20 +644,24 @@ class TranslatorLogic:
                         session_logger.log_info(
                             f"Modelo indica que no se necesitan cambios (confianza: {confidence})"
                         )
-                        return result_text
+                        break
 
                     elif name == "replace_text":
                         original = args.get("original", "")
                         replacement = args.get("replacement", "")
                         reason = args.get("reason", "")
 
-                        match = self._find_best_match(result_text, original)
+                        match = self._find_best_match(translated_text, original, index=index)
                         
                         if match:
-                            start, end, ratio = match
-                            matched_text = result_text[start:end]
-                            # Aplicar reemplazo mediante slicing
-                            result_text = result_text[:start] + replacement + result_text[end:]
+                            start, end, ratio = self._next_free_occurrence(batch, translated_text, original, match)
+                            matched_text = translated_text[start:end]
+                            if not batch.add(start, end, replacement, name):
+                                failed += 1
+                                session_logger.log_warning(
+                                    f"[replace] Se solapa con otro cambio, se omite: '{matched_text[:80]}...'"
+                                )
+                                continue
                             applied += 1
                             
                             match_type = "Exact" if ratio == 1.0 else f"Fuzzy ({ratio:.2f})"
@@ -658,13 +676,17 @@ class TranslatorLogic:
                         original = args.get("original", "")
                         reason = args.get("reason", "")
 
-                        match = self._find_best_match(result_text, original)
+                        match = self._find_best_match(translated_text, original, index=index)
                         
                         if match:
-                            start, end, ratio = match
-                            matched_text = result_text[start:end]
-                            # Aplicar eliminación mediante slicing
-                            result_text = result_text[:start] + result_text[end:]
+                            start, end, ratio = self._next_free_occurrence(batch, translated_text, original, match)
+                            matched_text = translated_text[start:end]
+                            if not batch.add(start, end, "", name):
+                                failed += 1
+                                session_logger.log_warning(
+                                    f"[delete] Se solapa con otro cambio, se omite: '{matched_text[:80]}...'"
+                                )
+                                continue
                             applied += 1
                             
                             match_type = "Exact" if ratio == 1.0 else f"Fuzzy ({ratio:.2f})"
@@ -680,12 +702,19 @@ class TranslatorLogic:
                         content = args.get("content", "")
                         reason = args.get("reason", "")
 
-                        match = self._find_best_match(result_text, anchor)
+                        match = self._find_best_match(translated_text, anchor, index=index)
                         
                         if match and content:
-                            start, end, ratio = match
+                            start, end, ratio = self._next_free_occurrence(
+                                batch, translated_text, anchor, match, insert=True
+                            )
                             # Insertar después del ancla
-                            result_text = result_text[:end] + content + result_text[end:]
+                            if not batch.add(end, end, content, name):
+                                failed += 1
+                                session_logger.log_warning(
+                                    f"[insert] El ancla queda dentro de otro cambio, se omite: '{anchor[:80]}...'"
+                                )
+                                continue
                             applied += 1
                             
                             match_type = "Exact" if ratio == 1.0 else f"Fuzzy ({ratio:.2f})"
@@ -706,7 +735,7 @@ class TranslatorLogic:
             session_logger.log_info(
                 f"Refinamiento por tools completado: {applied} aplicados, {failed} fallidos de {len(tool_calls)} total"
             )
-            return result_text
+            return batch.apply()
 
         except json.JSONDecodeError as e:
             session_logger.log_error(f"Error parseando respuesta de tools: {e}")
@@ -715,6 +744,151 @@ class TranslatorLogic:
             session_logger.log_error(f"Error general aplicando refinamiento por tools: {e}")
             return translated_text
 
+    def _locate_in_paragraph(self, document, paragraph_id, fragment: str) -> Optional[tuple]:
+        """
+        Localiza un fragmento dentro del párrafo indicado.
+
+        El párrafo se obtiene por su identificador en tiempo constante y la búsqueda
+        (exacta y, si falla, difusa) se limita a ese párrafo. Solo si el identificador
+        no existe o el fragmento no está en ese párrafo se busca en todo el documento.
+
+        Args:
+            document (ParagraphDocument): Documento con identificadores de párrafo
+            paragraph_id: Identificador indicado por el modelo (ej. "P12")
+            fragment (str): Texto a localizar dentro del párrafo
+
+        Returns:
+            Optional[tuple]: (línea, inicio, fin, ratio, búsqueda global) o None si no se encuentra
+        """
+        line_number = document.index.get(document.normalize_id(paragraph_id))
+        if line_number is not None:
+            match = self._find_best_match(document.lines[line_number], fragment)
+            if match:
+                return (line_number,) + match + (False,)
+
+        # Fallback: búsqueda difusa en todo el documento, aceptada solo dentro de una línea
+        full_text = document.text()
+        match = self._find_best_match(full_text, fragment)
+        if not match:
+            return None
+        start, end, ratio = match
+        line_start = full_text.rfind('\n', 0, start) + 1
+        line_number = full_text.count('\n', 0, start)
+        if '\n' in full_text[start:end]:
+            return None
+        return line_number, start - line_start, end - line_start, ratio, True
+
+    def _apply_paragraph_tool_refinement(self, translated_text: str, tool_response: str) -> str:
+        """
+        Aplica tool calls que indican el párrafo de cada cambio (modo refine_paragraphs.txt).
+
+        Los identificadores y las posiciones se resuelven sobre el texto sin modificar,
+        así que se mantienen estables durante todo el lote de cambios.
+        """
+        from src.logic.refine_tools import ParagraphDocument
+
+        try:
+            response_data = json.loads(tool_response)
+        except json.JSONDecodeError as e:
+            session_logger.log_error(f"Error parseando respuesta de tools: {e}")
+            return translated_text
+
+        if "text_response" in response_data:
+            session_logger.log_warning(
+                "El modelo respondió con texto en lugar de usar tools. "
+                "Retornando texto original sin cambios."
+            )
+            return translated_text
+
+        tool_calls = response_data.get("tool_calls", [])
+        if not tool_calls:
+            session_logger.log_info("No se recibieron tool calls - sin cambios necesarios")
+            return translated_text
+
+        document = ParagraphDocument(translated_text)
+        batch = EditBatch(translated_text)
+        applied = 0
+        failed = 0
+
+        for call in tool_calls:
+            name = call.get("name")
+            args = call.get("arguments", {})
+            paragraph_id = args.get("paragraph_id", "")
+
+            try:
+                if name == "no_changes_needed":
+                    session_logger.log_info(
+                        f"Modelo indica que no se necesitan cambios (confianza: {args.get('confidence', 'unknown')})"
+                    )
+                    break
+
+                if name not in ("replace_text", "delete_text", "insert_text"):
+                    session_logger.log_warning(f"Tool desconocido: {name}")
+                    continue
+
+                content = args.get("content", "")
+                fragment = args.get("anchor", "") if name == "insert_text" else args.get("original", "")
+
+                if name == "insert_text" and not fragment.strip():
+                    # Sin ancla: añadir al final del párrafo
+                    paragraph = document.get(paragraph_id)
+                    if paragraph is None or not content:
+                        failed += 1
+                        session_logger.log_warning(f"[insert] Párrafo no encontrado: '{paragraph_id}'")
+                        continue
+                    separator = "" if paragraph.endswith((" ", "\t")) or content.startswith((" ", "\t")) else " "
+                    line_number = document.index[document.normalize_id(paragraph_id)]
+                    paragraph_end = document.offsets[line_number] + len(paragraph)
+                    if not batch.add(paragraph_end, paragraph_end, separator + content, name):
+                        failed += 1
+                        continue
+                    applied += 1
+                    session_logger.log_info(f"[{paragraph_id} insert] Al final → '{content[:40]}...'")
+                    continue
+
+                location = self._locate_in_paragraph(document, paragraph_id, fragment)
+                if not location:
+                    failed += 1
+                    session_logger.log_warning(
+                        f"[{name}] No encontrado en {paragraph_id or 'el documento'}: '{fragment[:80]}...'"
+                    )
+                    continue
+
+                line_number, start, end, ratio, global_search = location
+                line = document.lines[line_number]
+                line_offset = document.offsets[line_number]
+                if name == "replace_text":
+                    accepted = batch.add(line_offset + start, line_offset + end, args.get("replacement", ""), name)
+                elif name == "delete_text":
+                    accepted = batch.add(line_offset + start, line_offset + end, "", name)
+                else:
+                    if not content:
+                        failed += 1
+                        continue
+                    accepted = batch.add(line_offset + end, line_offset + end, content, name)
+                if not accepted:
+                    failed += 1
+                    session_logger.log_warning(
+                        f"[{paragraph_id} {name}] Se solapa con otro cambio, se omite: '{line[start:end][:80]}...'"
+                    )
+                    continue
+                applied += 1
+
+                match_type = "Exact" if ratio == 1.0 else f"Fuzzy ({ratio:.2f})"
+                if global_search:
+                    match_type += ", fuera del párrafo indicado"
+                session_logger.log_info(
+                    f"[{paragraph_id} {name} {match_type}] '{line[start:end][:40]}...'"
+                )
+            except Exception as e:
+                failed += 1
+                session_logger.log_error(f"Error aplicando tool call '{name}': {e}")
+
+        session_logger.log_info(
+            f"Refinamiento por párrafos completado: {applied} aplicados, {failed} fallidos de {len(tool_calls)} total"
+        )
+        return batch.apply()
+
     def _get_api_key_for_provider(self, provider: str) -> str:
         """
         Obtiene la API key para un proveedor específico, priorizando temporales y luego .env.
@@ -733,7 +907,8 @@ class TranslatorLogic:
                              source_lang: str, target_lang: str,
                              main_api_key: str, check_provider: str, check_model: str,
                              custom_terms: str = "", temp_api_keys: dict = None, retry_on_failure: bool = True, timeout: int = 120,
-                             stop_callback: Optional[Callable[[], bool]] = None) -> bool:
+                             stop_callback: Optional[Callable[[], bool]] = None, filter_terms: bool = True,
+                             check_cache=None) -> bool:
         """
         Comprueba la calidad de la traducción usando la API.
 
@@ -749,10 +924,47 @@ class TranslatorLogic:
             check_model (str): Modelo para comprobación
             temp_api_keys (dict): Diccionario de API keys temporales (opcional)
             retry_on_failure (bool): Si True, reintenta una vez en caso de fallo
+            filter_terms (bool): Incluir en el prompt solo los términos presentes en el original
+            check_cache (Optional[TranslationDatabase]): Base de datos donde se guardan los
+                veredictos; si el mismo original, traducción, modelo y prompt ya se
+                comprobaron, se reutiliza el resultado sin llamar a la API
 
         Returns:
             bool: Resultado de la comprobación
         """
+        provider_config = self.models_config.get(check_provider)
+        if not provider_config:
+            print(f"Proveedor no soportado para comprobación: {check_provider}")
+            return False
+        model_config = provider_config['models'].get(check_model)
+        if not model_config:
+            print(f"Modelo no soportado para comprobación: {check_model}")
+            return False
+
+        # Con caché de prompts se mantiene el glosario completo para no alterar el prefijo
+        filter_terms = filter_terms and not translator_req.uses_prompt_cache(model_config)
+        prompt = self._build_check_prompt(source_lang, target_lang, original_text, translated_text,
+                                          custom_terms, filter_terms)
+
+        # Veredicto guardado para exactamente el mismo contenido y configuración
+        cache_key = None
+        if check_cache is not None:
+            cache_key = (
+                content_hash(original_text),
+                content_hash(translated_text),
+                check_provider,
+                check_model,
+                content_hash(prompt["messages"][0]["content"])
+            )
+            cached = check_cache.get_check_result(*cache_key)
+            if cached is not None:
+                verdict = "aprobada" if cached["passed"] else "rechazada"
+                session_logger.log_info(
+                    f"Comprobación en caché ({cached['checked_date']}): {verdict}"
+                    + (f" - {cached['comments']}" if cached["comments"] else "")
+                )
+                return cached["passed"]
+
         # Obtener API key específica para el proveedor de comprobación
         if temp_api_keys and check_provider in temp_api_keys:
             api_key = temp_api_keys[check_provider]
@@ -764,32 +976,28 @@ class TranslatorLogic:
             return False
 
         session_logger.log_info(f"Iniciando comprobación con Proveedor: {check_provider}, Modelo: {check_model}")
-        prompt = self._build_check_prompt(source_lang, target_lang, original_text, translated_text, custom_terms)
 
-        provider_config = self.models_config.get(check_provider)
-        if not provider_config:
-            print(f"Proveedor no soportado para comprobación: {check_provider}")
-            return False
-        model_config = provider_config['models'].get(check_model)
-        if not model_config:
-            print(f"Modelo no soportado para comprobación: {check_model}")
-            return False
+        def remember(is_ok: bool, comments: Optional[str], parsed: bool) -> None:
+            # Solo se guardan los veredictos claros: una respuesta inesperada no es un "No"
+            if cache_key is not None and parsed:
+                check_cache.save_check_result(*cache_key, is_ok, comments or "")
 
         def query_model():
-            return translator_req.translate_segment(
+            return self._send_request(
                 check_provider,
                 "",  # texto ya incluido en prompt, pasar vacío para evitar doble agregado
                 api_key,
                 model_config,
                 prompt,
-                self.models_config,
-                timeout
+                timeout,
+                stop_callback=stop_callback
             )
 
-        def _parse_check_response(response: str) -> (bool, Optional[str]):
+        def _parse_check_response(response: str) -> (bool, Optional[str], bool):
             """
             Parses the check response in XML format.
-            Extracts the result (Yes/No) and comments separately.
+            Extracts the result (Yes/No) and comments separately; the last value is
+            False when the response had no clear Yes/No.
             """
             import re
             
@@ -811,11 +1019,11 @@ class TranslatorLogic:
                     # Log comments if present
                     if comments:
                         session_logger.log_info(f"Check comments: {comments}")
-                    return True, None
+                    return True, comments or None, True
                 elif check_result == "no":
-                    return False, comments if comments else "Respuesta No sin causa especificada"
+                    return False, comments if comments else "Respuesta No sin causa especificada", True
                 else:
-                    return False, f"Respuesta inesperada: {response}"
+                    return False, f"Respuesta inesperada: {response}", False
             else:
                 # Fallback to old format for backward compatibility
                 response_lines = response.strip().split('\n')
@@ -829,11 +1037,11 @@ class TranslatorLogic:
                         cause = line.split(":", 1)[1].strip()
 
                 if check_result == "yes":
-                    return True, None
+                    return True, None, True
                 elif check_result == "no":
-                    return False, cause
+                    return False, cause, True
                 else:
-                    return False, f"Respuesta inesperada: {response}"
+                    return False, f"Respuesta inesperada: {response}", False
 
         try:
             # Verificar si se ha solicitado detener antes de hacer la llamada API
@@ -846,7 +1054,8 @@ class TranslatorLogic:
                 session_logger.log_error("Error en la comprobación de la traducción (respuesta nula)")
                 return False
 
-            is_ok, cause = _parse_check_response(response)
+            is_ok, cause, parsed = _parse_check_response(response)
+            remember(is_ok, cause, parsed)
 
             if is_ok:
                 # Only log the response if it doesn't contain XML format (to avoid duplication)
@@ -874,7 +1083,8 @@ class TranslatorLogic:
                     session_logger.log_error("Error en la comprobación de la traducción (reintento respuesta nula)")
                     return False
 
-                is_ok_retry, cause_retry = _parse_check_response(response_retry)
+                is_ok_retry, cause_retry, parsed_retry = _parse_check_response(response_retry)
+                remember(is_ok_retry, cause_retry, parsed_retry)
 
                 if is_ok_retry:
                     session_logger.log_info(f"Comprobación exitosa en reintento - Respuesta: {response_retry}")
@@ -898,13 +1108,15 @@ class TranslatorLogic:
                               custom_terms: str = "", temp_api_keys: dict = None, timeout: int = 120,
                               stop_callback: Optional[Callable[[], bool]] = None, 
                               prompt_name: str = "refine.txt",
-                              use_tools: bool = False) -> Optional[str]:
+                              use_tools: bool = False, filter_terms: bool = True,
+                              paragraph_ids: bool = False) -> Optional[str]:
         """
         Refina la traducción usando la API.
-        Soporta tres modos:
+        Soporta cuatro modos:
           - refine.txt: regeneración completa del texto
           - refine_alt.txt: cambios XML parciales
           - use_tools=True: function calling para cambios quirúrgicos
+          - use_tools=True y paragraph_ids=True: function calling con cambios por párrafo
 
         Args:
             source_text (str): Texto original
@@ -918,6 +1130,8 @@ class TranslatorLogic:
             temp_api_keys (dict): Diccionario de API keys temporales (opcional)
             prompt_name (str): Nombre del archivo de prompt a usar
             use_tools (bool): Si True, usa function calling en lugar de otros métodos
+            filter_terms (bool): Incluir en el prompt solo los términos presentes en el original
+            paragraph_ids (bool): Con tools, enviar el texto con identificadores de párrafo
 
         Returns:
             Optional[str]: Texto refinado si tiene éxito, None si falla o error
@@ -933,8 +1147,6 @@ class TranslatorLogic:
             return None
 
         session_logger.log_info(f"Iniciando refinamiento con Proveedor: {refine_provider}, Modelo: {refine_model}")
-        prompt = self._build_refine_prompt(source_lang, target_lang, source_text, translated_text, custom_terms, prompt_name)
-
         provider_config = self.models_config.get(refine_provider)
         if not provider_config:
             print(f"Proveedor no soportado para refinamiento: {refine_provider}")
@@ -945,6 +1157,9 @@ class TranslatorLogic:
             print(f"Modelo no soportado para refinamiento: {refine_model}")
             return None
 
+        # Con caché de prompts se mantiene el glosario completo para no alterar el prefijo
+        filter_terms = filter_terms and not translator_req.uses_prompt_cache(model_config)
+
         # Determinar si usar tools automáticamente según soporte del modelo
         # Solo usar tools si:
         # 1. use_tools=True explícitamente Y
@@ -954,7 +1169,15 @@ class TranslatorLogic:
         actual_prompt_name = prompt_name
         
         if use_tools:
-            if model_config.get('supports_tools', False):
+            if model_config.get('supports_tools', False) and paragraph_ids:
+                # Cambios direccionados por párrafo: sin búsqueda en todo el documento
+                from src.logic.refine_tools import PARAGRAPH_REFINE_TOOLS
+                tools_to_use = PARAGRAPH_REFINE_TOOLS
+                actual_prompt_name = "refine_paragraphs.txt"
+                session_logger.log_info(
+                    f"Usando function calling por párrafos para refinamiento con {refine_model}"
+                )
+            elif model_config.get('supports_tools', False):
                 # El modelo soporta tools, importar y usar
                 from src.logic.refine_tools import REFINE_TOOLS
                 tools_to_use = REFINE_TOOLS
@@ -977,20 +1200,24 @@ class TranslatorLogic:
                 return None
 
             # Construir el prompt
+            prompt_translation = translated_text
+            if actual_prompt_name == "refine_paragraphs.txt":
+                from src.logic.refine_tools import ParagraphDocument
+                prompt_translation = ParagraphDocument(translated_text).render()
             prompt = self._build_refine_prompt(
-                source_lang, target_lang, source_text, translated_text, 
-                custom_terms, actual_prompt_name
+                source_lang, target_lang, source_text, prompt_translation, 
+                custom_terms, actual_prompt_name, filter_terms
             )
 
-            response = translator_req.translate_segment(
+            response = self._send_request(
                 refine_provider,
                 "",  # texto ya incluido en prompt
                 api_key,
                 model_config,
                 prompt,
-                self.models_config,
                 timeout,
-                tools=tools_to_use
+                tools=tools_to_use,
+                stop_callback=stop_callback
             )
 
             if response is None:
@@ -998,7 +1225,9 @@ class TranslatorLogic:
                 return None
 
             # Procesar según el modo
-            if use_tools:
+            if use_tools and actual_prompt_name == "refine_paragraphs.txt":
+                return self._apply_paragraph_tool_refinement(translated_text, response)
+            elif use_tools:
                 return self._apply_tool_refinement(translated_text, response)
             elif actual_prompt_name == "refine_alt.txt":
                 return self._apply_refinement_changes(translated_text, response)
@@ -1010,31 +1239,149 @@ class TranslatorLogic:
             session_logger.log_error(f"Error al hacer el refinamiento: {str(e)}")
             return None
 
-    def _perform_translation(self, text: str, source_lang: str, target_lang: str,
-                              api_key: str, provider: str, model: str,
-                              custom_terms: str, enable_refine: bool,
-                              refine_provider: str, refine_model: str,
-                              temp_api_keys: dict, segmentation_config: Optional[Dict] = None,
-                              timeout: int = 120, stop_callback: Optional[Callable[[], bool]] = None) -> Optional[str]:
+    def _align_refine_segments(self, source_text: str, translated_text: str,
+                               segment_size: int) -> Optional[List[tuple]]:
+        """
+        Divide original y traducción en pares de segmentos alineados por párrafo.
+
+        Los cortes se toman de _segment_text sobre el original; solo se conservan los
+        que caen entre párrafos. Como la traducción mantiene un párrafo por párrafo,
+        cada corte se traslada a la traducción contando párrafos (líneas no vacías).
+
+        Args:
+            source_text (str): Texto original
+            translated_text (str): Traducción completa
+            segment_size (int): Tamaño objetivo de cada segmento del original
+
+        Returns:
+            Optional[List[tuple]]: (segmento original, inicio, fin) con la posición del
+            segmento en la traducción, o None si los párrafos no coinciden
+        """
+        source_text = source_text.replace('\r\n', '\n')
+        segments = self._segment_text(source_text, segment_size)
+        if ''.join(segments) != source_text:
+            return None
+
+        def paragraph_spans(text: str) -> List[tuple]:
+            spans = []
+            position = 0
+            for line in text.split('\n'):
+                if line.strip():
+                    spans.append((position, position + len(line)))
+                position += len(line) + 1
+            return spans
+
+        source_spans = paragraph_spans(source_text)
+        translated_spans = paragraph_spans(translated_text)
+        if not source_spans or len(source_spans) != len(translated_spans):
+            return None
+
+        # Párrafos que preceden a cada corte válido (entre párrafos)
+        paragraph_cuts = []
+        cut = 0
+        for segment in segments[:-1]:
+            cut += len(segment)
+            if source_text[cut - 1] == '\n' or source_text[cut] == '\n':
+                paragraph_cuts.append(sum(1 for _, end in source_spans if end <= cut))
+
+        pairs = []
+        first = 0
+        for last in sorted(set(paragraph_cuts)) + [len(source_spans)]:
+            if last <= first:
+                continue
+            source_segment = source_text[source_spans[first][0]:source_spans[last - 1][1]]
+            pairs.append((source_segment, translated_spans[first][0], translated_spans[last - 1][1]))
+            first = last
+        return pairs
+
+    def _refine_translation_segmented(self, source_text: str, translated_text: str,
+                                      segment_size: int, max_parallel: int = 1,
+                                      **refine_kwargs) -> Optional[str]:
+        """
+        Refina un capítulo largo por segmentos alineados y combina los resultados.
+
+        Cada par (original, traducción) se refina en una petición independiente, en
+        paralelo hasta max_parallel. Los segmentos refinados se aplican juntos sobre la
+        traducción completa; si un segmento falla se conserva su traducción.
+
+        Args:
+            source_text (str): Texto original
+            translated_text (str): Traducción completa
+            segment_size (int): Tamaño objetivo de cada segmento del original
+            max_parallel (int): Segmentos refinados a la vez
+            **refine_kwargs: Resto de parámetros de _refine_translation
+
+        Returns:
+            Optional[str]: Texto refinado, o None si fallaron todos los segmentos
+        """
+        pairs = self._align_refine_segments(source_text, translated_text, segment_size)
+        if not pairs or len(pairs) == 1:
+            if pairs is None:
+                session_logger.log_warning(
+                    "Los párrafos del original y la traducción no coinciden; se refina el capítulo completo"
+                )
+            return self._refine_translation(source_text, translated_text, **refine_kwargs)
+
+        session_logger.log_info(f"Refinando por segmentos: {len(pairs)} segmentos, {max_parallel} en paralelo")
+
+        def refine_pair(pair):
+            source_segment, start, end = pair
+            return self._refine_translation(source_segment, translated_text[start:end], **refine_kwargs)
+
+        with ThreadPoolExecutor(max_workers=max(1, max_parallel)) as executor:
+            results = list(executor.map(refine_pair, pairs))
+
+        batch = EditBatch(translated_text)
+        refined_count = 0
+        for i, ((_, start, end), refined) in enumerate(zip(pairs, results), 1):
+            if refined is None:
+                session_logger.log_warning(f"Falló el refinamiento del segmento {i}, usando traducción original")
+                continue
+            refined_count += 1
+            if refined != translated_text[start:end]:
+                batch.add(start, end, refined.strip('\n'), f"segment-{i}")
+
+        if refined_count == 0:
+            return None
+        session_logger.log_info(f"Segmentos refinados: {refined_count} de {len(pairs)}")
+        return batch.apply()
+
+    def _resolve_segment_size(self, text: str, job: TranslationJob) -> (Optional[int], bool):
+        """
+        Determina el tamaño de segmento para un texto sin modificar el estado del traductor.
+
+        Returns:
+            (Optional[int], bool): Tamaño de segmento y si se activó la segmentación automática
+        """
+        segment_size = job.segment_size if job.segment_size is not None else self.segment_size
+        segmentation_config = job.segmentation_config
+        if segmentation_config and segmentation_config.get("enabled", False):
+            threshold = segmentation_config.get("threshold", 10000)
+            if len(text) > threshold:
+                segment_size = segmentation_config.get("segment_size", 5000)
+                session_logger.log_info(f"Auto-segmentation activated: text length {len(text)} > {threshold}, using segment size {segment_size}")
+                return segment_size, True
+
+        if segment_size is not None:
+            session_logger.log_info(f"Using manual segmentation with size {segment_size}")
+        else:
+            session_logger.log_info("No segmentation applied - translating full text")
+        return segment_size, False
+
+    def _perform_translation(self, text: str, job: TranslationJob) -> Optional[str]:
         """
         Realiza la traducción completa del texto: segmentación, traducción y refinamiento opcional.
- 
+
         Args:
             text (str): Texto a traducir
-            source_lang (str): Idioma de origen
-            target_lang (str): Idioma de destino
-            api_key (str): API key del servicio
-            provider (str): Identificador del proveedor
-            model (str): Identificador del modelo
-            custom_terms (str): Términos personalizados para la traducción
-            enable_refine (bool): Si True, realiza refinamiento de traducción
-            refine_provider (str): Proveedor para refinamiento
-            refine_model (str): Modelo para refinamiento
-            temp_api_keys (dict): Diccionario de API keys temporales
-            segmentation_config (Optional[Dict]): Configuración de segmentación automática
+            job (TranslationJob): Parámetros de la traducción
+
         Returns:
             Optional[str]: Texto traducido completo, None si hay error
         """
+        provider = job.provider
+        model = job.model
+        stop_callback = job.stop_callback
         try:
             provider_config = self.models_config.get(provider)
             if not provider_config:
@@ -1044,35 +1391,15 @@ class TranslatorLogic:
             if not model_config:
                 raise ValueError(f"Modelo no soportado: {model}")
 
-            # Auto-segmentation logic
-            local_segment_size = self.segment_size  # Preserve manual if set
-            auto_activated = False
-            if segmentation_config and segmentation_config.get("enabled", False):
-                threshold = segmentation_config.get("threshold", 10000)
-                if len(text) > threshold:
-                    local_segment_size = segmentation_config.get("segment_size", 5000)
-                    auto_activated = True
-                    session_logger.log_info(f"Auto-segmentation activated: text length {len(text)} > {threshold}, using segment size {local_segment_size}")
-
-            if not auto_activated:
-                if self.segment_size is not None:
-                    session_logger.log_info(f"Using manual segmentation with size {local_segment_size}")
-                else:
-                    session_logger.log_info("No segmentation applied - translating full text")
-                    local_segment_size = None
-
-            # Temporarily set segment_size for this translation
-            original_segment_size = self.segment_size
-            self.segment_size = local_segment_size
-            segments = self._segment_text(text)
-            self.segment_size = original_segment_size  # Restore original
+            segment_size, auto_activated = self._resolve_segment_size(text, job)
+            segments = self._segment_text(text, segment_size)
 
             # Verificar integridad de segmentación solo cuando auto-segmentación esté activada
             if auto_activated and not self._verify_segmentation_integrity(segments, text):
                 session_logger.log_error("Segmentación automática falló verificación de integridad - abortando traducción")
                 return None
 
-            if local_segment_size is not None:
+            if segment_size is not None:
                 # Validar integridad de los segmentos creados
                 validation_report = self._validate_segment_integrity(segments, text)
 
@@ -1089,8 +1416,17 @@ class TranslatorLogic:
             else:
                 session_logger.log_info("Segmentación deshabilitada - traduciendo texto completo")
 
+            refine_provider, refine_model = job.check_target()
+            temp_keys = job.resolved_api_keys()
             translated_segments = []
 
+            # Con caché de prompts el glosario completo forma parte del prefijo estable;
+            # filtrarlo por segmento cambiaría el prefijo en cada petición
+            filter_glossary = job.filter_glossary
+            if filter_glossary and translator_req.uses_prompt_cache(model_config):
+                filter_glossary = False
+                session_logger.log_info("Caché de prompts activa: se envía el glosario completo en cada segmento")
+
             # Traducir cada segmento
             for i, segment in enumerate(segments, 1):
                 # Verificar si se ha solicitado detener antes de procesar segmento
@@ -1100,10 +1436,15 @@ class TranslatorLogic:
 
                 session_logger.log_info(f"Traduciendo segmento {i} de {len(segments)} con {provider}/{model}")
 
-                # Construir prompt base con reemplazo de etiquetas
-                prompt_template = self._load_prompt("translation.txt", source_lang, target_lang)
-                prompt_content = self._handle_terminology_section(prompt_template, custom_terms)
-                prompt_content = prompt_content.replace("{source_lang}", source_lang).replace("{target_lang}", target_lang)
+                # Construir prompt desde la plantilla compilada del registro
+                segment_terms = job.custom_terms
+                if filter_glossary:
+                    segment_terms = self._terms_for_text(job.custom_terms, segment, f"segmento {i}")
+                prompt_content = self.prompt_registry.render(
+                    "translation.txt", job.source_lang, job.target_lang, segment_terms
+                )
+                if job.extra_instructions:
+                    prompt_content = f"{prompt_content.rstrip()}\n\n{job.extra_instructions}"
 
                 # Crear estructura con roles system/user
                 prompt = {
@@ -1118,15 +1459,15 @@ class TranslatorLogic:
                     session_logger.log_info(f"Traducción cancelada antes de llamada API en segmento {i}")
                     return None
 
-                # Delegar la petición al módulo translator_req
-                translated_segment = translator_req.translate_segment(
+                # Delegar la petición al módulo translator_req o al motor asíncrono
+                translated_segment = self._send_request(
                     provider,
                     segment,
-                    api_key,
+                    job.api_key,
                     model_config,
                     prompt,
-                    self.models_config,
-                    timeout
+                    job.timeout,
+                    stop_callback=stop_callback
                 )
 
                 if translated_segment is None:
@@ -1134,7 +1475,7 @@ class TranslatorLogic:
                     raise ValueError(f"Error traduciendo segmento {i}")
 
                 # Si enable_refine está habilitado, refinar la traducción del segmento
-                if enable_refine:
+                if job.enable_refine:
                     # Verificar antes de refinamiento
                     if stop_callback and stop_callback():
                         session_logger.log_info(f"Refinamiento cancelado en segmento {i} por solicitud del usuario")
@@ -1144,15 +1485,16 @@ class TranslatorLogic:
                     refined_segment = self._refine_translation(
                         source_text=segment,
                         translated_text=translated_segment,
-                        source_lang=source_lang,
-                        target_lang=target_lang,
-                        main_api_key=api_key,
+                        source_lang=job.source_lang,
+                        target_lang=job.target_lang,
+                        main_api_key=job.api_key,
                         refine_provider=refine_provider,
                         refine_model=refine_model,
-                        custom_terms=custom_terms,
-                        temp_api_keys=temp_api_keys,
-                        timeout=timeout,
-                        stop_callback=stop_callback
+                        custom_terms=job.custom_terms,
+                        temp_api_keys=temp_keys,
+                        timeout=job.timeout,
+                        stop_callback=stop_callback,
+                        filter_terms=job.filter_glossary
                     )
 
                     if refined_segment is not None:
@@ -1177,119 +1519,104 @@ class TranslatorLogic:
             session_logger.log_error(f"Error en la traducción: {str(e)}")
             return None
 
-    def translate_text(self, text: str, source_lang: str, target_lang: str,
-                        api_key: str, provider: str, model: str,
-                        custom_terms: str = "", enable_check: bool = True,
-                        enable_refine: bool = False,
-                        check_refine_settings: Optional[Dict] = None,
-                        segmentation_config: Optional[Dict] = None,
-                        temp_api_keys: dict = None, timeout: int = 120,
-                        stop_callback: Optional[Callable[[], bool]] = None) -> Optional[str]:
+    def _check_job_translation(self, text: str, translated_text: str, job: TranslationJob,
+                               use_model: bool = True) -> bool:
         """
-        Traduce el texto utilizando el proveedor y modelo especificados.
+        Comprueba una traducción con el proveedor/modelo de comprobación del trabajo.
+
+        Antes se ejecuta la comprobación local: los fallos evidentes se rechazan sin
+        llamar al modelo y, si se configuró, los aprobados claros también lo omiten.
+        Con use_model=False (capítulo que el muestreo dejó fuera) solo se hace la
+        comprobación local, que no cuesta peticiones.
+        """
+        precheck_config = job.precheck_config or {}
+        if precheck_config.get("enabled", False):
+            precheck = precheck_translation(text, translated_text, precheck_config)
+            if precheck.failed:
+                session_logger.log_warning(f"Pre-comprobación local falló: {precheck.summary()}")
+                return False
+            if not use_model:
+                session_logger.log_info(f"Pre-comprobación local superada; capítulo fuera de la muestra de comprobación ({precheck.summary()})")
+                return True
+            if precheck.strong and precheck_config.get("skip_llm_check_on_strong_pass", False):
+                session_logger.log_info(f"Pre-comprobación local superada; se omite la comprobación con el modelo ({precheck.summary()})")
+                return True
+            session_logger.log_info(f"Pre-comprobación local superada ({precheck.summary()})")
+        elif not use_model:
+            return True
+
+        check_provider, check_model = job.check_target()
+        return self._check_translation(
+            original_text=text,
+            translated_text=translated_text,
+            source_lang=job.source_lang,
+            target_lang=job.target_lang,
+            main_api_key=job.api_key,
+            check_provider=check_provider,
+            check_model=check_model,
+            custom_terms=job.custom_terms,
+            temp_api_keys=job.resolved_api_keys(),
+            retry_on_failure=False,  # No reintentar verificación internamente
+            timeout=job.timeout,
+            stop_callback=job.stop_callback,
+            filter_terms=job.filter_glossary,
+            check_cache=job.check_cache
+        )
+
+    def translate_job(self, text: str, job: TranslationJob) -> Optional[str]:
+        """
+        Traduce el texto según un TranslationJob. Es re-entrante: no modifica el estado
+        de la instancia, por lo que puede llamarse desde varios hilos a la vez.
 
         Incluye refinamiento opcional y verificación con reintento de traducción completa si falla.
 
         Args:
             text (str): Texto a traducir
-            source_lang (str): Idioma de origen
-            target_lang (str): Idioma de destino
-            api_key (str): API key del servicio
-            provider (str): Identificador del proveedor
-            model (str): Identificador del modelo
-            custom_terms (str): Términos personalizados para la traducción
-            enable_check (bool): Si True, realiza comprobación de traducción; si False, omite comprobación.
-            enable_refine (bool): Si True, realiza refinamiento de traducción; si False, omite refinamiento.
-            check_refine_settings (Optional[Dict]): Configuración para check/refine
-            temp_api_keys (dict): Diccionario de API keys temporales
+            job (TranslationJob): Parámetros de la traducción
 
         Returns:
             Optional[str]: Texto traducido si la comprobación pasa o no se realiza, None si falla definitivamente
         """
-        # Determine provider and model for check/refine
-        if check_refine_settings and check_refine_settings.get('use_separate_model'):
-            check_provider = check_refine_settings.get('provider', provider)
-            check_model = check_refine_settings.get('model', model)
-            refine_provider = check_refine_settings.get('provider', provider)
-            refine_model = check_refine_settings.get('model', model)
-        else:
-            check_provider = provider
-            check_model = model
-            refine_provider = provider
-            refine_model = model
-
-        # Preparar temp_api_keys para asegurar que el api_key principal se use cuando sea necesario
-        temp_keys = temp_api_keys.copy() if temp_api_keys else {}
-        if check_provider == provider and api_key:
-            temp_keys[check_provider] = api_key
-        if refine_provider == provider and api_key:
-            temp_keys[refine_provider] = api_key
-
         # Primera traducción
         session_logger.log_info("Iniciando traducción inicial")
-        full_translation = self._perform_translation(
-            text, source_lang, target_lang, api_key, provider, model,
-            custom_terms, enable_refine, refine_provider, refine_model, temp_keys,
-            segmentation_config, timeout, stop_callback
-        )
+        full_translation = self._perform_translation(text, job)
 
         if full_translation is None:
             return None
 
+        # Con muestreo activo solo una parte de los capítulos pasa por la comprobación
+        # con el modelo; la comprobación local se hace siempre
+        sampler = job.check_sampler
+        use_model = sampler is None or not job.enable_check or sampler.should_check()
+
         # Si enable_check está habilitado, hacer comprobación
-        if enable_check:
-            check_passed = self._check_translation(
-                original_text=text,
-                translated_text=full_translation,
-                source_lang=source_lang,
-                target_lang=target_lang,
-                main_api_key=api_key,
-                check_provider=check_provider,
-                check_model=check_model,
-                custom_terms=custom_terms,
-                temp_api_keys=temp_keys,
-                retry_on_failure=False,  # No reintentar verificación internamente
-                timeout=timeout,
-                stop_callback=stop_callback
-            )
+        if job.enable_check:
+            check_passed = self._check_job_translation(text, full_translation, job, use_model)
+            if sampler is not None and use_model:
+                sampler.record(check_passed)
 
             if not check_passed:
                 session_logger.log_warning("La comprobación inicial falló. Reintentando traducción completa...")
 
                 # Reintento de traducción completa
                 session_logger.log_info("Iniciando reintento de traducción")
-                retry_translation = self._perform_translation(
-                    text, source_lang, target_lang, api_key, provider, model,
-                    custom_terms, enable_refine, refine_provider, refine_model, temp_keys,
-                    segmentation_config, timeout, stop_callback
-                )
+                retry_translation = self._perform_translation(text, job)
 
                 if retry_translation is None:
                     session_logger.log_error("El reintento de traducción también falló")
                     return None
 
                 # Verificar el reintento
-                check_passed_retry = self._check_translation(
-                    original_text=text,
-                    translated_text=retry_translation,
-                    source_lang=source_lang,
-                    target_lang=target_lang,
-                    main_api_key=api_key,
-                    check_provider=check_provider,
-                    check_model=check_model,
-                    custom_terms=custom_terms,
-                    temp_api_keys=temp_keys,
-                    retry_on_failure=False,  # No reintentar verificación internamente
-                    timeout=timeout,
-                    stop_callback=stop_callback
-                )
+                check_passed_retry = self._check_job_translation(text, retry_translation, job, use_model)
+                if sampler is not None and use_model:
+                    sampler.record(check_passed_retry)
 
                 if not check_passed_retry:
                     session_logger.log_error("La comprobación del reintento también falló. Traducción marcada como fallida.")
                     return None
 
                 # Verificar si se canceló durante el reintento
-                if stop_callback and stop_callback():
+                if job.is_stop_requested():
                     session_logger.log_info("Reintento de traducción cancelado por solicitud del usuario")
                     return None
 
@@ -1300,6 +1627,114 @@ class TranslatorLogic:
         # Si pasa la comprobación o no se realiza, devolver la traducción completa
         return full_translation
 
+    def translate_incremental(self, text: str, previous_source: str, previous_translation: str,
+                              job: TranslationJob, max_changed_ratio: float = 0.5) -> Optional[str]:
+        """
+        Actualiza una traducción existente retraduciendo solo los párrafos que cambiaron.
+
+        Compara el original con el que se hizo la traducción con el actual; los párrafos
+        sin cambios conservan su traducción y cada tramo modificado se traduce por separado.
+
+        Args:
+            text (str): Original actual
+            previous_source (str): Original con el que se hizo la traducción existente
+            previous_translation (str): Traducción existente
+            job (TranslationJob): Parámetros de la traducción
+            max_changed_ratio (float): Fracción del original cambiada a partir de la cual
+                conviene retraducir el capítulo completo
+
+        Returns:
+            Optional[str]: Traducción actualizada, o None si hay que traducir el capítulo completo
+        """
+        plan = plan_incremental_update(previous_source, previous_translation, text)
+        if plan is None:
+            session_logger.log_info("Los párrafos de la traducción no coinciden con el original; se traduce completo")
+            return None
+        if plan.changed_ratio > max_changed_ratio:
+            session_logger.log_info(
+                f"Cambió el {plan.changed_ratio:.0%} del original; se traduce el capítulo completo"
+            )
+            return None
+        if not plan.changes:
+            return plan.previous_translation
+
+        session_logger.log_info(
+            f"Retraducción incremental: {len(plan.sources)} tramos modificados, "
+            f"{len(plan.changes) - len(plan.sources)} eliminados ({plan.changed_ratio:.0%} del original)"
+        )
+        # Los tramos son cortos: sin segmentar y sin contar en el muestreo de comprobación
+        span_job = replace(job, segment_size=None, segmentation_config=None, check_sampler=None)
+        translations = []
+        for source in plan.sources:
+            if job.is_stop_requested():
+                return None
+            translated = self.translate_job(source, span_job)
+            if translated is None:
+                session_logger.log_warning("Falló la traducción de un tramo modificado; se traduce el capítulo completo")
+                return None
+            translations.append(translated)
+        return plan.apply(translations)
+
+    def translate_text(self, text: str, source_lang: str, target_lang: str,
+                        api_key: str, provider: str, model: str,
+                        custom_terms: str = "", enable_check: bool = True,
+                        enable_refine: bool = False,
+                        check_refine_settings: Optional[Dict] = None,
+                        segmentation_config: Optional[Dict] = None,
+                        temp_api_keys: dict = None, timeout: int = 120,
+                        stop_callback: Optional[Callable[[], bool]] = None,
+                        segment_size: Optional[int] = None,
+                        precheck_config: Optional[Dict] = None,
+                        check_cache=None, check_sampler=None,
+                        filter_glossary: bool = True) -> Optional[str]:
+        """
+        Traduce el texto utilizando el proveedor y modelo especificados.
+
+        Construye un TranslationJob con los parámetros y delega en translate_job().
+
+        Args:
+            text (str): Texto a traducir
+            source_lang (str): Idioma de origen
+            target_lang (str): Idioma de destino
+            api_key (str): API key del servicio
+            provider (str): Identificador del proveedor
+            model (str): Identificador del modelo
+            custom_terms (str): Términos personalizados para la traducción
+            enable_check (bool): Si True, realiza comprobación de traducción; si False, omite comprobación.
+            enable_refine (bool): Si True, realiza refinamiento de traducción; si False, omite refinamiento.
+            check_refine_settings (Optional[Dict]): Configuración para check/refine
+            temp_api_keys (dict): Diccionario de API keys temporales
+            segment_size (Optional[int]): Tamaño de segmento manual para esta llamada
+            precheck_config (Optional[Dict]): Umbrales de la comprobación local previa
+            check_cache (Optional[TranslationDatabase]): Caché de veredictos de comprobación
+            check_sampler (Optional[CheckSampler]): Muestreo de capítulos a comprobar
+            filter_glossary (bool): Enviar en cada petición solo los términos presentes en su texto
+
+        Returns:
+            Optional[str]: Texto traducido si la comprobación pasa o no se realiza, None si falla definitivamente
+        """
+        job = TranslationJob(
+            source_lang=source_lang,
+            target_lang=target_lang,
+            api_key=api_key,
+            provider=provider,
+            model=model,
+            custom_terms=custom_terms,
+            enable_check=enable_check,
+            enable_refine=enable_refine,
+            check_refine_settings=check_refine_settings,
+            segmentation_config=segmentation_config,
+            segment_size=segment_size,
+            temp_api_keys=temp_api_keys or {},
+            timeout=timeout,
+            filter_glossary=filter_glossary,
+            precheck_config=precheck_config,
+            check_cache=check_cache,
+            check_sampler=check_sampler,
+            stop_callback=stop_callback
+        )
+        return self.translate_job(text, job)
+
     def get_supported_languages(self) -> Dict[str, str]:
         """
         Obtiene la lista de idiomas soportados.
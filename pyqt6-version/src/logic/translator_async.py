@@ -0,0 +1,276 @@
+import asyncio
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Callable, Dict, List, Optional
+
+from src.logic import translator_req
+from src.logic.session_logger import session_logger
+
+try:
+    import aiohttp
+except ImportError:  # Dependencia opcional: sin aiohttp se usa requests en un executor
+    aiohttp = None
+
+
+class AsyncTranslationEngine:
+    """
+    Motor de peticiones asyncio para los proveedores de traducción.
+
+    Reutiliza la construcción de peticiones y el procesamiento de respuestas de
+    translator_req, pero mantiene todas las peticiones en vuelo dentro de un único
+    event loop. Cada proveedor tiene su propio semáforo para limitar la concurrencia.
+
+    Si aiohttp no está instalado, las peticiones se delegan a translator_req en el
+    executor del loop; los semáforos siguen limitando la concurrencia por proveedor.
+    """
+
+    def __init__(self, models_config: Dict, max_concurrency: Optional[Dict[str, int]] = None,
+                 default_concurrency: int = 4):
+        """
+        Args:
+            models_config (Dict): Configuración de proveedores (translation_models.json)
+            max_concurrency (Optional[Dict[str, int]]): Peticiones simultáneas por proveedor
+            default_concurrency (int): Límite para proveedores no listados
+        """
+        self.models_config = models_config
+        self.max_concurrency = dict(max_concurrency or {})
+        self.default_concurrency = default_concurrency
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._session = None
+
+    def _get_semaphore(self, provider: str) -> asyncio.Semaphore:
+        if provider not in self._semaphores:
+            limit = self.max_concurrency.get(provider, self.default_concurrency)
+            self._semaphores[provider] = asyncio.Semaphore(max(1, limit))
+        return self._semaphores[provider]
+
+    async def _get_session(self):
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession()
+        return self._session
+
+    async def close(self) -> None:
+        """Cierra la sesión HTTP compartida"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def translate_segment(self, provider: str, text: str, api_key: str,
+                                model_config: Dict, prompt, timeout: int = 120,
+                                tools: list = None,
+                                stop_callback: Optional[Callable[[], bool]] = None) -> Optional[str]:
+        """
+        Versión asíncrona de translator_req.translate_segment.
+
+        La cancelación de la tarea (task.cancel()) interrumpe la petición en curso;
+        stop_callback se consulta además entre fragmentos de las respuestas en streaming.
+
+        Returns:
+            Optional[str]: Texto recibido o None en caso de error o cancelación
+        """
+        provider_config = self.models_config.get(provider)
+        if not provider_config:
+            session_logger.log_error(f"Proveedor no encontrado en configuración: {provider}")
+            return None
+
+        async with self._get_semaphore(provider):
+            if stop_callback and stop_callback():
+                return None
+
+            if aiohttp is None:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(
+                    None, translator_req.translate_segment,
+                    provider, text, api_key, model_config, prompt,
+                    self.models_config, timeout, tools
+                )
+
+            session_logger.log_api_request(
+                provider,
+                model_config.get("model_id", model_config.get("endpoint", "unknown")),
+                translator_req.estimate_prompt_length(text, prompt),
+            )
+            try:
+                result = await self._send(provider_config, api_key, model_config, prompt,
+                                          timeout, tools, stop_callback)
+            except asyncio.CancelledError:
+                session_logger.log_info(f"Petición a {provider} cancelada")
+                raise
+            except Exception as e:
+                error_msg = f"Error traduciendo segmento con proveedor {provider}: {str(e)}"
+                session_logger.log_api_response(provider, False, error_message=error_msg)
+                return None
+
+            if result:
+                session_logger.log_api_response(provider, True)
+            else:
+                session_logger.log_api_response(
+                    provider, False, error_message="No se obtuvo respuesta válida"
+                )
+            return result
+
+    async def _send(self, provider_config: Dict, api_key: str, model_config: Dict, prompt,
+                    timeout: int, tools: list, stop_callback) -> Optional[str]:
+        provider_type = provider_config["type"]
+        stream = model_config.get("stream", False) and not tools
+        thinking = model_config.get("thinking", False)
+
+        cached_content = None
+        if provider_type == "gemini":
+            if not tools and translator_req.uses_prompt_cache(model_config):
+                # La creación de la caché es una petición única por prompt; se hace fuera del loop
+                loop = asyncio.get_running_loop()
+                cached_content = await loop.run_in_executor(
+                    None, translator_req.get_gemini_cached_content,
+                    provider_config, api_key, model_config, prompt, timeout
+                )
+            url, headers, data = translator_req.build_gemini_request(
+                provider_config, api_key, model_config, prompt, tools, stream=stream,
+                cached_content=cached_content
+            )
+        elif provider_type == "openai":
+            url, headers, data = translator_req.build_openai_request(
+                provider_config, api_key, model_config, prompt, tools
+            )
+        else:
+            raise ValueError(f"Tipo de proveedor no soportado: {provider_type}")
+
+        session = await self._get_session()
+        client_timeout = aiohttp.ClientTimeout(total=timeout)
+        async with session.post(url, headers=headers, json=data, timeout=client_timeout) as response:
+            if response.status >= 400:
+                body = await response.text()
+                if cached_content:
+                    translator_req.invalidate_gemini_cache(cached_content)
+                raise RuntimeError(f"HTTP {response.status}\nRespuesta detallada: {body}")
+
+            if stream:
+                return await self._read_stream(provider_config, response, stop_callback)
+
+            payload = await response.json(content_type=None)
+            translator_req.report_usage(provider_config, payload)
+            if tools:
+                if provider_type == "gemini":
+                    return translator_req._process_gemini_tool_response(payload)
+                return translator_req._process_tool_response(payload)
+            return translator_req._process_response(provider_type, payload, thinking)
+
+    async def _read_stream(self, provider_config: Dict, response, stop_callback) -> Optional[str]:
+        """Acumula un stream SSE, deteniéndose si el llamador lo solicita."""
+        provider_type = provider_config["type"]
+        chunks = []
+        async for line in response.content:
+            if stop_callback and stop_callback():
+                session_logger.log_info("Streaming interrumpido por solicitud del usuario")
+                return None
+            if not line.strip():
+                continue
+            usage_payload = translator_req.parse_sse_usage(line)
+            if usage_payload:
+                translator_req.report_usage(provider_config, usage_payload)
+            content, done = translator_req.parse_sse_line(provider_type, line)
+            if done:
+                break
+            if content:
+                chunks.append(content)
+
+        if not chunks:
+            return None
+        return translator_req._clean_translation(''.join(chunks))
+
+    async def translate_many(self, requests: List[Dict]) -> List[Optional[str]]:
+        """
+        Ejecuta varias peticiones a la vez respetando los semáforos por proveedor.
+
+        Args:
+            requests (List[Dict]): Argumentos con nombre para translate_segment()
+
+        Returns:
+            List[Optional[str]]: Resultados en el mismo orden que las peticiones
+        """
+        tasks = [asyncio.ensure_future(self.translate_segment(**request)) for request in requests]
+        try:
+            return await asyncio.gather(*tasks)
+        except asyncio.CancelledError:
+            for task in tasks:
+                task.cancel()
+            raise
+
+
+class AsyncEngineBridge:
+    """
+    Ejecuta un AsyncTranslationEngine en un event loop propio dentro de un hilo daemon.
+
+    Permite que código síncrono (workers de Qt, el worker sin interfaz) envíe
+    corrutinas al loop y espere o reciba el resultado mediante concurrent.futures.
+    """
+
+    def __init__(self, engine: AsyncTranslationEngine):
+        self.engine = engine
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run_loop, name="async-translation-engine", daemon=True)
+        self._thread.start()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    def submit(self, coroutine) -> Future:
+        """Programa una corrutina en el loop del motor y retorna su Future"""
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+
+    def translate_segment(self, provider: str, text: str, api_key: str, model_config: Dict,
+                          prompt, timeout: int = 120, tools: list = None,
+                          stop_callback: Optional[Callable[[], bool]] = None) -> Optional[str]:
+        """
+        Equivalente bloqueante de translator_req.translate_segment ejecutado en el loop.
+        Si stop_callback se activa mientras se espera, la petición se cancela.
+        """
+        future = self.submit(self.engine.translate_segment(
+            provider, text, api_key, model_config, prompt, timeout, tools, stop_callback
+        ))
+        while True:
+            try:
+                # Espera por intervalos para poder cancelar la petición en curso
+                return future.result(timeout=0.5)
+            except FutureTimeoutError:
+                if stop_callback and stop_callback():
+                    future.cancel()
+                    return None
+            except Exception as e:
+                session_logger.log_error(f"Error en el motor asíncrono: {str(e)}")
+                return None
+
+    def shutdown(self) -> None:
+        """Cierra la sesión HTTP y detiene el loop"""
+        if not self._loop.is_running():
+            return
+        try:
+            self.submit(self.engine.close()).result(timeout=5)
+        except Exception:
+            pass
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+
+
+def create_engine_bridge(models_config: Dict, engine_config: Optional[Dict]) -> Optional[AsyncEngineBridge]:
+    """
+    Crea el puente al motor asíncrono si está habilitado en la configuración.
+
+    Args:
+        models_config (Dict): Configuración de proveedores
+        engine_config (Optional[Dict]): Sección "async_engine" de config.json
+
+    Returns:
+        Optional[AsyncEngineBridge]: Puente listo para usar, o None si está deshabilitado
+    """
+    if not engine_config or not engine_config.get("enabled", False):
+        return None
+    if aiohttp is None:
+        session_logger.log_warning("aiohttp no está instalado; el motor asíncrono usará requests en un executor")
+    engine = AsyncTranslationEngine(
+        models_config,
+        max_concurrency=engine_config.get("max_concurrency"),
+        default_concurrency=engine_config.get("default_concurrency", 4),
+    )
+    return AsyncEngineBridge(engine)
@@ -1,11 +1,23 @@
 import os
 import json
-from typing import Dict, Optional
+import hashlib
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
 
 import requests
 
 from src.logic.session_logger import session_logger
 
+# Caché explícita de Gemini (cachedContents): duración y prefijo mínimo para crearla.
+# Gemini rechaza cachés de menos de ~1024 tokens, así que por debajo no se intenta.
+GEMINI_CACHE_TTL_SECONDS = 3600
+GEMINI_CACHE_MIN_CHARS = 4096
+
+# Nombre de cada cachedContent creado: clave -> (nombre o None si falló, expiración)
+_gemini_caches: Dict[str, Tuple[Optional[str], float]] = {}
+_gemini_caches_lock = threading.Lock()
+
 
 def translate_segment(
     provider: str,
@@ -33,18 +45,7 @@ def translate_segment(
         Optional[str]: Texto traducido recibido o None en caso de error
     """
     try:
-        # Para verificación de traducción, el texto está en el prompt, no en text
-        # Si text está vacío, usar la longitud del prompt para estimar el tamaño
-        text_length = len(text) if text else len(prompt)
-        
-        # Si el prompt es un diccionario con messages, estimar longitud basada en el contenido
-        if isinstance(prompt, dict) and "messages" in prompt:
-            total_length = 0
-            for message in prompt["messages"]:
-                if "content" in message:
-                    total_length += len(message["content"])
-            text_length = total_length
-        
+        text_length = estimate_prompt_length(text, prompt)
         session_logger.log_api_request(
             provider,
             model_config.get("model_id", model_config.get("endpoint", "unknown")),
@@ -89,6 +90,323 @@ def translate_segment(
         return None
 
 
+def estimate_prompt_length(text: str, prompt) -> int:
+    """Estima la longitud de la petición para el registro de la sesión."""
+    # Para verificación de traducción, el texto está en el prompt, no en text
+    # Si text está vacío, usar la longitud del prompt para estimar el tamaño
+    text_length = len(text) if text else len(prompt)
+
+    # Si el prompt es un diccionario con messages, estimar longitud basada en el contenido
+    if isinstance(prompt, dict) and "messages" in prompt:
+        total_length = 0
+        for message in prompt["messages"]:
+            if "content" in message:
+                total_length += len(message["content"])
+        text_length = total_length
+    return text_length
+
+
+def uses_prompt_cache(model_config: Dict) -> bool:
+    """Indica si el modelo tiene habilitada la caché de prompts del proveedor."""
+    return bool(model_config.get("prompt_cache", False))
+
+
+def split_system_prompt(prompt) -> Tuple[str, List[Dict]]:
+    """
+    Separa el prefijo estático (mensajes system) del resto de la conversación.
+
+    Returns:
+        Tuple[str, List[Dict]]: (texto de sistema, mensajes restantes en orden)
+    """
+    if isinstance(prompt, dict) and "messages" in prompt:
+        system_parts = [m.get("content", "") for m in prompt["messages"] if m.get("role") == "system"]
+        messages = [m for m in prompt["messages"] if m.get("role") != "system"]
+        return "\n\n".join(system_parts), messages
+    # Formato antiguo: solo texto en prompt
+    return "", [{"role": "user", "content": prompt}]
+
+
+def prompt_cache_key(system_text: str) -> str:
+    """Clave estable para agrupar peticiones que comparten el mismo prompt de sistema."""
+    return "nt-" + hashlib.sha256(system_text.encode("utf-8")).hexdigest()[:32]
+
+
+def get_gemini_cached_content(
+    provider_config: Dict,
+    api_key: str,
+    model_config: Dict,
+    prompt,
+    timeout: int = 120,
+) -> Optional[str]:
+    """
+    Retorna el nombre del cachedContent de Gemini para el prompt de sistema,
+    creándolo la primera vez.
+
+    El mismo nombre se reutiliza en todos los segmentos, comprobaciones y
+    refinamientos que compartan prompt de sistema, modelo y API key. Si la
+    creación falla (prefijo demasiado corto, modelo sin soporte), no se vuelve
+    a intentar hasta que venza el TTL y las peticiones envían el prompt completo.
+
+    Returns:
+        Optional[str]: Nombre del recurso (ej. "cachedContents/abc") o None
+    """
+    if not uses_prompt_cache(model_config):
+        return None
+    system_text, _ = split_system_prompt(prompt)
+    if len(system_text) < model_config.get("prompt_cache_min_chars", GEMINI_CACHE_MIN_CHARS):
+        return None
+
+    model_name = model_config["endpoint"].split(":")[0]
+    cache_key = hashlib.sha256(f"{api_key}\0{model_name}\0{system_text}".encode("utf-8")).hexdigest()
+    now = time.time()
+    with _gemini_caches_lock:
+        entry = _gemini_caches.get(cache_key)
+        # Margen de un minuto para no usar una caché a punto de expirar
+        if entry and entry[1] > now + 60:
+            return entry[0]
+
+    base_url = provider_config["base_url"].rsplit("/models", 1)[0]
+    url = f"{base_url}/cachedContents?key={api_key}"
+    data = {
+        "model": f"models/{model_name}",
+        "systemInstruction": {"parts": [{"text": system_text}]},
+        "ttl": f"{GEMINI_CACHE_TTL_SECONDS}s",
+    }
+    name = None
+    try:
+        response = requests.post(url, headers={"Content-Type": "application/json"}, json=data, timeout=timeout)
+        response.raise_for_status()
+        name = response.json().get("name")
+        session_logger.log_info(f"Caché de Gemini creada para {model_name}: {name}")
+    except (requests.exceptions.RequestException, ValueError) as e:
+        session_logger.log_warning(f"No se pudo crear la caché de Gemini para {model_name}: {str(e)}")
+
+    with _gemini_caches_lock:
+        _gemini_caches[cache_key] = (name, now + GEMINI_CACHE_TTL_SECONDS)
+    return name
+
+
+def invalidate_gemini_cache(name: str) -> None:
+    """Olvida un cachedContent que el servidor ya no acepta."""
+    with _gemini_caches_lock:
+        for cache_key, (cached_name, _) in list(_gemini_caches.items()):
+            if cached_name == name:
+                del _gemini_caches[cache_key]
+
+
+def extract_usage(provider_type: str, payload: Dict) -> Optional[Tuple[int, int]]:
+    """
+    Obtiene los tokens de entrada y los servidos desde caché de una respuesta.
+
+    Returns:
+        Optional[Tuple[int, int]]: (tokens de entrada, tokens en caché) o None si no hay datos
+    """
+    if not isinstance(payload, dict):
+        return None
+    if provider_type == "gemini":
+        usage = payload.get("usageMetadata")
+        if not usage:
+            return None
+        return usage.get("promptTokenCount", 0), usage.get("cachedContentTokenCount", 0)
+
+    usage = payload.get("usage")
+    if not usage:
+        return None
+    details = usage.get("prompt_tokens_details") or {}
+    # OpenAI informa cached_tokens; DeepSeek y compatibles prompt_cache_hit_tokens
+    cached = details.get("cached_tokens") or usage.get("prompt_cache_hit_tokens") or 0
+    return usage.get("prompt_tokens", 0), cached
+
+
+def report_usage(provider_config: Dict, payload: Dict) -> None:
+    """Registra en el log el uso de caché de una respuesta, si el proveedor lo informa."""
+    usage = extract_usage(provider_config["type"], payload)
+    if usage and usage[0]:
+        session_logger.log_cache_usage(provider_config.get("name", provider_config["type"]), *usage)
+
+
+def parse_sse_usage(line) -> Optional[Dict]:
+    """Retorna el JSON de una línea SSE si contiene datos de uso, o None."""
+    line_str = line.decode('utf-8') if isinstance(line, bytes) else line
+    line_str = line_str.strip()
+    # Comprobación barata antes de decodificar: solo el último fragmento trae el uso
+    if not line_str.startswith('data:') or 'usage' not in line_str:
+        return None
+    try:
+        data = json.loads(line_str[5:].strip())
+    except json.JSONDecodeError:
+        return None
+    return data if isinstance(data, dict) and (data.get("usage") or data.get("usageMetadata")) else None
+
+
+def build_gemini_request(
+    provider_config: Dict,
+    api_key: str,
+    model_config: Dict,
+    prompt,
+    tools: list = None,
+    stream: bool = False,
+    cached_content: Optional[str] = None,
+) -> Tuple[str, Dict, Dict]:
+    """
+    Construye URL, cabeceras y cuerpo de una petición a Gemini.
+
+    Los mensajes system se envían como systemInstruction (prefijo estático, idéntico
+    byte a byte entre peticiones) y el resto como contents con su rol.
+
+    Args:
+        stream (bool): Si True, usa el endpoint streamGenerateContent con eventos SSE
+        cached_content (Optional[str]): cachedContent que ya contiene el prompt de sistema
+
+    Returns:
+        Tuple[str, Dict, Dict]: (url, headers, data)
+    """
+    endpoint = model_config["endpoint"]
+    if stream:
+        endpoint = endpoint.replace(":generateContent", ":streamGenerateContent")
+        url = f"{provider_config['base_url']}/{endpoint}?alt=sse&key={api_key}"
+    else:
+        url = f"{provider_config['base_url']}/{endpoint}?key={api_key}"
+    headers = {"Content-Type": "application/json"}
+
+    system_text, messages = split_system_prompt(prompt)
+    # Gemini usa "parts" en lugar de "content" y el rol "model" en lugar de "assistant"
+    contents = [
+        {
+            "role": "model" if message.get("role") == "assistant" else "user",
+            "parts": [{"text": message.get("content", "")}],
+        }
+        for message in messages
+    ]
+    if not contents and system_text and not cached_content:
+        # Gemini exige al menos un mensaje en contents
+        contents = [{"role": "user", "parts": [{"text": system_text}]}]
+        system_text = ""
+
+    data = {}
+    if cached_content:
+        data["cachedContent"] = cached_content
+    elif system_text:
+        data["systemInstruction"] = {"parts": [{"text": system_text}]}
+    data["contents"] = contents
+    data["generationConfig"] = {"temperature": model_config.get("temperature", 0.6)}
+    if tools:
+        # Convertir tools de formato OpenAI a formato Gemini
+        data["tools"] = _convert_tools_to_gemini_format(tools)
+    return url, headers, data
+
+
+def build_openai_request(
+    provider_config: Dict,
+    api_key: str,
+    model_config: Dict,
+    prompt,
+    tools: list = None,
+) -> Tuple[str, Dict, Dict]:
+    """
+    Construye URL, cabeceras y cuerpo de una petición compatible con OpenAI.
+
+    Returns:
+        Tuple[str, Dict, Dict]: (url, headers, data)
+    """
+    url = provider_config["base_url"]
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json",
+    }
+    if provider_config.get("name") == "Mistral":
+        headers["Accept"] = "application/json"
+    # Determinar el formato del prompt (string o dict con messages)
+    messages = []
+    if isinstance(prompt, dict) and "messages" in prompt:
+        # Nuevo formato con roles system/user
+        messages = prompt["messages"]
+    else:
+        # Formato antiguo: solo texto en prompt
+        messages = [{"role": "user", "content": prompt}]
+
+    data = {
+        "model": model_config["endpoint"],
+        "messages": messages,
+        **(
+            {"temperature": model_config["temperature"]}
+            if model_config.get("temperature") is not None
+            else {}
+        ),
+        **(
+            {"top_p": model_config["top_p"]}
+            if model_config.get("top_p") is not None
+            else {}
+        ),
+        **(
+            {"max_tokens": model_config["max_tokens"]}
+            if model_config.get("max_tokens") is not None
+            else {}
+        ),
+        "stream": model_config.get("stream", False),
+    }
+
+    # Incluir parámetro 'reasoning' si está configurado en el modelo
+    if model_config.get("include_reasoning", False):
+        data["reasoning"] = {"enabled": model_config.get("reasoning", False)}
+
+    # Pista de caché: las peticiones con el mismo prompt de sistema se enrutan juntas
+    if uses_prompt_cache(model_config):
+        system_text, _ = split_system_prompt(prompt)
+        if system_text:
+            data["prompt_cache_key"] = prompt_cache_key(system_text)
+        if data["stream"]:
+            data["stream_options"] = {"include_usage": True}
+
+    # Agregar tools si se proporcionan
+    if tools:
+        data["tools"] = tools
+        data["tool_choice"] = "auto"
+    return url, headers, data
+
+
+def parse_sse_line(provider_type: str, line) -> Tuple[Optional[str], bool]:
+    """
+    Interpreta una línea de un stream SSE.
+
+    Args:
+        provider_type (str): Tipo de proveedor ('openai' o 'gemini')
+        line: Línea recibida (bytes o str)
+
+    Returns:
+        Tuple[Optional[str], bool]: (fragmento de texto, True si el stream terminó)
+    """
+    # Decodificar bytes a string si es necesario
+    line_str = line.decode('utf-8') if isinstance(line, bytes) else line
+    line_str = line_str.strip()
+    if not line_str.startswith('data:'):
+        return None, False
+
+    # Extraer el JSON de los datos
+    json_str = line_str[5:].strip()
+    if json_str == '[DONE]':
+        return None, True
+    try:
+        data = json.loads(json_str)
+    except json.JSONDecodeError:
+        # Ignorar líneas que no son JSON válido
+        return None, False
+
+    if provider_type == "gemini":
+        candidates = data.get('candidates') or []
+        if candidates:
+            parts = candidates[0].get('content', {}).get('parts', [])
+            text = ''.join(part.get('text', '') for part in parts)
+            return text or None, False
+        return None, False
+
+    if data.get('choices'):
+        delta = data['choices'][0].get('delta', {})
+        if delta.get('content'):
+            return delta['content'], False
+    return None, False
+
+
 def _translate_gemini(
     provider_config: Dict,
     api_key: str,
@@ -96,28 +414,11 @@ def _translate_gemini(
     prompt: str,
     timeout: int = 120,
 ) -> Optional[str]:
+    cached_content = get_gemini_cached_content(provider_config, api_key, model_config, prompt, timeout)
     try:
-        url = f"{provider_config['base_url']}/{model_config['endpoint']}?key={api_key}"
-        headers = {"Content-Type": "application/json"}
-        
-        # Determinar el formato del prompt (string o dict con messages)
-        contents = []
-        if isinstance(prompt, dict) and "messages" in prompt:
-            # Nuevo formato con roles system/user - convertir a formato Gemini
-            for message in prompt["messages"]:
-                role = message.get("role", "user")
-                content = message.get("content", "")
-                # Gemini usa "parts" en lugar de "content" y no tiene roles como OpenAI
-                # Para Gemini, simplemente usamos el contenido sin distinguir roles
-                contents.append({"parts": [{"text": content}]})
-        else:
-            # Formato antiguo: solo texto en prompt
-            contents = [{"parts": [{"text": prompt}]}]
-        
-        data = {
-            "contents": contents,
-            "generationConfig": {"temperature": model_config.get("temperature", 0.6)},
-        }
+        url, headers, data = build_gemini_request(
+            provider_config, api_key, model_config, prompt, cached_content=cached_content
+        )
         response = requests.post(url, headers=headers, json=data, timeout=timeout)
         response.raise_for_status()
         
@@ -127,14 +428,20 @@ def _translate_gemini(
                 provider_config["type"],
                 response,
                 model_config.get("thinking", False),
+                provider_config,
             )
         else:
+            payload = response.json()
+            report_usage(provider_config, payload)
             return _process_response(
                 provider_config["type"],
-                response.json(),
+                payload,
                 model_config.get("thinking", False),
             )
     except requests.exceptions.RequestException as e:
+        if cached_content:
+            # La caché pudo expirar en el servidor; la siguiente petición la recrea
+            invalidate_gemini_cache(cached_content)
         error_msg = f"Error HTTP Gemini: {str(e)}"
         response_text = None
         if hasattr(e, "response") and e.response:
@@ -156,68 +463,28 @@ def _translate_openai_like(
     tools: list = None,
 ) -> Optional[str]:
     try:
-        url = provider_config["base_url"]
-        headers = {
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json",
-        }
-        if provider_config.get("name") == "Mistral":
-            headers["Accept"] = "application/json"
-        # Determinar el formato del prompt (string o dict con messages)
-        messages = []
-        if isinstance(prompt, dict) and "messages" in prompt:
-            # Nuevo formato con roles system/user
-            messages = prompt["messages"]
-        else:
-            # Formato antiguo: solo texto en prompt
-            messages = [{"role": "user", "content": prompt}]
-        
-        data = {
-            "model": model_config["endpoint"],
-            "messages": messages,
-            **(
-                {"temperature": model_config["temperature"]}
-                if model_config.get("temperature") is not None
-                else {}
-            ),
-            **(
-                {"top_p": model_config["top_p"]}
-                if model_config.get("top_p") is not None
-                else {}
-            ),
-            **(
-                {"max_tokens": model_config["max_tokens"]}
-                if model_config.get("max_tokens") is not None
-                else {}
-            ),
-            "stream": model_config.get("stream", False),
-        }
-
-        # Incluir parámetro 'reasoning' si está configurado en el modelo
-        if model_config.get("include_reasoning", False):
-            data["reasoning"] = {"enabled": model_config.get("reasoning", False)}
-
-        # Agregar tools si se proporcionan
-        if tools:
-            data["tools"] = tools
-            data["tool_choice"] = "auto"
-
+        url, headers, data = build_openai_request(provider_config, api_key, model_config, prompt, tools)
         response = requests.post(url, headers=headers, json=data, timeout=timeout)
         response.raise_for_status()
 
         # Procesar respuesta según si es streaming o no
         if tools:
-            return _process_tool_response(response.json())
+            payload = response.json()
+            report_usage(provider_config, payload)
+            return _process_tool_response(payload)
         elif model_config.get("stream", False):
             return _process_streaming_response(
                 provider_config["type"],
                 response,
                 model_config.get("thinking", False),
+                provider_config,
             )
         else:
+            payload = response.json()
+            report_usage(provider_config, payload)
             return _process_response(
                 provider_config["type"],
-                response.json(),
+                payload,
                 model_config.get("thinking", False),
             )
     except Exception as e:
@@ -285,7 +552,7 @@ def _process_response(
 
 
 def _process_streaming_response(
-    provider_type: str, response, thinking: bool = False
+    provider_type: str, response, thinking: bool = False, provider_config: Optional[Dict] = None
 ) -> Optional[str]:
     """
     Procesa la respuesta en streaming del proveedor basado en su tipo y configuración de thinking.
@@ -294,6 +561,7 @@ def _process_streaming_response(
         provider_type (str): Tipo de proveedor ('openai' o 'gemini')
         response: Respuesta HTTP con streaming
         thinking (bool): Si True, maneja respuestas con thinking tokens
+        provider_config (Optional[Dict]): Configuración del proveedor para registrar el uso de caché
 
     Returns:
         Optional[str]: Texto traducido limpio o None si hay error
@@ -304,26 +572,14 @@ def _process_streaming_response(
             # Usar iter_lines() para manejar correctamente el buffering de líneas SSE
             for line in response.iter_lines():
                 if line:
-                    # Decodificar bytes a string si es necesario
-                    line_str = line.decode('utf-8') if isinstance(line, bytes) else line
-                    line_str = line_str.strip()
-                    
-                    if line_str.startswith('data:'):
-                        # Extraer el JSON de los datos
-                        json_str = line_str[5:].strip()  # Remover 'data: ' y espacios
-                        if json_str == '[DONE]':
-                            break
-                        try:
-                            data = json.loads(json_str)
-                            if data.get('choices'):
-                                choice = data['choices'][0]
-                                if 'delta' in choice:
-                                    delta = choice['delta']
-                                    if 'content' in delta and delta['content']:
-                                        full_content += delta['content']
-                        except json.JSONDecodeError:
-                            # Ignorar líneas que no son JSON válido
-                            pass
+                    usage_payload = parse_sse_usage(line) if provider_config else None
+                    if usage_payload:
+                        report_usage(provider_config, usage_payload)
+                    content, done = parse_sse_line(provider_type, line)
+                    if done:
+                        break
+                    if content:
+                        full_content += content
             
             if not full_content:
                 return None
@@ -425,32 +681,13 @@ def _translate_gemini_with_tools(
     Convierte el formato OpenAI de tools al formato nativo de Gemini.
     """
     try:
-        url = f"{provider_config['base_url']}/{model_config['endpoint']}?key={api_key}"
-        headers = {"Content-Type": "application/json"}
-
-        # Construir contents
-        contents = []
-        if isinstance(prompt, dict) and "messages" in prompt:
-            for message in prompt["messages"]:
-                contents.append({"parts": [{"text": message.get("content", "")}]})
-        else:
-            contents = [{"parts": [{"text": prompt}]}]
-
-        # Convertir tools de formato OpenAI a formato Gemini
-        gemini_tools = _convert_tools_to_gemini_format(tools)
-
-        data = {
-            "contents": contents,
-            "generationConfig": {
-                "temperature": model_config.get("temperature", 0.6)
-            },
-            "tools": gemini_tools,
-        }
-
+        url, headers, data = build_gemini_request(provider_config, api_key, model_config, prompt, tools)
         response = requests.post(url, headers=headers, json=data, timeout=timeout)
         response.raise_for_status()
 
-        return _process_gemini_tool_response(response.json())
+        payload = response.json()
+        report_usage(provider_config, payload)
+        return _process_gemini_tool_response(payload)
 
     except requests.exceptions.RequestException as e:
         error_msg = f"Error HTTP Gemini (tools): {str(e)}"
@@ -0,0 +1,170 @@
+"""
+Worker de traducción sin interfaz gráfica.
+
+Permite que varios equipos traduzcan la misma biblioteca compartida (p. ej. en un NAS)
+al mismo tiempo. Cada worker reclama capítulos mediante leases en la base de datos de
+la novela, los renueva mientras traduce y publica cada capítulo una sola vez.
+
+Uso:
+    python worker.py /ruta/a/novela --provider chutes --model mistral-3.2
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+from src.logic.check_sampler import CheckSampler
+from src.logic.database import TranslationDatabase, JournalModeError, set_journal_mode, content_hash
+from src.logic.folder_structure import NovelFolderStructure
+from src.logic.lease_queue import ChapterLeaseQueue, LeaseRenewer
+from src.logic.prompt_registry import prompt_registry
+from src.logic.rate_limiter import rate_limits
+from src.logic.session_logger import session_logger
+from src.logic.translator import TranslatorLogic
+from src.logic.translator_async import create_engine_bridge
+
+
+def _natural_key(name: str):
+    return [int(part) if part.isdigit() else part.lower() for part in re.split(r'(\d+)', name)]
+
+
+def _load_config() -> dict:
+    config_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), "src", "config", "config.json")
+    try:
+        with open(config_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (json.JSONDecodeError, IOError):
+        return {}
+
+
+def parse_args(config: dict) -> argparse.Namespace:
+    lease_config = config.get("distributed_workers", {})
+    parser = argparse.ArgumentParser(description="Worker de traducción para bibliotecas compartidas")
+    parser.add_argument("directory", help="Directorio de la novela")
+    parser.add_argument("--provider", default=config.get("provider", ""))
+    parser.add_argument("--model", default=config.get("model", ""))
+    parser.add_argument("--source", default=config.get("source_language", "en-US"))
+    parser.add_argument("--target", default=config.get("target_language", "es-MX"))
+    parser.add_argument("--worker-id", default=None, help="Identificador del worker (por defecto host:pid)")
+    parser.add_argument("--lease-seconds", type=int, default=lease_config.get("lease_seconds", 600))
+    parser.add_argument("--max-attempts", type=int, default=lease_config.get("max_attempts", 3),
+                        help="Intentos por capítulo antes de omitirlo en esta ejecución")
+    parser.add_argument("--no-check", action="store_true", help="Desactiva la comprobación de calidad")
+    parser.add_argument("--refine", action="store_true", help="Activa el refinamiento por segmento")
+    parser.add_argument("--retranslate", action="store_true", help="Permite retraducir capítulos ya traducidos")
+    parser.add_argument("--wait", action="store_true",
+                        help="Espera a que expiren los leases de otros workers en lugar de salir")
+    return parser.parse_args()
+
+
+def main() -> int:
+    env_path = Path(__file__).parent / '.env'
+    if env_path.exists():
+        load_dotenv(dotenv_path=env_path)
+
+    config = _load_config()
+    args = parse_args(config)
+
+    directory = args.directory
+    if not os.path.isdir(directory):
+        print(f"Directorio no encontrado: {directory}")
+        return 1
+
+    db = TranslationDatabase(directory)
+    # La biblioteca se comparte entre equipos (p. ej. en un NAS): sin WAL. El modo se
+    # guarda en la novela para que la GUI y los demás workers también lo usen
+    try:
+        set_journal_mode(db.db_path, "DELETE")
+    except JournalModeError as e:
+        print(e)
+        return 1
+    queue = ChapterLeaseQueue(directory, worker_id=args.worker_id, lease_seconds=args.lease_seconds)
+    translator = TranslatorLogic()
+
+    api_key = translator._get_api_key_for_provider(args.provider)
+    if not api_key:
+        print(f"No se encontró API key para {args.provider} ({args.provider.upper()}_API_KEY)")
+        return 1
+
+    request_engine = create_engine_bridge(translator.models_config, config.get("async_engine"))
+    translator.set_request_engine(request_engine)
+    rate_limits.configure(config.get("rate_limits"))
+
+    # Usar los prompts personalizados de la novela, igual que la GUI
+    prompt_registry.set_novel_directory(directory)
+
+    files = sorted(NovelFolderStructure.get_original_files(directory), key=_natural_key)
+    custom_terms = db.get_custom_terms()
+    check_sampler = None if args.no_check else CheckSampler.from_config(config.get("check_sampling"))
+
+    translated_count = 0
+    failures = {}
+    try:
+        while True:
+            lease = queue.claim_next(files, allow_retranslation=args.retranslate)
+            if not lease:
+                if args.wait and queue.active_leases() > 0:
+                    time.sleep(max(5, args.lease_seconds / 10))
+                    continue
+                break
+
+            print(f"[{queue.worker_id}] Traduciendo {lease.filename}")
+            session_logger.log_translation_start(lease.filename, args.source, args.target)
+            renewer = LeaseRenewer(queue, lease)
+            renewer.start()
+            try:
+                # El backend se resuelve por capítulo: la novela puede migrarse entre carpetas y base
+                text = NovelFolderStructure.get_storage(directory).read("original", lease.filename)
+                translated_text = translator.translate_text(
+                    text, args.source, args.target, api_key, args.provider, args.model,
+                    custom_terms,
+                    enable_check=not args.no_check,
+                    enable_refine=args.refine,
+                    check_refine_settings=config.get("check_refine_settings"),
+                    segmentation_config=config.get("auto_segmentation"),
+                    timeout=config.get("timeout", 120),
+                    stop_callback=lambda: renewer.lost,
+                    precheck_config=config.get("precheck"),
+                    check_cache=db,
+                    check_sampler=check_sampler,
+                    filter_glossary=config.get("glossary", {}).get("filter_terms", True)
+                )
+            except (OSError, UnicodeDecodeError) as e:
+                session_logger.log_error(f"Error leyendo {lease.filename}: {e}")
+                translated_text = None
+            finally:
+                renewer.stop()
+
+            if translated_text and queue.finalize(lease, translated_text, args.source, args.target,
+                                                  content_hash(text)):
+                db.save_translation_source(lease.filename, text)
+                translated_count += 1
+                session_logger.log_translation_complete(lease.filename, True)
+                # Los capítulos finalizados no vuelven a revisarse y con --retranslate
+                # no se traducen dos veces
+                files.remove(lease.filename)
+            else:
+                queue.release(lease)
+                session_logger.log_translation_complete(lease.filename, False)
+                # Los fallos se reintentan un número limitado de veces por ejecución
+                failures[lease.filename] = failures.get(lease.filename, 0) + 1
+                if failures[lease.filename] >= args.max_attempts:
+                    print(f"[{queue.worker_id}] {lease.filename} omitido tras {args.max_attempts} intentos")
+                    files.remove(lease.filename)
+    except KeyboardInterrupt:
+        print("Worker detenido por el usuario")
+    finally:
+        if request_engine:
+            request_engine.shutdown()
+
+    print(f"[{queue.worker_id}] {translated_count} capítulos traducidos")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())